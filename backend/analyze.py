@@ -0,0 +1,119 @@
+"""
+Combined readability prediction and conditional simplification.
+"""
+
+import os
+from datetime import datetime
+from typing import Optional
+
+from dotenv import load_dotenv
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel
+
+from auth import get_current_active_user
+from predict import score_text
+from simplify import DECODING_PROFILES, DEFAULT_PROFILE, simplify_any
+from utils.history_writer import history_writer
+
+load_dotenv()
+
+router = APIRouter()
+
+# Simplify when the probability of "Difficult" reaches this, even if the label is "Easy"
+DIFFICULTY_THRESHOLD = float(os.getenv("ANALYZE_DIFFICULTY_THRESHOLD", "0.5"))
+
+# --- Request/Response models ---
+class TextRequest(BaseModel):
+    text: str
+
+class AnalyzeResponse(BaseModel):
+    score: float
+    label: str
+    difficulty: float
+    simplified: Optional[str] = None
+    method: Optional[str] = None
+    simplify_error: Optional[str] = None
+
+def difficulty_of(prediction: dict) -> float:
+    """Probability that the text is Difficult, from the winning class score."""
+    return prediction["score"] if prediction["label"] == "Difficult" else 1.0 - prediction["score"]
+
+# --- API Route ---
+@router.post("/", response_model=AnalyzeResponse)
+async def analyze_text(
+    request: TextRequest,
+    method: str = Query("openai", enum=["openai", "mt5", "auto"]),
+    profile: str = Query(DEFAULT_PROFILE, enum=list(DECODING_PROFILES)),
+    threshold: float = Query(DIFFICULTY_THRESHOLD, ge=0.0, le=1.0, description="Difficulty from which to simplify"),
+    current_user: dict = Depends(get_current_active_user)
+):
+    """
+    Score a text and simplify it only if it is hard to read, in one call.
+
+    Replaces calling `/predict/`, `/simplify/` and `/history/save` in turn:
+    one round trip, one authentication and a single prediction history
+    entry that holds the simplification too, so clearing, exporting and
+    archiving history need no second record to keep in step. A failed
+    simplification still returns the prediction, with `simplify_error` set.
+
+    Args:
+        request (TextRequest): Request containing the text
+        method (str): Simplification method ("openai", "mt5" or "auto")
+        profile (str): MT5 decoding profile
+        threshold (float): Simplify when the Difficult probability reaches this
+        current_user (dict): Current authenticated user
+
+    Returns:
+        AnalyzeResponse: Prediction, and the simplified text when it was needed
+
+    Raises:
+        HTTPException: If prediction fails
+    """
+    try:
+        if method not in ("openai", "mt5", "auto") or profile not in DECODING_PROFILES:
+            raise HTTPException(status_code=400, detail="Invalid method or profile")
+
+        # 1. Predict
+        prediction = await score_text(request.text)
+        difficulty = difficulty_of(prediction)
+
+        # 2. Simplify only texts that need it
+        simplified_text, used_method, route, simplify_error = None, None, None, None
+        if prediction["label"] == "Difficult" or difficulty >= threshold:
+            used_method = method
+            try:
+                simplified_text, route = await simplify_any(request.text, method, profile)
+                if route is not None:
+                    used_method = route["method"]
+            except HTTPException as e:
+                simplify_error = str(e.detail)
+            except Exception as e:
+                simplify_error = str(e)
+
+        # 3. One history record, flushed in the background
+        entry = {
+            "text": request.text,
+            "score": prediction["score"],
+            "label": prediction["label"],
+            "simplified": simplified_text,
+            "simplify_method": used_method if simplified_text is not None else None,
+            "timestamp": datetime.utcnow(),
+            "user": current_user["username"]
+        }
+        if simplified_text is not None and route is not None:
+            entry["route"] = route
+        history_writer.add("prediction_history", entry)
+
+        return AnalyzeResponse(
+            score=prediction["score"],
+            label=prediction["label"],
+            difficulty=difficulty,
+            simplified=simplified_text,
+            method=used_method,
+            simplify_error=simplify_error
+        )
+
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
@@ -3,17 +3,22 @@ JWT authentication and user login functionality.
 """
 from database import db
 
-from datetime import timedelta
-from typing import Optional, Dict
-from fastapi import APIRouter, Depends, HTTPException, status
+import os
+from datetime import datetime, timedelta
+from typing import Optional, Dict, List
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
+from pydantic import BaseModel, Field
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from utils.cache import LRUCache
 from utils.token_handler import token_handler
 
 # OAuth2 settings
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/token")
 
-# Fake database (in production, replace with real database)
-fake_users_db = {
+# Default accounts, inserted into the users collection if missing (SEED_DEFAULT_USERS=0 to skip)
+DEFAULT_USERS = {
     "admin": {
         "username": "admin",
         "full_name": "Admin User",
@@ -32,45 +37,105 @@ fake_users_db = {
     }
 }
 
+ROLES = ("user", "admin")
+
+# User records read by every authenticated request. Changes made through
+# this process invalidate the entry at once; other processes see them after
+# USER_CACHE_TTL seconds at most.
+user_cache = LRUCache(
+    max_size=int(os.getenv("USER_CACHE_SIZE", "10000")),
+    ttl_seconds=float(os.getenv("USER_CACHE_TTL", "30"))
+)
+
 router = APIRouter()
 
+# --- Pydantic Schemas ---
+class UserCreate(BaseModel):
+    username: str = Field(..., min_length=3, max_length=50, pattern=r"^[A-Za-z0-9_.-]+$")
+    password: str = Field(..., min_length=6, max_length=128)
+    full_name: Optional[str] = None
+    email: Optional[str] = None
+
+class UserUpdate(BaseModel):
+    disabled: Optional[bool] = None
+    role: Optional[str] = None
+    full_name: Optional[str] = None
+    email: Optional[str] = None
+
+class UserOut(BaseModel):
+    username: str
+    full_name: Optional[str] = None
+    email: Optional[str] = None
+    disabled: bool = False
+    role: str = "user"
+
 # Helper functions
 
-def get_user(db, username: str):
-    """Get user from fake database"""
-    if username in db:
-        user_dict = db[username]
-        return user_dict
+async def ensure_user_indexes():
+    """Create the unique username index and seed the default accounts."""
+    await db.users.create_index("username", unique=True)
+    if os.getenv("SEED_DEFAULT_USERS", "1") != "0":
+        for user in DEFAULT_USERS.values():
+            await db.users.update_one(
+                {"username": user["username"]},
+                {"$setOnInsert": {**user, "created_at": datetime.utcnow()}},
+                upsert=True
+            )
+
+async def get_user(username: str) -> Optional[dict]:
+    """
+    Get a user record, from `user_cache` when possible.
+
+    Args:
+        username (str): User's username
+
+    Returns:
+        Optional[dict]: User data, or None if there is no such user
+    """
+    user = user_cache.get(username)
+    if user is not None:
+        return user
+
+    user = await db.users.find_one({"username": username}, {"_id": 0})
+    if user is not None:
+        user_cache.set(username, user)
+    return user
+
+def invalidate_user(username: str):
+    """Drop a cached user record after it changed."""
+    user_cache.delete(username)
 
-def authenticate_user(fake_db, username: str, password: str):
+async def authenticate_user(username: str, password: str):
     """
-    Authenticate user against fake database.
-    
+    Authenticate user against the users collection.
+
+    The bcrypt check runs on a worker thread, so concurrent logins do not
+    block other requests.
+
     Args:
-        fake_db (dict): Fake user database
         username (str): User's username
         password (str): User's password
-        
+
     Returns:
         dict: User data if authenticated, None otherwise
     """
-    user = get_user(fake_db, username)
+    user = await get_user(username)
     if not user:
         return None
-    if not token_handler.verify_password(password, user["hashed_password"]):
+    if not await token_handler.averify_password(password, user["hashed_password"]):
         return None
     return user
 
-def get_current_user(token: str = Depends(oauth2_scheme)):
+async def get_current_user(token: str = Depends(oauth2_scheme)):
     """
     Get current user from token.
-    
+
     Args:
         token (str): JWT token
-        
+
     Returns:
         dict: User data
-        
+
     Raises:
         HTTPException: If token is invalid
     """
@@ -87,8 +152,8 @@ def get_current_user(token: str = Depends(oauth2_scheme)):
         token_data = username
     except:
         raise credentials_exception
-    
-    user = get_user(fake_users_db, username=token_data)
+
+    user = await get_user(token_data)
     if user is None:
         raise credentials_exception
     return user
@@ -96,13 +161,13 @@ def get_current_user(token: str = Depends(oauth2_scheme)):
 def get_current_active_user(current_user: dict = Depends(get_current_user)):
     """
     Get current active user.
-    
+
     Args:
         current_user (dict): Current user data
-        
+
     Returns:
         dict: User data
-        
+
     Raises:
         HTTPException: If user is disabled
     """
@@ -113,17 +178,17 @@ def get_current_active_user(current_user: dict = Depends(get_current_user)):
 def get_current_active_admin(current_user: dict = Depends(get_current_user)):
     """
     Get current active admin user.
-    
+
     Args:
         current_user (dict): Current user data
-        
+
     Returns:
         dict: User data
-        
+
     Raises:
         HTTPException: If user is not admin
     """
-    if current_user.get("role") != "admin":
+    if current_user.get("role") != "admin" or current_user.get("disabled"):
         raise HTTPException(
             status_code=403,
             detail="The user doesn't have enough privileges"
@@ -136,31 +201,141 @@ def get_current_active_admin(current_user: dict = Depends(get_current_user)):
 async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends()):
     """
     Authenticate user and return access token.
-    
+
     Args:
         form_data (OAuth2PasswordRequestForm): Form data containing username and password
-        
+
     Returns:
         dict: Access token and token type
-        
+
     Raises:
         HTTPException: If authentication fails
     """
-    user = authenticate_user(fake_users_db, form_data.username, form_data.password)
+    user = await authenticate_user(form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    
+
     access_token_expires = timedelta(minutes=30)
     access_token = token_handler.create_access_token(
         data={"sub": user["username"]},
         expires_delta=access_token_expires
     )
-    
+
     return {
         "access_token": access_token,
         "token_type": "bearer"
     }
+
+@router.post("/register", response_model=UserOut, status_code=status.HTTP_201_CREATED)
+async def register(user: UserCreate):
+    """
+    Create a regular user account.
+
+    Args:
+        user (UserCreate): Username, password and optional profile fields
+
+    Returns:
+        UserOut: The created user
+
+    Raises:
+        HTTPException: 409 if the username is taken
+    """
+    try:
+        record = {
+            "username": user.username,
+            "full_name": user.full_name,
+            "email": user.email,
+            "hashed_password": await token_handler.aget_password_hash(user.password),
+            "disabled": False,
+            "role": "user",
+            "created_at": datetime.utcnow()
+        }
+        await db.users.insert_one(record)
+        invalidate_user(user.username)
+        return UserOut(**record)
+
+    except DuplicateKeyError:
+        raise HTTPException(status_code=409, detail="Username already registered")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Registration error: {str(e)}")
+
+# --- Admin user management ---
+@router.get("/users", response_model=List[UserOut])
+async def list_users(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
+    current_user: dict = Depends(get_current_active_admin)
+):
+    """List user accounts ordered by username (admin only)."""
+    try:
+        users = await db.users.find({}, {"_id": 0, "hashed_password": 0}).sort("username", 1).skip(skip).limit(limit).to_list(length=limit)
+        return [UserOut(**user) for user in users]
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Load error: {str(e)}")
+
+@router.patch("/users/{username}", response_model=UserOut)
+async def update_user(
+    username: str,
+    changes: UserUpdate,
+    current_user: dict = Depends(get_current_active_admin)
+):
+    """
+    Disable/enable a user, change their role or profile (admin only).
+
+    The cached record is dropped so the change applies to the user's next
+    request.
+
+    Args:
+        username (str): User to update
+        changes (UserUpdate): Fields to change
+        current_user (dict): Current authenticated admin
+
+    Returns:
+        UserOut: The updated user
+
+    Raises:
+        HTTPException: 400 for an unknown role, 404 if the user does not exist
+    """
+    try:
+        update = changes.model_dump(exclude_none=True)
+        if "role" in update and update["role"] not in ROLES:
+            raise HTTPException(status_code=400, detail=f"Role must be one of: {', '.join(ROLES)}")
+        if not update:
+            raise HTTPException(status_code=400, detail="Nothing to update")
+
+        user = await db.users.find_one_and_update(
+            {"username": username},
+            {"$set": update},
+            projection={"_id": 0, "hashed_password": 0},
+            return_document=ReturnDocument.AFTER
+        )
+        invalidate_user(username)
+        if user is None:
+            raise HTTPException(status_code=404, detail="User not found")
+        return UserOut(**user)
+
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Update error: {str(e)}")
+
+@router.delete("/users/{username}")
+async def delete_user(username: str, current_user: dict = Depends(get_current_active_admin)):
+    """Delete a user account (admin only). Their history is kept."""
+    try:
+        if username == current_user["username"]:
+            raise HTTPException(status_code=400, detail="Admins cannot delete their own account")
+        result = await db.users.delete_one({"username": username})
+        invalidate_user(username)
+        if result.deleted_count == 0:
+            raise HTTPException(status_code=404, detail="User not found")
+        return {"message": f"Deleted user {username}."}
+
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Delete error: {str(e)}")
@@ -7,7 +7,8 @@ from dotenv import load_dotenv
 load_dotenv()
 
 MONGO_URL = os.getenv("MONGO_URL", "mongodb://localhost:27017")
+MONGO_DB = os.getenv("MONGO_DB", "dyslexia_db")
 
 # 🚩 HEMEN client ve db yarat
 client = AsyncIOMotorClient(MONGO_URL)
-db = client["dyslexia_db"]
+db = client[MONGO_DB]
@@ -1,13 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel
 from datetime import datetime
 from typing import List, Optional
+import base64
 import io
 import csv
+import json
+import zlib
+from bson import ObjectId
+from bson.errors import InvalidId
 from fastapi.responses import StreamingResponse
 
 from auth import get_current_active_user
 from database import db  # Mongo client
+from utils.history_writer import history_writer
+from stats import remove_user_from_rollups
+from retention import archived_months, iter_archived, purge_user_history
 
 router = APIRouter()
 
@@ -30,24 +38,165 @@ async def save_prediction(
         entry.timestamp = datetime.utcnow()
         entry.user = current_user["username"]
 
-        # Insert to Mongo
-        await db.prediction_history.insert_one(entry.dict())
+        # Queue insert to Mongo
+        history_writer.add("prediction_history", entry.dict())
         return entry
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Save error: {str(e)}")
 
 # --- Get user's prediction history ---
+HISTORY_FIELDS = ("text", "score", "label", "simplified", "timestamp")
+MAX_PAGE_SIZE = 200
+
+def encode_cursor(doc: dict) -> str:
+    """Opaque cursor pointing just after `doc` in (timestamp, _id) descending order."""
+    position = {"t": doc["timestamp"].isoformat(), "id": str(doc["_id"])}
+    return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+def decode_cursor(cursor: str) -> tuple:
+    try:
+        position = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(position["t"]), ObjectId(position["id"])
+    except (ValueError, KeyError, TypeError, InvalidId):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def history_projection(fields: Optional[str], preview: Optional[int]) -> dict:
+    """
+    Build the find() projection for the requested fields.
+
+    With `preview`, `text` and `simplified` are cut to that many characters
+    inside Mongo, so full texts never leave the database.
+    """
+    selected = HISTORY_FIELDS
+    if fields:
+        selected = tuple(field.strip() for field in fields.split(",") if field.strip())
+        unknown = set(selected) - set(HISTORY_FIELDS)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+
+    # timestamp is always needed to build the next cursor
+    projection = {field: 1 for field in selected}
+    projection["timestamp"] = 1
+    if preview:
+        for field in ("text", "simplified"):
+            if field in projection:
+                projection[field] = {"$cond": [
+                    {"$eq": [{"$type": f"${field}"}, "string"]},
+                    {"$substrCP": [f"${field}", 0, preview]},
+                    f"${field}"
+                ]}
+    return projection
+
 @router.get("/")
-async def get_user_history(current_user: dict = Depends(get_current_active_user)):
+async def get_user_history(
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    fields: Optional[str] = Query(None, description="Comma-separated subset of text,score,label,simplified,timestamp"),
+    preview: Optional[int] = Query(None, ge=1, description="Truncate text and simplified to this many characters"),
+    label: Optional[str] = Query(None),
+    start: Optional[datetime] = Query(None),
+    end: Optional[datetime] = Query(None),
+    current_user: dict = Depends(get_current_active_user)
+):
+    """
+    Return one page of the user's history, newest first.
+
+    Pages are keyset-paginated on (user, timestamp, _id), which the
+    compound index serves directly, so every page costs the same however
+    deep into the history it is.
+
+    Args:
+        limit (int): Page size
+        cursor (Optional[str]): Position returned as `next_cursor` by the previous page
+        fields (Optional[str]): Fields to return
+        preview (Optional[int]): Maximum characters of `text` and `simplified`
+        label (Optional[str]): Only entries with this label
+        start (Optional[datetime]): Only entries from this time on
+        end (Optional[datetime]): Only entries before this time
+        current_user (dict): Current authenticated user
+
+    Returns:
+        dict: `items` for this page and `next_cursor` (None on the last page)
+    """
     try:
-        cursor = db.prediction_history.find({"user": current_user["username"]})
-        history = []
-        async for doc in cursor:
+        query: dict = {"user": current_user["username"], "timestamp": {"$type": "date"}}
+        if label:
+            query["label"] = label
+        if start:
+            query["timestamp"]["$gte"] = start
+        if end:
+            query["timestamp"]["$lt"] = end
+        if cursor:
+            timestamp, last_id = decode_cursor(cursor)
+            query["$or"] = [
+                {"timestamp": {"$lt": timestamp}},
+                {"timestamp": timestamp, "_id": {"$lt": last_id}}
+            ]
+
+        docs = await db.prediction_history.find(
+            query,
+            history_projection(fields, preview)
+        ).sort([("timestamp", -1), ("_id", -1)]).limit(limit + 1).to_list(length=limit + 1)
+
+        next_cursor = encode_cursor(docs[limit - 1]) if len(docs) > limit else None
+        items = []
+        for doc in docs[:limit]:
             doc["_id"] = str(doc["_id"])  # Optional: convert ObjectId
-            history.append(doc)
-        return history
+            items.append(doc)
+        return {"items": items, "next_cursor": next_cursor}
+
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Load error: {str(e)}")
+
+# --- Archived history (entries older than HISTORY_HOT_DAYS) ---
+@router.get("/archive")
+async def get_archived_months(current_user: dict = Depends(get_current_active_user)):
+    """List the months of archived history with their entry counts, newest first."""
+    try:
+        return {"months": await archived_months("prediction_history", current_user["username"])}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Load error: {str(e)}")
+
+@router.get("/archive/{month}")
+async def get_archived_month(
+    month: str,
+    preview: Optional[int] = Query(None, ge=1, description="Truncate text and simplified to this many characters"),
+    current_user: dict = Depends(get_current_active_user)
+):
+    """
+    Return every archived entry of one month ("YYYY-MM"), newest first.
 
+    Args:
+        month (str): Month in "YYYY-MM" form
+        preview (Optional[int]): Maximum characters of `text` and `simplified`
+        current_user (dict): Current authenticated user
+
+    Returns:
+        dict: `items` of that month
+    """
+    try:
+        try:
+            datetime.strptime(month, "%Y-%m")
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Month must be in YYYY-MM form")
+
+        items = []
+        async for doc in iter_archived("prediction_history", current_user["username"], month=month):
+            item = {field: doc.get(field) for field in HISTORY_FIELDS}
+            item["_id"] = str(doc["_id"])
+            if preview:
+                for field in ("text", "simplified"):
+                    if isinstance(item[field], str):
+                        item[field] = item[field][:preview]
+            items.append(item)
+        items.reverse()
+        return {"items": items}
+
+    except HTTPException as e:
+        raise e
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Load error: {str(e)}")
 
@@ -55,42 +204,132 @@ async def get_user_history(current_user: dict = Depends(get_current_active_user)
 @router.delete("/clear")
 async def clear_history(current_user: dict = Depends(get_current_active_user)):
     try:
-        result = await db.prediction_history.delete_many({"user": current_user["username"]})
-        return {"message": f"Deleted {result.deleted_count} entries."}
+        # Write buffered entries first so they are cleared too
+        await history_writer.flush()
+        await remove_user_from_rollups(current_user["username"])
+        deleted = await purge_user_history("prediction_history", current_user["username"])
+        return {"message": f"Deleted {deleted} entries."}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Clear error: {str(e)}")
 
-# --- Export user's history as CSV ---
+# --- Export user's history as CSV or NDJSON ---
+# collection -> (Mongo collection, owner field, exported fields, time field)
+EXPORT_SOURCES = {
+    "predictions": ("prediction_history", "user", ["text", "score", "label", "simplified", "timestamp"], "timestamp"),
+    "simplifications": ("simplify_history", "user_id", ["original_text", "simplified_text", "method", "created_at"], "created_at")
+}
+EXPORT_BATCH_SIZE = 500
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return str(value)
+    return value
+
+def _json_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+async def stream_export(docs, fields: List[str], export_format: str, compress: bool):
+    """
+    Stream documents from a Mongo cursor as CSV/NDJSON, optionally gzipped.
+
+    Output is sent in chunks of about `EXPORT_CHUNK_BYTES`, so memory stays
+    at one cursor batch plus one chunk whatever the size of the export.
+    """
+    compressor = zlib.compressobj(wbits=31) if compress else None  # wbits=31: gzip container
+    buffer = bytearray()
+    line = io.StringIO()
+    writer = csv.DictWriter(line, fieldnames=fields)
+
+    def encode(doc: Optional[dict]) -> bytes:
+        if export_format == "csv":
+            line.seek(0)
+            line.truncate()
+            if doc is None:
+                writer.writeheader()
+            else:
+                writer.writerow({field: _csv_value(doc.get(field)) for field in fields})
+            data = line.getvalue().encode("utf-8")
+        else:
+            row = {field: doc.get(field) for field in fields}
+            data = (json.dumps(row, ensure_ascii=False, default=_json_value) + "\n").encode("utf-8")
+        return compressor.compress(data) if compressor else data
+
+    if export_format == "csv":
+        buffer += encode(None)
+
+    async for doc in docs:
+        buffer += encode(doc)
+        if len(buffer) >= EXPORT_CHUNK_BYTES:
+            yield bytes(buffer)
+            buffer.clear()
+
+    if compressor:
+        buffer += compressor.flush()
+    if buffer:
+        yield bytes(buffer)
+
+async def _with_archived(source: str, user: str, docs):
+    """Yield a user's archived entries, then the documents from the hot cursor."""
+    async for doc in iter_archived(source, user):
+        yield doc
+    async for doc in docs:
+        yield doc
+
 @router.get("/export")
-async def export_history(current_user: dict = Depends(get_current_active_user)):
+async def export_history(
+    format: str = Query("csv", enum=["csv", "ndjson"]),
+    collection: str = Query("predictions", enum=list(EXPORT_SOURCES)),
+    gzip: bool = Query(False, description="Compress the file with gzip"),
+    include_archived: bool = Query(True, description="Include entries moved to the archive"),
+    current_user: dict = Depends(get_current_active_user)
+):
+    """
+    Download the user's prediction or simplification history.
+
+    Rows are streamed straight from the Mongo cursor as they are read,
+    archived entries (older, so first in time order) before hot ones.
+
+    Args:
+        format (str): "csv" or "ndjson"
+        collection (str): "predictions" or "simplifications"
+        gzip (bool): Gzip the output on the fly
+        include_archived (bool): Also export archived entries
+        current_user (dict): Current authenticated user
+
+    Returns:
+        StreamingResponse: The export file
+
+    Raises:
+        HTTPException: If the export cannot be started
+    """
     try:
-        cursor = db.prediction_history.find({"user": current_user["username"]})
-        user_entries = []
-        async for doc in cursor:
-            user_entries.append(doc)
-
-        output = io.StringIO()
-        writer = csv.DictWriter(
-            output,
-            fieldnames=["text", "score", "label", "simplified", "timestamp"]
-        )
-        writer.writeheader()
-
-        for entry in user_entries:
-            writer.writerow({
-                "text": entry.get("text", ""),
-                "score": entry.get("score", ""),
-                "label": entry.get("label", ""),
-                "simplified": entry.get("simplified", ""),
-                "timestamp": str(entry.get("timestamp", ""))
-            })
-
-        output.seek(0)
+        if format not in ("csv", "ndjson") or collection not in EXPORT_SOURCES:
+            raise HTTPException(status_code=400, detail="Invalid export format or collection")
+
+        source, owner_field, fields, time_field = EXPORT_SOURCES[collection]
+        docs = db[source].find(
+            {owner_field: current_user["username"]},
+            {field: 1 for field in fields}
+        ).sort(time_field, 1).batch_size(EXPORT_BATCH_SIZE)
+        if include_archived:
+            docs = _with_archived(source, current_user["username"], docs)
+
+        base_name = "history" if collection == "predictions" else "simplify_history"
+        filename = f"{base_name}.{format}" + (".gz" if gzip else "")
+        media_type = "application/gzip" if gzip else ("text/csv" if format == "csv" else "application/x-ndjson")
+
         return StreamingResponse(
-            iter([output.getvalue()]),
-            media_type="text/csv",
-            headers={"Content-Disposition": "attachment; filename=history.csv"}
+            stream_export(docs, fields, format, gzip),
+            media_type=media_type,
+            headers={"Content-Disposition": f"attachment; filename={filename}"}
         )
 
+    except HTTPException as e:
+        raise e
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Export error: {str(e)}")
@@ -1,18 +1,32 @@
 # ✅ backend/main.py
 
+import time
+_imports_started = time.perf_counter()
+
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
+import asyncio
 import os
 from dotenv import load_dotenv
 
-from auth import router as auth_router
-from predict import router as predict_router
-from simplify import router as simplify_router
+from auth import router as auth_router, ensure_user_indexes, user_cache
+from predict import router as predict_router, prediction_batcher, prediction_cache
+from analyze import router as analyze_router
+from simplify import router as simplify_router, mt5_executor, mt5_queue_depth, simplify_cache, simplify_flight, backend_router
 from history import router as history_router
-from stats import router as statistics_router
+from stats import router as statistics_router, ensure_rollup_indexes
+from retention import ensure_retention_indexes, run_archiver
 from database import db  # connect_to_mongodb KULLANILMIYOR!
+from utils.history_writer import history_writer
+from utils.openai_client import openai_client
+from utils.token_handler import token_handler
+from utils.model_registry import model_registry
+from utils.metrics import MetricsMiddleware, metrics
+from utils.tokenization import tokenizer_executor
 
 load_dotenv()
+model_registry.record_stage("imports", time.perf_counter() - _imports_started)
 
 app = FastAPI(
     title="Dyslexia Text Analyzer API",
@@ -27,25 +41,107 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware, metrics=metrics)
+
+# --- Metrics read from their owners when /metrics is scraped ---
+CACHES = {
+    "prediction": prediction_cache.local,
+    "simplify": simplify_cache,
+    "token": token_handler.token_cache,
+    "user": user_cache
+}
+for field, kind in (("hits", "counter"), ("misses", "counter"), ("evictions", "counter"), ("size", "gauge")):
+    metrics.collect(
+        f"cache_{field}_total" if kind == "counter" else f"cache_{field}",
+        kind,
+        f"In-process cache {field}",
+        lambda field=field: {(name,): cache.stats()[field] for name, cache in CACHES.items()},
+        ("cache",)
+    )
+
+def _encoding_cache_stats(field: str) -> dict:
+    # Encoding caches live on the models, so only loaded models report them
+    return {
+        (name,): model_registry.get(name).tokens.stats()[field]
+        for name in ("readability", "mt5")
+        if model_registry.is_loaded(name) and hasattr(model_registry.get(name), "tokens")
+    }
+
+for field in ("hits", "misses"):
+    metrics.collect(
+        f"encoding_cache_{field}_total", "counter", f"Token encoding cache {field}",
+        lambda field=field: _encoding_cache_stats(field), ("model",)
+    )
+metrics.collect("predict_queue_depth", "gauge", "Texts waiting for a readability batch", lambda: prediction_batcher.queue_depth)
+metrics.collect("mt5_queue_depth", "gauge", "MT5 jobs running or queued", mt5_queue_depth)
+metrics.collect("simplify_in_flight", "gauge", "Distinct simplifications being computed", lambda: simplify_flight.stats()["in_flight"])
+metrics.collect("openai_in_flight", "gauge", "OpenAI requests on the wire", lambda: openai_client.in_flight)
+metrics.collect("openai_retries_total", "counter", "Retried OpenAI requests", lambda: openai_client.retries)
+metrics.collect("openai_failures_total", "counter", "Failed OpenAI calls", lambda: openai_client.failures)
+metrics.collect(
+    "simplify_routes_total", "counter", "Backends chosen for method=auto, by reason",
+    lambda: dict(backend_router.routes), ("method", "reason")
+)
+metrics.collect("openai_breaker_open", "gauge", "1 while the OpenAI circuit breaker is open or half-open", lambda: int(backend_router.breaker.state != "closed"))
+metrics.collect("history_pending", "gauge", "History documents waiting to be written", lambda: history_writer.pending)
+metrics.collect("history_written_total", "counter", "History documents written", lambda: history_writer.written)
+metrics.collect("history_dropped_total", "counter", "History documents dropped", lambda: history_writer.dropped)
+metrics.collect("history_failed_flushes_total", "counter", "Failed history flushes", lambda: history_writer.failed_flushes)
+metrics.collect(
+    "startup_stage_seconds", "gauge", "Model load, warm-up and other startup stage durations",
+    lambda: {(stage,): seconds for stage, seconds in model_registry.report()["stages"].items()},
+    ("stage",)
+)
+metrics.collect(
+    "model_ready", "gauge", "1 once a model is loaded",
+    lambda: {(name,): int(model["status"] == "ready") for name, model in model_registry.report()["models"].items()},
+    ("model",)
+)
 
 # 🚩 Sadece db.command ve index yarat
 @app.on_event("startup")
 async def startup_db_client():
     try:
+        started = time.perf_counter()
         await db.command("ping")
-        await db.prediction_history.create_index("user")
-        await db.prediction_history.create_index("timestamp")
-        await db.simplify_history.create_index("user")
-        await db.simplify_history.create_index("created_at")
+        # Serves per-user history pages in (timestamp, _id) order
+        await db.prediction_history.create_index([("user", 1), ("timestamp", -1), ("_id", -1)])
+        await db.simplify_history.create_index([("user_id", 1), ("created_at", 1)])
+        await ensure_user_indexes()
+        await prediction_cache.ensure_indexes()
+        await ensure_rollup_indexes()
+        # Also the plain or TTL index on each history time field
+        await ensure_retention_indexes()
+        await history_writer.start()
+        app.state.archiver = asyncio.create_task(run_archiver())
+        model_registry.record_stage("database", time.perf_counter() - started)
         print("✅ MongoDB connected & indexes ensured")
     except Exception as e:
         print(f"❌ MongoDB startup error: {e}")
         raise
 
+# Models load lazily or in the background (MODEL_LOADING), so /health/live answers at once
+@app.on_event("startup")
+async def startup_models():
+    await model_registry.start()
+
+@app.on_event("shutdown")
+async def shutdown_workers():
+    archiver = getattr(app.state, "archiver", None)
+    if archiver is not None:
+        archiver.cancel()
+    await history_writer.stop()
+    prediction_batcher.shutdown()
+    mt5_executor.shutdown(wait=False)
+    tokenizer_executor.shutdown(wait=False)
+    await openai_client.aclose()
+    token_handler.hash_executor.shutdown(wait=False)
+
 # Routers
 app.include_router(auth_router, prefix="/auth", tags=["Auth"])
 app.include_router(predict_router, prefix="/predict", tags=["Predict"])
 app.include_router(simplify_router, prefix="/simplify", tags=["Simplify"])
+app.include_router(analyze_router, prefix="/analyze", tags=["Analyze"])
 app.include_router(history_router, prefix="/history", tags=["History"])
 app.include_router(statistics_router, prefix="/statistics", tags=["Statistics"])
 
@@ -65,6 +161,41 @@ async def health_check():
             detail={"status": "unhealthy", "error": str(e)}
         )
 
+@app.get("/health/live")
+async def liveness_check():
+    """Process is up and serving requests; does not touch models or Mongo."""
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+async def readiness_check():
+    """Models are loaded and Mongo answers; returns 503 until both hold."""
+    report = model_registry.report()
+    try:
+        await db.command("ping")
+        database = "connected"
+    except Exception as e:
+        database = f"error: {e}"
+
+    ready = report["ready"] and database == "connected"
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={
+            "status": "ready" if ready else "not ready",
+            "database": database,
+            "models": report["models"]
+        }
+    )
+
+@app.get("/health/startup")
+async def startup_report():
+    """Per-stage startup timings in seconds."""
+    return model_registry.report()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Prometheus text exposition of stage latencies, queues, caches and load times."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/")
 async def root():
     return {"message": "Welcome to the Dyslexia Text Analyzer API 🚀"}
@@ -1,18 +1,48 @@
-from typing import Dict, Optional
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Sequence, Tuple
+import itertools
+import json
+import tempfile
 import torch
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
 from fastapi import HTTPException, Depends, APIRouter, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from dotenv import load_dotenv
 import os
 from datetime import datetime
-import httpx
+from pymongo import UpdateOne
 from database import db
+from readability_backends import load_backend
 
-from auth import get_current_active_user
+from auth import get_current_active_user, get_current_active_admin
+from utils.batcher import MicroBatcher
+from utils.cache import LRUCache
+from utils.text import content_key, sentence_spans
+from utils.history_writer import history_writer
+from utils.metrics import metrics
+from utils.model_registry import model_registry
+from utils.tokenization import TokenizationStage, load_fast_tokenizer
 
 load_dotenv()
 
+MAX_TOKENS = 512
+LABELS = {0: "Easy", 1: "Difficult"}
+
+def _model_version(model_path: str) -> str:
+    """Identify the weights (including exported ONNX/int8 files) so cached scores are dropped when they change."""
+    if os.path.isdir(model_path):
+        stamps = [
+            str(int(os.path.getmtime(os.path.join(model_path, name))))
+            for name in sorted(os.listdir(model_path))
+            if name.endswith((".json", ".bin", ".safetensors", ".onnx", ".pt"))
+        ]
+        return f"{os.path.abspath(model_path)}@{'-'.join(stamps)}"
+    return model_path
+
+def readability_model_version() -> str:
+    """Version of the configured weights and backend, without loading the model."""
+    return f"{_model_version(os.getenv('MODEL_PATH') or '')}|{os.getenv('READABILITY_BACKEND', 'torch')}"
+
 class ReadabilityPredictor:
     def __init__(self):
         try:
@@ -20,43 +50,309 @@ class ReadabilityPredictor:
             if not model_path:
                 raise ValueError("MODEL_PATH environment variable not set")
 
-            self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
-            self.tokenizer = AutoTokenizer.from_pretrained(model_path)
-            self.model = AutoModelForSequenceClassification.from_pretrained(model_path)
-            self.model.to(self.device)
-            self.model.eval()
+            self.model_version = readability_model_version()
+            self.tokenizer = load_fast_tokenizer(model_path)
+            self.tokens = TokenizationStage(self.tokenizer, "readability", MAX_TOKENS)
+            self.backend = load_backend(
+                os.getenv('READABILITY_BACKEND', 'torch'),
+                model_path,
+                torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+            )
+            self.device = self.backend.device
 
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Failed to initialize model: {str(e)}")
 
     def predict(self, text: str) -> Dict[str, str]:
         try:
-            inputs = self.tokenizer(
-                text,
-                padding=True,
-                truncation=True,
-                max_length=512,
-                return_tensors="pt"
-            ).to(self.device)
-
-            with torch.no_grad():
-                outputs = self.model(**inputs)
-                logits = outputs.logits
-                probabilities = torch.softmax(logits, dim=1)
-
-            predicted_class = torch.argmax(probabilities, dim=1).item()
-            score = probabilities[0][predicted_class].item()
-            label = "Difficult" if predicted_class == 1 else "Easy"
-
-            return {
-                "score": float(score),
-                "label": label
-            }
+            return self.predict_batch([text])[0]
+
+        except HTTPException as e:
+            raise e
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
+
+    def predict_batch(self, texts: List[str]) -> List[Dict[str, str]]:
+        """
+        Score several texts with one padded forward pass.
+
+        Args:
+            texts (List[str]): Texts to score
+
+        Returns:
+            List[Dict[str, str]]: Score and label for each text, in input order
+        """
+        return self.predict_encoded(self.tokens.encode_many(texts))
+
+    def predict_encoded(self, encodings: List[Sequence[int]]) -> List[Dict[str, str]]:
+        """
+        Score texts already encoded by `self.tokens`, in one padded forward pass.
+
+        Args:
+            encodings (List[Sequence[int]]): Token ids of each text
+
+        Returns:
+            List[Dict[str, str]]: Score and label for each text, in input order
+        """
+        try:
+            inputs = {name: tensor.to(self.device) for name, tensor in self.tokens.pad(encodings).items()}
+
+            with metrics.stage("readability.forward"):
+                probabilities = self._probabilities(inputs)
+            scores, predicted_classes = torch.max(probabilities, dim=1)
+
+            return [
+                {"score": float(score), "label": LABELS[predicted_class]}
+                for score, predicted_class in zip(scores.tolist(), predicted_classes.tolist())
+            ]
 
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
 
-readability_predictor = ReadabilityPredictor()
+    def predict_document(self, text: str, window_overlap: int = 64, max_chunks: int = 256) -> Dict:
+        """
+        Score a document of any length, sentence by sentence.
+
+        The text is split into sentences; a sentence longer than the model's
+        512-token limit is further cut into overlapping token windows. Every
+        chunk is scored in one padded forward pass. Sentence scores average
+        their windows, and the document score is the token-weighted mean of
+        the sentence probabilities.
+
+        Args:
+            text (str): Document to score
+            window_overlap (int): Tokens shared by consecutive windows of a long sentence
+            max_chunks (int): Maximum number of chunks scored for one document
+
+        Returns:
+            Dict: Aggregate `score` and `label`, plus per-sentence `sentences`
+
+        Raises:
+            HTTPException: If the document is empty or too long
+        """
+        spans = sentence_spans(text)
+        if not spans:
+            raise HTTPException(status_code=400, detail="Text is empty")
+
+        # Leave room for [CLS] and [SEP]
+        window = MAX_TOKENS - self.tokenizer.num_special_tokens_to_add()
+        step = max(1, window - window_overlap)
+
+        sentence_ids = self.tokens(
+            [text[begin:end] for begin, end in spans],
+            add_special_tokens=False
+        )["input_ids"]
+
+        chunks, owners = [], []
+        for index, ids in enumerate(sentence_ids):
+            start = 0
+            while True:
+                chunks.append(self.tokenizer.build_inputs_with_special_tokens(ids[start:start + window]))
+                owners.append(index)
+                if start + window >= len(ids):
+                    break
+                start += step
+
+        if len(chunks) > max_chunks:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Document is too long ({len(chunks)} chunks, limit {max_chunks})"
+            )
+
+        try:
+            inputs = {name: tensor.to(self.device) for name, tensor in self.tokens.pad(chunks).items()}
+            with metrics.stage("readability.forward"):
+                chunk_probabilities = self._probabilities(inputs)
+
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
+
+        # Average window probabilities per sentence
+        owner_index = torch.tensor(owners, device=chunk_probabilities.device)
+        sums = torch.zeros(len(spans), chunk_probabilities.size(1), device=chunk_probabilities.device)
+        sums.index_add_(0, owner_index, chunk_probabilities)
+        counts = torch.bincount(owner_index, minlength=len(spans)).unsqueeze(1)
+        sentence_probabilities = sums / counts
+
+        weights = torch.tensor(
+            [max(1, len(ids)) for ids in sentence_ids],
+            dtype=sentence_probabilities.dtype,
+            device=sentence_probabilities.device
+        ).unsqueeze(1)
+        document_probabilities = (sentence_probabilities * weights).sum(dim=0) / weights.sum()
+
+        document_score, document_class = torch.max(document_probabilities, dim=0)
+        sentence_scores, sentence_classes = torch.max(sentence_probabilities, dim=1)
+
+        return {
+            "score": float(document_score),
+            "label": LABELS[int(document_class)],
+            "sentences": [
+                {
+                    "text": text[begin:end],
+                    "start": begin,
+                    "end": end,
+                    "score": float(score),
+                    "label": LABELS[predicted_class]
+                }
+                for (begin, end), score, predicted_class in zip(
+                    spans, sentence_scores.tolist(), sentence_classes.tolist()
+                )
+            ]
+        }
+
+    def _probabilities(self, inputs) -> torch.Tensor:
+        return self.backend.probabilities(inputs)
+
+# Loaded lazily or in the background, see utils/model_registry.py
+model_registry.register(
+    "readability",
+    ReadabilityPredictor,
+    warmup=lambda predictor: predictor.predict_batch(["Bu cümle modeli ısıtmak için kullanılır."])
+)
+
+batch_sizes = metrics.histogram(
+    "readability_batch_size", "Texts per readability forward pass",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128)
+)
+
+async def _encode(texts: List[str]) -> List[Sequence[int]]:
+    """Tokenize on the tokenizer pool, so the batcher thread only pads and runs the model."""
+    predictor = await model_registry.aget("readability")
+    return await predictor.tokens.aencode_many(texts)
+
+def _predict_encoded(encodings: List[Sequence[int]]) -> List[Dict[str, str]]:
+    batch_sizes.observe(len(encodings))
+    return model_registry.get("readability").predict_encoded(encodings)
+
+def _predict_document(text: str, window_overlap: int, max_chunks: int) -> Dict:
+    return model_registry.get("readability").predict_document(text, window_overlap, max_chunks)
+
+# Concurrent /predict requests share one forward pass
+prediction_batcher = MicroBatcher(
+    _predict_encoded,
+    max_batch_size=int(os.getenv("PREDICT_MAX_BATCH_SIZE", "16")),
+    max_wait_ms=float(os.getenv("PREDICT_MAX_WAIT_MS", "8")),
+    name="readability-batcher"
+)
+
+class PredictionCache:
+    """
+    Content-addressed cache of readability predictions.
+
+    Keys are a hash of the normalized text and the model version. Lookups hit
+    an in-process LRU tier first and, when enabled, a Mongo collection shared
+    by all workers. Cache failures never fail a prediction.
+    """
+
+    def __init__(self, model_version: str, local: LRUCache, collection=None, shared_ttl: int = 86400):
+        self.model_version = model_version
+        self.local = local
+        self.collection = collection
+        self.shared_ttl = shared_ttl
+        self.shared_hits = 0
+        self.shared_misses = 0
+
+    def key(self, text: str) -> str:
+        return content_key(text, self.model_version)
+
+    async def get(self, key: str) -> Optional[Dict[str, str]]:
+        prediction = self.local.get(key)
+        if prediction is not None or self.collection is None:
+            return prediction
+
+        try:
+            doc = await self.collection.find_one({"_id": key}, {"score": 1, "label": 1})
+        except Exception as e:
+            print(f"⚠️ Prediction cache lookup failed: {e}")
+            return None
+
+        if doc is None:
+            self.shared_misses += 1
+            return None
+        self.shared_hits += 1
+        prediction = {"score": doc["score"], "label": doc["label"]}
+        self.local.set(key, prediction)
+        return prediction
+
+    async def get_many(self, keys: List[str]) -> Dict[str, Dict[str, str]]:
+        found = {}
+        for key in keys:
+            prediction = self.local.get(key)
+            if prediction is not None:
+                found[key] = prediction
+
+        missing = [key for key in keys if key not in found]
+        if missing and self.collection is not None:
+            try:
+                async for doc in self.collection.find({"_id": {"$in": missing}}):
+                    found[doc["_id"]] = {"score": doc["score"], "label": doc["label"]}
+                    self.local.set(doc["_id"], found[doc["_id"]])
+            except Exception as e:
+                print(f"⚠️ Prediction cache lookup failed: {e}")
+            self.shared_hits += sum(1 for key in missing if key in found)
+            self.shared_misses += sum(1 for key in missing if key not in found)
+        return found
+
+    async def set_many(self, entries: Dict[str, Dict[str, str]]):
+        for key, prediction in entries.items():
+            self.local.set(key, prediction)
+        if not entries or self.collection is None:
+            return
+
+        now = datetime.utcnow()
+        try:
+            await self.collection.bulk_write([
+                UpdateOne(
+                    {"_id": key},
+                    {"$set": {**prediction, "created_at": now}},
+                    upsert=True
+                )
+                for key, prediction in entries.items()
+            ], ordered=False)
+        except Exception as e:
+            print(f"⚠️ Prediction cache write failed: {e}")
+
+    async def set(self, key: str, prediction: Dict[str, str]):
+        await self.set_many({key: prediction})
+
+    async def ensure_indexes(self):
+        if self.collection is not None:
+            await self.collection.create_index("created_at", expireAfterSeconds=self.shared_ttl)
+
+    def stats(self) -> Dict:
+        return {
+            "model_version": self.model_version,
+            "local": self.local.stats(),
+            "shared": None if self.collection is None else {
+                "hits": self.shared_hits,
+                "misses": self.shared_misses,
+                "ttl_seconds": self.shared_ttl
+            }
+        }
+
+_cache_ttl = float(os.getenv("PREDICTION_CACHE_TTL", "3600"))
+prediction_cache = PredictionCache(
+    readability_model_version(),
+    LRUCache(
+        max_size=int(os.getenv("PREDICTION_CACHE_SIZE", "4096")),
+        ttl_seconds=_cache_ttl if _cache_ttl > 0 else None
+    ),
+    collection=db.prediction_cache if os.getenv("PREDICTION_CACHE_SHARED") == "mongo" else None,
+    shared_ttl=int(os.getenv("PREDICTION_CACHE_SHARED_TTL", "86400"))
+)
+
+# --- Bulk prediction settings ---
+BATCH_READ_AHEAD = int(os.getenv("PREDICT_BATCH_READ_AHEAD", "256"))    # texts sorted together
+BATCH_INFER_SIZE = int(os.getenv("PREDICT_BATCH_INFER_SIZE", "32"))     # texts per forward pass
+BATCH_MAX_JSON_ITEMS = int(os.getenv("PREDICT_BATCH_MAX_JSON_ITEMS", "1000"))
+BATCH_MAX_JSON_BYTES = int(os.getenv("PREDICT_BATCH_MAX_JSON_BYTES", str(16 * 1024 * 1024)))   # parsed in memory
+BATCH_MAX_LINE_BYTES = 1024 * 1024   # per NDJSON line
+BATCH_SPOOL_BYTES = 1024 * 1024   # uploads larger than this spill to disk
+
+# --- Long-document settings ---
+DOCUMENT_WINDOW_OVERLAP = int(os.getenv("PREDICT_DOCUMENT_WINDOW_OVERLAP", "64"))
+DOCUMENT_MAX_CHUNKS = int(os.getenv("PREDICT_DOCUMENT_MAX_CHUNKS", "256"))
 
 class TextRequest(BaseModel):
     text: str
@@ -66,32 +362,59 @@ class PredictionResponse(BaseModel):
     label: str
     simplified: Optional[str] = None
 
+class SentencePrediction(BaseModel):
+    text: str
+    start: int
+    end: int
+    score: float
+    label: str
+
+class DocumentPredictionResponse(BaseModel):
+    score: float
+    label: str
+    sentences: List[SentencePrediction]
+
 router = APIRouter()
 
+async def score_text(text: str) -> Dict[str, str]:
+    """
+    Score one text through the prediction cache and the micro-batcher.
+
+    Args:
+        text (str): Text to score
+
+    Returns:
+        Dict[str, str]: `score` and `label`
+    """
+    with metrics.stage("predict.cache"):
+        cache_key = prediction_cache.key(text)
+        prediction = await prediction_cache.get(cache_key)
+    if prediction is None:
+        # Queueing for a batch plus the batched forward pass
+        with metrics.stage("predict.batch"):
+            encoding = (await _encode([text]))[0]
+            prediction = await prediction_batcher.submit(encoding)
+        await prediction_cache.set(cache_key, prediction)
+    return prediction
+
 @router.post("/", response_model=PredictionResponse)
 async def predict_readability(
     request: TextRequest,
-    current_user: dict = Depends(get_current_active_user),
-    raw_request: Request = None
+    current_user: dict = Depends(get_current_active_user)
 ):
     try:
         # 1. Predict
-        prediction = readability_predictor.predict(request.text)
+        prediction = await score_text(request.text)
 
-        # 2. Save to /save endpoint
-        save_payload = {
+        # 2. Queue history write (flushed in the background)
+        history_writer.add("prediction_history", {
             "text": request.text,
             "score": prediction["score"],
             "label": prediction["label"],
             "simplified": None,
-            "timestamp": str(datetime.now()),
+            "timestamp": datetime.utcnow(),
             "user": current_user["username"]
-        }
-
-        async with httpx.AsyncClient(base_url=str(raw_request.base_url)) as client:
-            await client.post("/save", json=save_payload, headers={
-                "Authorization": raw_request.headers.get("authorization")
-            })
+        })
 
         # 3. Return response
         return PredictionResponse(
@@ -104,3 +427,231 @@ async def predict_readability(
         raise e
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
+
+
+@router.post("/document", response_model=DocumentPredictionResponse)
+async def predict_document_readability(
+    request: TextRequest,
+    current_user: dict = Depends(get_current_active_user)
+):
+    """
+    Score a long text without truncation and report each sentence.
+
+    Args:
+        request (TextRequest): Request containing the document
+        current_user (dict): Current authenticated user
+
+    Returns:
+        DocumentPredictionResponse: Aggregate score/label and per-sentence scores
+
+    Raises:
+        HTTPException: If the document is empty, too long or prediction fails
+    """
+    try:
+        with metrics.stage("predict.document"):
+            prediction = await prediction_batcher.run_in_worker(
+                _predict_document,
+                request.text,
+                DOCUMENT_WINDOW_OVERLAP,
+                DOCUMENT_MAX_CHUNKS
+            )
+
+        history_writer.add("prediction_history", {
+            "text": request.text,
+            "score": prediction["score"],
+            "label": prediction["label"],
+            "simplified": None,
+            "timestamp": datetime.utcnow(),
+            "user": current_user["username"]
+        })
+
+        return DocumentPredictionResponse(**prediction)
+
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
+
+# --- Bulk prediction helpers ---
+def _item_text(item) -> str:
+    """Accept either a bare string or an object with a `text` field."""
+    if isinstance(item, dict):
+        item = item.get("text")
+    if not isinstance(item, str) or not item.strip():
+        raise ValueError("Each item must be a non-empty string or an object with a 'text' field")
+    return item
+
+def _iter_json_array(upload) -> Iterator[Tuple[int, object]]:
+    try:
+        items = json.load(upload)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Body must be a JSON array of texts")
+    if not isinstance(items, list):
+        raise HTTPException(status_code=400, detail="Body must be a JSON array of texts")
+    if len(items) > BATCH_MAX_JSON_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"JSON bodies are limited to {BATCH_MAX_JSON_ITEMS} texts, use NDJSON for larger uploads"
+        )
+    return enumerate(items)
+
+def _iter_ndjson(upload) -> Iterator[Tuple[int, object]]:
+    index = 0
+    for line in upload:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield index, json.loads(line)
+        except ValueError:
+            yield index, None
+        index += 1
+
+def _read_ahead(items: Iterator, size: int) -> List:
+    """Next `size` items; reads the spooled upload, which may be on disk, so call it in a thread."""
+    return list(itertools.islice(items, size))
+
+def _chunks(items: Iterator, size: int) -> Iterator[List]:
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+async def _spool_upload(raw_request: Request, ndjson: bool):
+    """
+    Copy the request body to a temp file that only stays in memory while small.
+
+    NDJSON lines are limited one by one; a JSON array is parsed as a whole,
+    so its total size is limited instead.
+    """
+    upload = tempfile.SpooledTemporaryFile(max_size=BATCH_SPOOL_BYTES)
+    line_bytes = 0
+    total_bytes = 0
+    async for chunk in raw_request.stream():
+        if ndjson:
+            newline = chunk.rfind(b"\n")
+            line_bytes = len(chunk) - newline - 1 if newline >= 0 else line_bytes + len(chunk)
+            if line_bytes > BATCH_MAX_LINE_BYTES:
+                upload.close()
+                raise HTTPException(status_code=413, detail="A single text exceeds the size limit")
+        else:
+            total_bytes += len(chunk)
+            if total_bytes > BATCH_MAX_JSON_BYTES:
+                upload.close()
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"JSON bodies are limited to {BATCH_MAX_JSON_BYTES} bytes, use NDJSON for larger uploads"
+                )
+        upload.write(chunk)
+    upload.seek(0)
+    return upload
+
+async def _stream_batch_predictions(upload, items: Iterator, username: str) -> AsyncIterator[str]:
+    """
+    Score texts in length-sorted groups and yield one NDJSON line per text.
+
+    Only `BATCH_READ_AHEAD` texts are held at a time. Lines are emitted as
+    each group finishes, so they are not in input order; every line carries
+    the `index` of its text.
+    """
+    try:
+        while True:
+            chunk = await run_in_threadpool(_read_ahead, items, BATCH_READ_AHEAD)
+            if not chunk:
+                break
+            valid = []
+            for index, item in chunk:
+                try:
+                    valid.append((index, _item_text(item)))
+                except ValueError as e:
+                    yield json.dumps({"index": index, "error": str(e)}) + "\n"
+
+            # Sorting by length keeps padding inside each forward pass small
+            valid.sort(key=lambda entry: len(entry[1]))
+            for group in _chunks(iter(valid), BATCH_INFER_SIZE):
+                texts = [text for _, text in group]
+                keys = [prediction_cache.key(text) for text in texts]
+                cached = await prediction_cache.get_many(keys)
+                uncached = [text for text, key in zip(texts, keys) if key not in cached]
+                try:
+                    scored = await prediction_batcher.run_batch(await _encode(uncached)) if uncached else []
+                except HTTPException as e:
+                    for index, _ in group:
+                        yield json.dumps({"index": index, "error": e.detail}) + "\n"
+                    continue
+
+                fresh = dict(zip((key for key in keys if key not in cached), scored))
+                await prediction_cache.set_many(fresh)
+                predictions = [cached.get(key) or fresh[key] for key in keys]
+
+                timestamp = datetime.utcnow()
+                # Never raises: entries Mongo rejects now are queued for the background flush
+                await history_writer.write_now("prediction_history", [
+                    {
+                        "text": text,
+                        "score": prediction["score"],
+                        "label": prediction["label"],
+                        "simplified": None,
+                        "timestamp": timestamp,
+                        "user": username
+                    }
+                    for text, prediction in zip(texts, predictions)
+                ])
+
+                for (index, _), prediction in zip(group, predictions):
+                    yield json.dumps({"index": index, **prediction}) + "\n"
+    finally:
+        upload.close()
+
+@router.post("/batch")
+async def predict_readability_batch(
+    raw_request: Request,
+    current_user: dict = Depends(get_current_active_user)
+):
+    """
+    Score many texts in one request and stream the results as NDJSON.
+
+    The body is either a JSON array (`["text", ...]` or `[{"text": ...}, ...]`)
+    or, with `Content-Type: application/x-ndjson`, one such item per line.
+    JSON arrays are limited in items and bytes; NDJSON uploads are not
+    limited in size, only each line is.
+
+    Args:
+        raw_request (Request): Incoming request with the texts in its body
+        current_user (dict): Current authenticated user
+
+    Returns:
+        StreamingResponse: One `{"index", "score", "label"}` object per line
+
+    Raises:
+        HTTPException: If the body cannot be parsed
+    """
+    content_type = raw_request.headers.get("content-type", "")
+    ndjson = "ndjson" in content_type or "jsonlines" in content_type
+    upload = await _spool_upload(raw_request, ndjson)
+
+    try:
+        if ndjson:
+            items = _iter_ndjson(upload)
+        else:
+            items = await run_in_threadpool(_iter_json_array, upload)
+    except HTTPException:
+        upload.close()
+        raise
+
+    return StreamingResponse(
+        _stream_batch_predictions(upload, items, current_user["username"]),
+        media_type="application/x-ndjson"
+    )
+
+@router.get("/cache")
+async def prediction_cache_stats(current_user: dict = Depends(get_current_active_admin)):
+    """
+    Report prediction cache size and hit/miss/eviction counters.
+    Only accessible by admin users.
+    """
+    return prediction_cache.stats()
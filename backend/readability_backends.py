@@ -0,0 +1,144 @@
+"""
+Inference backends for the readability classifier.
+
+`READABILITY_BACKEND` selects one of:
+    torch       fp32 PyTorch (default)
+    torch-int8  PyTorch with dynamically int8-quantized Linear layers
+    onnx        ONNX Runtime session over `model.onnx`
+    onnx-int8   ONNX Runtime session over `model.int8.onnx`
+
+The ONNX files and the pre-quantized PyTorch model are produced by
+`python -m scripts.export_readability`.
+"""
+
+import os
+from typing import Dict
+
+import torch
+from transformers import AutoConfig, AutoModelForSequenceClassification
+
+ONNX_FILE = "model.onnx"
+ONNX_INT8_FILE = "model.int8.onnx"
+TORCH_INT8_FILE = "model.int8.pt"
+
+BACKENDS = ("torch", "torch-int8", "onnx", "onnx-int8")
+
+
+class TorchBackend:
+    """fp32 PyTorch model."""
+
+    name = "torch"
+
+    def __init__(self, model_path: str, device: torch.device):
+        self.device = device
+        self.model = AutoModelForSequenceClassification.from_pretrained(model_path)
+        self.model.to(device)
+        self.model.eval()
+
+    def probabilities(self, inputs: Dict[str, torch.Tensor]) -> torch.Tensor:
+        with torch.no_grad():
+            return torch.softmax(self.model(**inputs).logits, dim=1)
+
+
+class QuantizedTorchBackend(TorchBackend):
+    """PyTorch model with int8 dynamic quantization of its Linear layers (CPU only)."""
+
+    name = "torch-int8"
+
+    def __init__(self, model_path: str, device: torch.device):
+        self.device = torch.device("cpu")
+        quantized_file = os.path.join(model_path, TORCH_INT8_FILE)
+        if os.path.exists(quantized_file):
+            # The file holds a state_dict, not a pickled module, so it loads with weights_only
+            self.model = quantize_torch_model(
+                AutoModelForSequenceClassification.from_config(AutoConfig.from_pretrained(model_path))
+            )
+            self.model.load_state_dict(torch.load(quantized_file, map_location="cpu", weights_only=True))
+        else:
+            print(f"⚠️ {quantized_file} not found, quantizing at load time; "
+                  "run `python -m scripts.export_readability quantize-torch` to save it")
+            self.model = quantize_torch_model(
+                AutoModelForSequenceClassification.from_pretrained(model_path)
+            )
+        self.model.eval()
+
+
+class OnnxBackend:
+    """ONNX Runtime session on CPU."""
+
+    name = "onnx"
+    file_name = ONNX_FILE
+    export_command = "export-onnx"
+
+    def __init__(self, model_path: str, device: torch.device):
+        try:
+            import onnxruntime
+        except ImportError:
+            raise ValueError(f"READABILITY_BACKEND={self.name} requires the 'onnxruntime' package")
+
+        onnx_file = os.path.join(model_path, self.file_name)
+        if not os.path.exists(onnx_file):
+            raise ValueError(
+                f"{onnx_file} not found, run `python -m scripts.export_readability {self.export_command}` first"
+            )
+
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        threads = int(os.getenv("ONNX_INTRA_OP_THREADS", "0"))
+        if threads:
+            options.intra_op_num_threads = threads
+
+        self.device = torch.device("cpu")
+        self.session = onnxruntime.InferenceSession(
+            onnx_file, options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    def probabilities(self, inputs: Dict[str, torch.Tensor]) -> torch.Tensor:
+        feeds = {
+            name: tensor.cpu().numpy()
+            for name, tensor in inputs.items()
+            if name in self.input_names
+        }
+        logits = self.session.run(None, feeds)[0]
+        return torch.softmax(torch.from_numpy(logits), dim=1)
+
+
+class QuantizedOnnxBackend(OnnxBackend):
+    """ONNX Runtime session over the int8-quantized export."""
+
+    name = "onnx-int8"
+    file_name = ONNX_INT8_FILE
+    export_command = "quantize-onnx"
+
+
+def quantize_torch_model(model: torch.nn.Module) -> torch.nn.Module:
+    """Apply int8 dynamic quantization to every Linear layer."""
+    model.eval()
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def load_backend(name: str, model_path: str, device: torch.device):
+    """
+    Instantiate the backend called `name`.
+
+    Args:
+        name (str): One of `BACKENDS`
+        model_path (str): Directory of the fine-tuned model
+        device (torch.device): Device for the PyTorch backends
+
+    Returns:
+        The backend instance
+
+    Raises:
+        ValueError: If the backend is unknown or cannot be loaded
+    """
+    backends = {
+        "torch": TorchBackend,
+        "torch-int8": QuantizedTorchBackend,
+        "onnx": OnnxBackend,
+        "onnx-int8": QuantizedOnnxBackend
+    }
+    if name not in backends:
+        raise ValueError(f"Unknown READABILITY_BACKEND '{name}', expected one of {', '.join(BACKENDS)}")
+    return backends[name](model_path, device)
@@ -0,0 +1,310 @@
+"""
+Retention tiers for the history collections.
+
+Entries older than HISTORY_HOT_DAYS are moved by a background archiver
+from prediction_history / simplify_history into compressed chunks in
+history_archive, one or more per (collection, user, month). That keeps the
+hot collections and their indexes small enough to stay in RAM, while the
+history and export endpoints can still read archived entries.
+Optional TTL indexes bound how long raw and archived entries are kept.
+"""
+
+import asyncio
+import hashlib
+import os
+import socket
+import zlib
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Dict, List, Optional
+
+import bson
+from dotenv import load_dotenv
+from pymongo.errors import DuplicateKeyError
+
+from database import db
+
+load_dotenv()
+
+HOT_DAYS = int(os.getenv("HISTORY_HOT_DAYS", "90"))               # 0 disables archiving
+RAW_TTL_DAYS = int(os.getenv("HISTORY_TTL_DAYS", "0"))            # 0 keeps raw entries until archived
+ARCHIVE_RETENTION_DAYS = int(os.getenv("ARCHIVE_RETENTION_DAYS", "0"))  # 0 keeps archives forever
+ARCHIVE_INTERVAL_MINUTES = float(os.getenv("ARCHIVE_INTERVAL_MINUTES", "60"))
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "5000"))
+
+# Only the process holding this lease archives; it is renewed before every batch
+ARCHIVER_LEASE = "history_archiver"
+LEASE_SECONDS = 600
+
+# collection -> (owner field, time field)
+HISTORY_COLLECTIONS = {
+    "prediction_history": ("user", "timestamp"),
+    "simplify_history": ("user_id", "created_at")
+}
+
+ROLLUP_COUNTERS = ("total_texts", "easy", "difficult", "score_sum", "score_count")
+
+
+def _pack(docs: List[dict]) -> bytes:
+    return zlib.compress(b"".join(bson.encode(doc) for doc in docs), 6)
+
+
+def _unpack(data: bytes) -> List[dict]:
+    return bson.decode_all(zlib.decompress(data))
+
+
+def _chunk_id(collection: str, entries: List[dict]) -> str:
+    """Chunk key derived from every entry id, so equal keys mean equal contents."""
+    digest = hashlib.blake2b(digest_size=16)
+    for entry_id in sorted(str(entry["_id"]) for entry in entries):
+        digest.update(entry_id.encode())
+        digest.update(b"\0")
+    return f"{collection}:{digest.hexdigest()}"
+
+
+def day_summaries(docs: List[dict], time_field: str) -> List[dict]:
+    """Per-day prediction counters, kept so rollups can be adjusted without unpacking."""
+    days: Dict[Optional[datetime], dict] = {}
+    for doc in docs:
+        timestamp = doc.get(time_field)
+        day = datetime(timestamp.year, timestamp.month, timestamp.day) if isinstance(timestamp, datetime) else None
+        counters = days.setdefault(day, dict.fromkeys(ROLLUP_COUNTERS, 0))
+        counters["total_texts"] += 1
+        if doc.get("label") == "Easy":
+            counters["easy"] += 1
+        elif doc.get("label") == "Difficult":
+            counters["difficult"] += 1
+        if isinstance(doc.get("score"), (int, float)):
+            counters["score_sum"] += doc["score"]
+            counters["score_count"] += 1
+    return [{"day": day, **counters} for day, counters in days.items()]
+
+
+async def _ensure_time_index(collection: str, field: str, seconds: Optional[int]):
+    """
+    Make the single-field index on `field` a TTL index of `seconds`, or a plain one for None.
+
+    MongoDB refuses to create an index whose options differ from an existing
+    one on the same key, so an existing index is changed in place: `collMod`
+    adjusts its TTL, and dropping the TTL means rebuilding it plain.
+    """
+    existing = None
+    for name, index in (await db[collection].index_information()).items():
+        if index["key"] == [(field, 1)]:
+            existing = (name, index.get("expireAfterSeconds"))
+
+    if existing is None:
+        if seconds is None:
+            await db[collection].create_index(field)
+        else:
+            await db[collection].create_index(field, expireAfterSeconds=seconds)
+        return
+
+    name, current = existing
+    if current == seconds:
+        return
+    if seconds is not None:
+        await db.command("collMod", collection, index={"keyPattern": {field: 1}, "expireAfterSeconds": seconds})
+    else:
+        await db[collection].drop_index(name)
+        await db[collection].create_index(field)
+    print(f"✅ Changed the TTL of {collection}.{field} from {current} to {seconds} seconds")
+
+
+def check_retention_settings():
+    """
+    Raises:
+        ValueError: If raw entries would expire before the archiver has moved them
+    """
+    if RAW_TTL_DAYS > 0 and HOT_DAYS > 0 and RAW_TTL_DAYS <= HOT_DAYS:
+        raise ValueError(
+            f"HISTORY_TTL_DAYS={RAW_TTL_DAYS} must be greater than HISTORY_HOT_DAYS={HOT_DAYS}, "
+            "or entries are deleted before they are archived"
+        )
+
+
+async def ensure_retention_indexes():
+    """Create the archive indexes and the time-field indexes of the history collections (TTL if configured)."""
+    check_retention_settings()
+    await db.history_archive.create_index([("collection", 1), ("user", 1), ("first", 1)])
+    if ARCHIVE_RETENTION_DAYS > 0:
+        await db.history_archive.create_index("expires_at", expireAfterSeconds=0)
+    for collection, (_, time_field) in HISTORY_COLLECTIONS.items():
+        await _ensure_time_index(collection, time_field, RAW_TTL_DAYS * 86400 if RAW_TTL_DAYS > 0 else None)
+
+
+def _lease_owner() -> str:
+    # Evaluated per call: forked workers share the parent's import-time state
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+async def hold_archiver_lease() -> bool:
+    """
+    Take or renew the archiver lease for LEASE_SECONDS.
+
+    Every worker runs `run_archiver`, but only the lease holder archives;
+    another process takes over once a holder stops renewing it.
+
+    Returns:
+        bool: Whether this process holds the lease
+    """
+    now = datetime.utcnow()
+    owner = _lease_owner()
+    try:
+        await db.leases.find_one_and_update(
+            {"_id": ARCHIVER_LEASE, "$or": [{"owner": owner}, {"expires_at": {"$lt": now}}]},
+            {"$set": {"owner": owner, "expires_at": now + timedelta(seconds=LEASE_SECONDS)}},
+            upsert=True
+        )
+        return True
+    except DuplicateKeyError:
+        return False  # held by another process
+
+
+async def archive_collection(collection: str, cutoff: datetime) -> int:
+    """
+    Move entries older than `cutoff` from `collection` into history_archive.
+
+    Works through the oldest entries `ARCHIVE_BATCH_SIZE` at a time while
+    holding the archiver lease. Each archive chunk is keyed by a digest of
+    all its entry ids, so an existing chunk with the same key holds exactly
+    those entries: a run interrupted between writing a chunk and deleting
+    its entries is safe to repeat, and nothing is deleted unarchived.
+
+    Returns:
+        int: Number of entries archived
+    """
+    owner_field, time_field = HISTORY_COLLECTIONS[collection]
+    archived = 0
+
+    while True:
+        if not await hold_archiver_lease():
+            return archived
+
+        docs = await db[collection].find(
+            {time_field: {"$lt": cutoff, "$type": "date"}}
+        ).sort(time_field, 1).limit(ARCHIVE_BATCH_SIZE).to_list(length=ARCHIVE_BATCH_SIZE)
+        if not docs:
+            return archived
+
+        groups: Dict[tuple, List[dict]] = defaultdict(list)
+        for doc in docs:
+            groups[(doc.get(owner_field), f"{doc[time_field]:%Y-%m}")].append(doc)
+
+        for (user, month), entries in groups.items():
+            chunk = {
+                "_id": _chunk_id(collection, entries),
+                "collection": collection,
+                "user": user,
+                "month": month,
+                "first": entries[0][time_field],
+                "last": entries[-1][time_field],
+                "count": len(entries),
+                "days": day_summaries(entries, time_field) if collection == "prediction_history" else [],
+                "data": bson.Binary(_pack(entries))
+            }
+            if ARCHIVE_RETENTION_DAYS > 0:
+                chunk["expires_at"] = entries[-1][time_field] + timedelta(days=ARCHIVE_RETENTION_DAYS)
+            try:
+                await db.history_archive.insert_one(chunk)
+            except DuplicateKeyError:
+                pass  # the same entries, written by an earlier interrupted run
+            await db[collection].delete_many({"_id": {"$in": [entry["_id"] for entry in entries]}})
+            archived += len(entries)
+
+
+async def archive_old_entries() -> Dict[str, int]:
+    """Archive entries older than HISTORY_HOT_DAYS in every history collection (lease holder only)."""
+    if HOT_DAYS <= 0 or not await hold_archiver_lease():
+        return {}
+    cutoff = datetime.utcnow() - timedelta(days=HOT_DAYS)
+    return {collection: await archive_collection(collection, cutoff) for collection in HISTORY_COLLECTIONS}
+
+
+async def run_archiver():
+    """Archive periodically until cancelled."""
+    while True:
+        try:
+            counts = await archive_old_entries()
+            if any(counts.values()):
+                print(f"✅ Archived history entries: {counts}")
+        except Exception as e:
+            print(f"❌ History archiver error: {e}")
+        await asyncio.sleep(ARCHIVE_INTERVAL_MINUTES * 60)
+
+
+async def iter_archived(collection: str, user: str, month: Optional[str] = None) -> AsyncIterator[dict]:
+    """
+    Yield a user's archived entries oldest first, one chunk in memory at a time.
+
+    Args:
+        collection (str): Source collection name
+        user (str): Owner of the entries
+        month (Optional[str]): Only entries from this "YYYY-MM" month
+    """
+    query: dict = {"collection": collection, "user": user}
+    if month:
+        query["month"] = month
+
+    async for chunk in db.history_archive.find(query, {"data": 1}).sort("first", 1):
+        for doc in _unpack(chunk["data"]):
+            yield doc
+
+
+async def archived_months(collection: str, user: str) -> List[dict]:
+    """Archived months for a user with their entry counts, newest first."""
+    return await db.history_archive.aggregate([
+        {"$match": {"collection": collection, "user": user}},
+        {"$group": {"_id": "$month", "count": {"$sum": "$count"}}},
+        {"$sort": {"_id": -1}},
+        {"$project": {"_id": 0, "month": "$_id", "count": 1}}
+    ]).to_list(length=None)
+
+
+async def archived_day_summaries(
+    user: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None
+) -> AsyncIterator[dict]:
+    """
+    Yield (user, per-day counters, first and last timestamp) of archived predictions.
+
+    Args:
+        user (Optional[str]): Only this user's chunks
+        start (Optional[datetime]): Only chunks with entries from this time on
+        end (Optional[datetime]): Only chunks with entries before this time
+    """
+    query: dict = {"collection": "prediction_history"}
+    if user is not None:
+        query["user"] = user
+    if start is not None:
+        query["last"] = {"$gte": start}
+    if end is not None:
+        query["first"] = {"$lt": end}
+    async for chunk in db.history_archive.find(query, {"user": 1, "days": 1, "first": 1, "last": 1}):
+        yield chunk
+
+
+async def chunk_entries(chunk_id: str) -> List[dict]:
+    """Decompress the entries of one archive chunk."""
+    chunk = await db.history_archive.find_one({"_id": chunk_id}, {"data": 1})
+    return _unpack(chunk["data"]) if chunk else []
+
+
+async def purge_user_history(collection: str, user: str) -> int:
+    """
+    Delete a user's hot and archived entries from `collection`.
+
+    Returns:
+        int: Number of entries deleted
+    """
+    owner_field, _ = HISTORY_COLLECTIONS[collection]
+    result = await db[collection].delete_many({owner_field: user})
+    deleted = result.deleted_count
+
+    archived = await db.history_archive.aggregate([
+        {"$match": {"collection": collection, "user": user}},
+        {"$group": {"_id": None, "count": {"$sum": "$count"}}}
+    ]).to_list(length=1)
+    await db.history_archive.delete_many({"collection": collection, "user": user})
+    return deleted + (archived[0]["count"] if archived else 0)
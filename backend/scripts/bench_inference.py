@@ -0,0 +1,201 @@
+"""
+Inference micro-benchmarks for the readability classifier and MT5 (CPU).
+
+Sweeps batch size, input length in tokens, torch thread count and the
+readability backend or MT5 decoding profile. Each configuration reports
+tokens/s, items/s, latency percentiles per call and peak RSS:
+
+    python -m scripts.bench_inference readability --backends torch,onnx-int8 \\
+        --batch-sizes 1,8,32 --lengths 32,128,512 --threads 1,2,4
+    python -m scripts.bench_inference mt5 --profiles fast,quality \\
+        --batch-sizes 1,4,16 --lengths 16,48 --threads 2,4 --output mt5.json
+
+Run it on the machine type that serves traffic, with nothing else busy,
+to pick worker counts and OMP/torch thread settings.
+"""
+
+import argparse
+import json
+import os
+import time
+from typing import Callable, List
+
+import torch
+
+from scripts.benchutil import peak_rss_mb, reset_peak_rss, summarize
+
+SAMPLE_TEXT = (
+    "Fotosentez, bitkilerin güneş ışığını kullanarak karbondioksit ve sudan glikoz ürettiği bir süreçtir "
+    "ve bu süreç sırasında atmosfere oksijen verilir. Okula giderken arkadaşımla karşılaştım ve birlikte "
+    "yürüdük. Sürdürülebilir kalkınma hedeflerine ulaşılabilmesi için uluslararası işbirliğinin "
+    "güçlendirilmesi gerekmektedir. "
+)
+
+
+def int_list(value: str) -> List[int]:
+    return [int(part) for part in value.split(",") if part.strip()]
+
+
+def str_list(value: str) -> List[str]:
+    return [part.strip() for part in value.split(",") if part.strip()]
+
+
+def texts_of_tokens(tokenizer, tokens: int, count: int) -> List[str]:
+    """
+    `count` different natural-looking texts of about `tokens` tokens each (special tokens excluded).
+
+    Identical texts would be tokenized (and for readability scored) only
+    once per batch, so each gets its own numbered prefix.
+    """
+    ids = tokenizer(SAMPLE_TEXT * (tokens // 8 + 1), add_special_tokens=False)["input_ids"]
+    texts = []
+    for number in range(1, count + 1):
+        prefix = tokenizer(f"({number}) ", add_special_tokens=False)["input_ids"]
+        body = ids[:max(1, tokens - len(prefix))]
+        texts.append(tokenizer.decode(prefix + body, skip_special_tokens=True).strip())
+    return texts
+
+
+def measure(call: Callable[[], object], iterations: int, warmup: int) -> List[float]:
+    for _ in range(warmup):
+        call()
+    latencies = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        call()
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def bench_readability(args) -> List[dict]:
+    from predict import ReadabilityPredictor
+
+    results = []
+    for backend in args.backends:
+        os.environ["READABILITY_BACKEND"] = backend
+        predictor = None
+        for threads in args.threads:
+            torch.set_num_threads(threads)
+            if predictor is None or backend.startswith("onnx"):
+                # ONNX Runtime fixes its thread pool when the session is created
+                os.environ["ONNX_INTRA_OP_THREADS"] = str(threads)
+                started = time.perf_counter()
+                predictor = ReadabilityPredictor()
+                load_seconds = time.perf_counter() - started
+
+            for length in args.lengths:
+                for batch_size in args.batch_sizes:
+                    texts = texts_of_tokens(predictor.tokenizer, length, batch_size)
+
+                    def call():
+                        predictor.tokens.cache.clear()  # time tokenization as for unseen texts
+                        return predictor.predict_batch(texts)
+
+                    reset_peak_rss()
+                    latencies = measure(call, args.iterations, args.warmup)
+                    total = sum(latencies)
+                    results.append({
+                        "model": "readability",
+                        "backend": backend,
+                        "threads": threads,
+                        "length_tokens": length,
+                        "batch_size": batch_size,
+                        "tokens_per_s": round(length * batch_size * len(latencies) / total, 1),
+                        "items_per_s": round(batch_size * len(latencies) / total, 2),
+                        "latency": summarize(latencies),
+                        "peak_rss_mb": peak_rss_mb(),
+                        "load_s": round(load_seconds, 2)
+                    })
+                    print(f"✅ {json.dumps(results[-1], ensure_ascii=False)}")
+    return results
+
+
+def bench_mt5(args) -> List[dict]:
+    import simplify
+    from simplify import MT5Simplifier
+
+    results = []
+    for quantize in args.quantize:
+        simplify.MT5_QUANTIZE = "" if quantize == "none" else quantize
+        started = time.perf_counter()
+        simplifier = MT5Simplifier()
+        load_seconds = time.perf_counter() - started
+
+        for threads in args.threads:
+            torch.set_num_threads(threads)
+            for length in args.lengths:
+                for batch_size in args.batch_sizes:
+                    # One call simplifies `batch_size` sentences in a single generate()
+                    simplify.SENTENCE_BATCH_SIZE = batch_size
+                    sentences = texts_of_tokens(simplifier.tokenizer, length, batch_size)
+                    text = " ".join(sentence.rstrip(".") + "." for sentence in sentences)
+                    for profile in args.profiles:
+                        outputs = []
+
+                        def call():
+                            simplifier.tokens.cache.clear()
+                            outputs.append(simplifier.simplify(text, profile))
+
+                        reset_peak_rss()
+                        latencies = measure(call, args.iterations, args.warmup)
+                        generated = len(simplifier.tokenizer(outputs[-1], add_special_tokens=False)["input_ids"])
+                        total = sum(latencies)
+                        results.append({
+                            "model": "mt5",
+                            "quantize": quantize,
+                            "profile": profile,
+                            "threads": threads,
+                            "length_tokens": length,
+                            "batch_size": batch_size,
+                            "generated_tokens_per_s": round(generated * len(latencies) / total, 1),
+                            "input_tokens_per_s": round(length * batch_size * len(latencies) / total, 1),
+                            "sentences_per_s": round(batch_size * len(latencies) / total, 2),
+                            "latency": summarize(latencies),
+                            "peak_rss_mb": peak_rss_mb(),
+                            "load_s": round(load_seconds, 2)
+                        })
+                        print(f"✅ {json.dumps(results[-1], ensure_ascii=False)}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="model", required=True)
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--batch-sizes", type=int_list, default=[1, 8, 32])
+    common.add_argument("--threads", type=int_list, default=[os.cpu_count() or 1])
+    common.add_argument("--iterations", type=int, help="Timed calls per configuration (default 20, 5 for mt5)")
+    common.add_argument("--warmup", type=int, default=3)
+    common.add_argument("--output", help="Write the results as a JSON list to this file")
+
+    readability = subparsers.add_parser("readability", parents=[common], help="Benchmark ReadabilityPredictor")
+    readability.add_argument("--backends", type=str_list, default=["torch"], help="torch, torch-int8, onnx, onnx-int8")
+    readability.add_argument("--lengths", type=int_list, default=[32, 128, 512])
+
+    mt5 = subparsers.add_parser("mt5", parents=[common], help="Benchmark MT5Simplifier")
+    mt5.add_argument("--profiles", type=str_list, default=["fast", "quality"])
+    mt5.add_argument("--quantize", type=str_list, default=["none"], help="none, int8")
+    mt5.add_argument("--lengths", type=int_list, default=[16, 48])
+
+    args = parser.parse_args()
+    if args.iterations is None:
+        args.iterations = 5 if args.model == "mt5" else 20
+    if args.model == "mt5":
+        results = bench_mt5(args)
+    else:
+        results = bench_readability(args)
+
+    report = {
+        "cpu_count": os.cpu_count(),
+        "torch": torch.__version__,
+        "results": results
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2, ensure_ascii=False)
+        print(f"✅ Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Login storm benchmark: login throughput and event-loop responsiveness.
+
+Fires `--logins` concurrent logins at `/auth/token` while a probe task
+measures how late the event loop wakes up from a short sleep, and a second
+probe times a cheap authenticated request. With bcrypt on the event loop,
+every login stalls both probes for the full hash time.
+
+By default the auth router runs in-process, with the default accounts
+preloaded into the user cache (no Mongo or models needed):
+
+    python -m scripts.bench_login --logins 200 --concurrency 50
+
+or against a running server, where the loop lag is seen through the
+latency of `/health/live`:
+
+    python -m scripts.bench_login --url http://127.0.0.1:8000
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from typing import List, Optional
+
+import httpx
+
+from scripts.benchutil import summarize
+
+
+def build_app():
+    """Minimal app with the real auth router and one authenticated endpoint."""
+    from fastapi import Depends, FastAPI
+    from auth import DEFAULT_USERS, get_current_active_user, router as auth_router, user_cache
+
+    for username, user in DEFAULT_USERS.items():
+        user_cache.set(username, user, ttl_seconds=24 * 3600)
+
+    app = FastAPI()
+    app.include_router(auth_router, prefix="/auth")
+
+    @app.get("/health/live")
+    async def live():
+        return {"status": "alive"}
+
+    @app.get("/me")
+    async def me(current_user: dict = Depends(get_current_active_user)):
+        return {"username": current_user["username"]}
+
+    return app
+
+
+async def loop_lag_probe(stop: asyncio.Event, samples: List[float], interval: float = 0.01):
+    """Record how much later than requested the loop wakes from `sleep(interval)`."""
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, time.perf_counter() - started - interval))
+
+
+async def request_probe(client: httpx.AsyncClient, path: str, headers: dict,
+                        stop: asyncio.Event, samples: List[float], interval: float = 0.02):
+    """Time a cheap request repeatedly while the logins run."""
+    while not stop.is_set():
+        started = time.perf_counter()
+        await client.get(path, headers=headers)
+        samples.append(time.perf_counter() - started)
+        await asyncio.sleep(interval)
+
+
+async def run(url: Optional[str], logins: int, concurrency: int, username: str, password: str) -> dict:
+    if url:
+        client = httpx.AsyncClient(base_url=url, timeout=60)
+    else:
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=build_app()), base_url="http://bench", timeout=60)
+
+    async with client:
+        credentials = {"username": username, "password": password}
+        response = await client.post("/auth/token", data=credentials)
+        response.raise_for_status()
+        auth_headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+        stop = asyncio.Event()
+        lag: List[float] = []
+        probe_latency: List[float] = []
+        probe_path = "/health/live" if url else "/me"
+        probes = [asyncio.create_task(request_probe(client, probe_path, {} if url else auth_headers, stop, probe_latency))]
+        if not url:
+            # The loop is only ours to measure when the app runs in-process
+            probes.append(asyncio.create_task(loop_lag_probe(stop, lag)))
+
+        semaphore = asyncio.Semaphore(concurrency)
+        login_latency: List[float] = []
+        errors = 0
+
+        async def login():
+            nonlocal errors
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    result = await client.post("/auth/token", data=credentials)
+                    if result.status_code != 200:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                login_latency.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(login() for _ in range(logins)))
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await asyncio.gather(*probes)
+
+    report = {
+        "mode": "remote" if url else "in-process",
+        "logins": logins,
+        "concurrency": concurrency,
+        "elapsed_s": round(elapsed, 3),
+        "logins_per_s": round(logins / elapsed, 2) if elapsed else 0.0,
+        "errors": errors,
+        "login_latency": summarize(login_latency),
+        "probe_latency": summarize(probe_latency)
+    }
+    if lag:
+        report["event_loop_lag"] = summarize(lag)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Benchmark a running server instead of the in-process auth router")
+    parser.add_argument("--logins", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=30)
+    parser.add_argument("--username", default="user")
+    parser.add_argument("--password", default="secret")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args.url, args.logins, args.concurrency, args.username, args.password))
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+Export, quantize and check the readability classifier backends.
+
+    python -m scripts.export_readability export-onnx
+    python -m scripts.export_readability quantize-onnx
+    python -m scripts.export_readability quantize-torch
+    python -m scripts.export_readability parity --backend onnx-int8 --data heldout.txt
+
+Artifacts are written next to the model in MODEL_PATH (or --model-path),
+where `READABILITY_BACKEND` picks them up. `parity` scores a held-out file
+with fp32 PyTorch and the chosen backend and prints label agreement, score
+drift and throughput as JSON.
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from typing import List
+
+import torch
+from dotenv import load_dotenv
+from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+from readability_backends import (
+    ONNX_FILE,
+    ONNX_INT8_FILE,
+    TORCH_INT8_FILE,
+    load_backend,
+    quantize_torch_model
+)
+
+load_dotenv()
+
+
+def export_onnx(model_path: str, opset: int = 14):
+    tokenizer = AutoTokenizer.from_pretrained(model_path)
+    model = AutoModelForSequenceClassification.from_pretrained(model_path)
+    model.eval()
+
+    sample = tokenizer(["Örnek bir cümle.", "İkinci örnek"], padding=True, return_tensors="pt")
+    input_names = list(sample.keys())
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["logits"] = {0: "batch"}
+
+    output = os.path.join(model_path, ONNX_FILE)
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(sample[name] for name in input_names),
+            output,
+            input_names=input_names,
+            output_names=["logits"],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset
+        )
+    print(f"✅ Exported {output}")
+
+
+def quantize_onnx(model_path: str):
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    source = os.path.join(model_path, ONNX_FILE)
+    if not os.path.exists(source):
+        export_onnx(model_path)
+    output = os.path.join(model_path, ONNX_INT8_FILE)
+    quantize_dynamic(source, output, weight_type=QuantType.QInt8)
+    print(f"✅ Quantized {output}")
+
+
+def quantize_torch(model_path: str):
+    model = quantize_torch_model(AutoModelForSequenceClassification.from_pretrained(model_path))
+    output = os.path.join(model_path, TORCH_INT8_FILE)
+    # QuantizedTorchBackend loads this into a freshly quantized model
+    torch.save(model.state_dict(), output)
+    print(f"✅ Quantized {output}")
+
+
+def read_texts(path: str) -> List[str]:
+    """Read texts from a .txt (one per line), .jsonl or .csv file with a `text` field."""
+    with open(path, encoding="utf-8") as f:
+        if path.endswith(".csv"):
+            return [row["text"] for row in csv.DictReader(f) if row.get("text")]
+        if path.endswith((".jsonl", ".ndjson")):
+            return [json.loads(line)["text"] for line in f if line.strip()]
+        return [line.strip() for line in f if line.strip()]
+
+
+def score(backend, tokenizer, texts: List[str], batch_size: int):
+    """
+    Return P(Difficult) for each text and the elapsed inference time.
+
+    One untimed batch runs first, so lazy initialization (thread pools,
+    kernel selection, allocator growth) is not billed to whichever backend
+    happens to be timed first.
+    """
+    def encode(batch: List[str]):
+        return tokenizer(batch, padding=True, truncation=True, max_length=512, return_tensors="pt").to(backend.device)
+
+    backend.probabilities(encode(texts[:batch_size]))
+
+    difficult = []
+    elapsed = 0.0
+    for start in range(0, len(texts), batch_size):
+        inputs = encode(texts[start:start + batch_size])
+        began = time.perf_counter()
+        probabilities = backend.probabilities(inputs)
+        elapsed += time.perf_counter() - began
+        difficult.extend(probabilities[:, 1].tolist())
+    return difficult, elapsed
+
+
+def parity(model_path: str, backend_name: str, data: str, batch_size: int) -> dict:
+    texts = read_texts(data)
+    if not texts:
+        raise ValueError(f"No texts found in {data}")
+
+    tokenizer = AutoTokenizer.from_pretrained(model_path)
+    cpu = torch.device("cpu")
+    reference, reference_time = score(load_backend("torch", model_path, cpu), tokenizer, texts, batch_size)
+    candidate, candidate_time = score(load_backend(backend_name, model_path, cpu), tokenizer, texts, batch_size)
+
+    drift = [abs(a - b) for a, b in zip(reference, candidate)]
+    agreement = sum((a >= 0.5) == (b >= 0.5) for a, b in zip(reference, candidate))
+
+    return {
+        "backend": backend_name,
+        "texts": len(texts),
+        "label_agreement": agreement / len(texts),
+        "label_disagreements": len(texts) - agreement,
+        "score_drift_mean": sum(drift) / len(drift),
+        "score_drift_max": max(drift),
+        "fp32_texts_per_sec": len(texts) / reference_time if reference_time else None,
+        "backend_texts_per_sec": len(texts) / candidate_time if candidate_time else None,
+        "speedup": reference_time / candidate_time if candidate_time else None
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model-path", default=os.getenv("MODEL_PATH"))
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = commands.add_parser("export-onnx", help="Export the fp32 model to ONNX")
+    export_parser.add_argument("--opset", type=int, default=14)
+    commands.add_parser("quantize-onnx", help="Write an int8 ONNX model (exports first if needed)")
+    commands.add_parser("quantize-torch", help="Write an int8 dynamically quantized PyTorch model")
+
+    parity_parser = commands.add_parser("parity", help="Compare a backend against fp32 PyTorch")
+    parity_parser.add_argument("--backend", required=True, choices=["torch-int8", "onnx", "onnx-int8"])
+    parity_parser.add_argument("--data", required=True, help="Held-out .txt, .jsonl or .csv file")
+    parity_parser.add_argument("--batch-size", type=int, default=32)
+    parity_parser.add_argument("--min-agreement", type=float, default=None,
+                               help="Exit with status 1 if label agreement is below this value")
+
+    args = parser.parse_args()
+    if not args.model_path:
+        parser.error("MODEL_PATH is not set, pass --model-path")
+
+    if args.command == "export-onnx":
+        export_onnx(args.model_path, args.opset)
+    elif args.command == "quantize-onnx":
+        quantize_onnx(args.model_path)
+    elif args.command == "quantize-torch":
+        quantize_torch(args.model_path)
+    elif args.command == "parity":
+        report = parity(args.model_path, args.backend, args.data, args.batch_size)
+        print(json.dumps(report, indent=2))
+        if args.min_agreement is not None and report["label_agreement"] < args.min_agreement:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,456 @@
+"""
+End-to-end load test of the API in main.py, fully offline.
+
+Starts the real application with tiny stand-ins for the readability
+classifier and MT5 (registered over the real models in the model
+registry), the local OpenAI stub from `scripts.stub_openai`, and either a
+local MongoDB (`--mongo-url`, mongodb://127.0.0.1:27017 by default, never
+the MONGO_URL from .env; database MONGO_DB, "dyslexia_loadtest" by default)
+or an in-memory one (`--mongo memory`, needs `pip install mongomock-motor`).
+Virtual users then log in and drive /predict/, /simplify/, /history/ and
+/statistics/ in a weighted mix for a fixed duration:
+
+    python -m scripts.loadtest --concurrency 32 --duration 30 --output run.json
+    python -m scripts.loadtest --concurrency 32 --duration 30 --baseline run.json
+
+The report is JSON: throughput, p50/p95/p99 latency and error rate in
+total and per operation, plus deltas against `--baseline` when given.
+If every request of some operation failed, the run exits with an error
+and `--output` is not written. With `--mongo memory`, /history/ is
+requested without `preview`, which mongomock cannot project.
+`--url` drives an already running server instead (no stand-ins or stub).
+
+To watch `--simplify-method auto` fail over, degrade the OpenAI stub part
+way through the measured run:
+
+    python -m scripts.loadtest --simplify-method auto --mix simplify=1 \
+        --openai-degrade-at 10 --openai-degraded-latency-ms 15000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import threading
+import time
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional
+
+import httpx
+
+from scripts.benchutil import summarize
+
+DEFAULT_MIX = "predict=40,simplify=15,history=30,statistics=10,login=5"
+
+CORPUS = [
+    "Bugün hava çok güzel.",
+    "Kedi bahçede top oynuyor.",
+    "Okula giderken arkadaşımla karşılaştım ve birlikte yürüdük.",
+    "Türkiye'nin başkenti Ankara'dır ve en kalabalık şehri İstanbul'dur.",
+    "Fotosentez, bitkilerin güneş ışığını kullanarak karbondioksit ve sudan glikoz ürettiği karmaşık bir biyokimyasal süreçtir.",
+    "Ekonomik göstergelerdeki dalgalanmalar, merkez bankasının para politikasını yeniden değerlendirmesine neden olmuştur.",
+    "Annem akşam yemeği için makarna yaptı.",
+    "Sürdürülebilir kalkınma hedeflerine ulaşılabilmesi için uluslararası işbirliğinin güçlendirilmesi gerekmektedir."
+]
+
+
+# --- Stand-in models ---
+class _PassThroughTokens:
+    """Stands in for TokenizationStage: the "encoding" is the text itself."""
+
+    async def aencode_many(self, texts: List[str]) -> List[str]:
+        return list(texts)
+
+    def stats(self) -> Dict:
+        return {"size": 0, "hits": 0, "misses": 0, "evictions": 0}
+
+
+class StandInClassifier:
+    """Answers like ReadabilityPredictor after a fixed delay per batch."""
+
+    model_version = "loadtest"
+    tokens = _PassThroughTokens()
+
+    def __init__(self, latency_ms: float):
+        self.latency = latency_ms / 1000
+
+    def predict_batch(self, texts: List[str]) -> List[Dict]:
+        time.sleep(self.latency)
+        return [
+            {"score": 0.5 + (len(text) % 50) / 100, "label": "Difficult" if len(text.split()) > 10 else "Easy"}
+            for text in texts
+        ]
+
+    def predict_encoded(self, texts: List[str]) -> List[Dict]:
+        return self.predict_batch(texts)
+
+    def predict(self, text: str) -> Dict:
+        return self.predict_batch([text])[0]
+
+
+class StandInSimplifier:
+    """Answers like MT5Simplifier after a delay proportional to the output length."""
+
+    tokenizer = None
+
+    def __init__(self, latency_ms_per_word: float):
+        self.latency = latency_ms_per_word / 1000
+
+    def _words(self, text: str) -> List[str]:
+        return text.split()[:20]
+
+    def simplify(self, text: str, profile: str = "fast") -> str:
+        words = self._words(text)
+        time.sleep(self.latency * len(words))
+        return " ".join(words)
+
+    def stream(self, text: str, streamer, stop: threading.Event):
+        for word in self._words(text):
+            if stop.is_set():
+                break
+            time.sleep(self.latency)
+            streamer.on_finalized_text(word + " ")
+
+
+# --- In-process servers ---
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def serve_in_thread(app, port: int):
+    """Run `app` with uvicorn on its own thread and event loop."""
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise SystemExit(f"❌ Server on port {port} failed to start")
+        time.sleep(0.05)
+    return server, thread
+
+
+def use_in_memory_mongo():
+    """Point database.db at mongomock before any module imports it."""
+    try:
+        from mongomock_motor import AsyncMongoMockClient
+    except ImportError:
+        raise SystemExit("❌ --mongo memory needs 'pip install mongomock-motor'")
+
+    import database
+    database.client = AsyncMongoMockClient()
+    database.db = database.client[database.MONGO_DB]
+
+
+def start_application(args) -> tuple:
+    """Start the OpenAI stub and the API with stand-in models. Returns (base URL, servers)."""
+    from scripts.stub_openai import create_app as create_stub
+
+    stub_port = free_port()
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{stub_port}/v1"
+    os.environ["OPENAI_API_KEY"] = "stub"
+    os.environ["MODEL_LOADING"] = "eager"
+    os.environ.setdefault("SECRET_KEY", "loadtest-secret")
+    os.environ.setdefault("MONGO_DB", "dyslexia_loadtest")
+
+    if args.mongo == "memory":
+        use_in_memory_mongo()
+    else:
+        # Set before database.py loads .env, which does not override it
+        os.environ["MONGO_URL"] = args.mongo_url
+
+    from main import app
+    from utils.model_registry import model_registry
+
+    model_registry.register("readability", lambda: StandInClassifier(args.classifier_latency_ms))
+    model_registry.register("mt5", lambda: StandInSimplifier(args.mt5_latency_ms))
+
+    stub = create_stub(latency_ms=args.openai_latency_ms, jitter_ms=args.openai_jitter_ms, error_rate=args.openai_error_rate)
+    servers = [serve_in_thread(stub, stub_port)]
+    api_port = free_port()
+    servers.append(serve_in_thread(app, api_port))
+    return f"http://127.0.0.1:{api_port}", servers
+
+
+# --- Load generation ---
+def parse_mix(mix: str) -> Dict[str, float]:
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        weights[name.strip()] = float(weight or 1)
+    unknown = set(weights) - {"predict", "simplify", "history", "statistics", "login"}
+    if unknown:
+        raise SystemExit(f"❌ Unknown operations in --mix: {', '.join(sorted(unknown))}")
+    return weights
+
+
+def history_preview(args) -> bool:
+    """Whether /history/ is asked to truncate texts (mongomock cannot run the $substrCP projection)."""
+    return bool(args.url) or args.mongo != "memory"
+
+
+def failed_operations(report: dict) -> List[str]:
+    """Operations whose every measured request failed; their numbers measure nothing."""
+    return [
+        operation for operation, values in report["operations"].items()
+        if values["requests"] and values["errors"] == values["requests"]
+    ]
+
+
+class Recorder:
+    """Latencies and status codes per operation."""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Counter] = defaultdict(Counter)
+        self.simplify_methods: Counter = Counter()
+        self.recording = False
+
+    def record(self, operation: str, seconds: float, status):
+        if self.recording:
+            self.latencies[operation].append(seconds)
+            self.statuses[operation][str(status)] += 1
+
+    def report(self, elapsed: float) -> dict:
+        def section(latencies: List[float], statuses: Counter) -> dict:
+            requests = sum(statuses.values())
+            errors = sum(count for status, count in statuses.items() if not status.startswith("2"))
+            return {
+                "requests": requests,
+                "errors": errors,
+                "error_rate": round(errors / requests, 4) if requests else 0.0,
+                "throughput_rps": round(requests / elapsed, 2) if elapsed else 0.0,
+                **summarize(latencies),
+                "status_codes": dict(statuses)
+            }
+
+        all_latencies = [value for values in self.latencies.values() for value in values]
+        all_statuses = sum(self.statuses.values(), Counter())
+        return {
+            "total": section(all_latencies, all_statuses),
+            "operations": {
+                operation: section(self.latencies[operation], self.statuses[operation])
+                for operation in sorted(self.statuses)
+            },
+            # Backend that answered each successful simplification
+            "simplify_methods": dict(self.simplify_methods)
+        }
+
+
+class VirtualUser:
+    def __init__(self, client: httpx.AsyncClient, recorder: Recorder, args, rng: random.Random, corpus: List[str]):
+        self.client = client
+        self.recorder = recorder
+        self.args = args
+        self.rng = rng
+        self.corpus = corpus
+        self.headers: Dict[str, dict] = {}
+
+    def text(self) -> str:
+        text = self.rng.choice(self.corpus)
+        if self.rng.random() < self.args.unique_ratio:
+            # Defeats the prediction/simplification caches for this request
+            text = f"{text} ({self.rng.getrandbits(48):x})"
+        return text
+
+    async def timed(self, operation: str, method: str, url: str, **kwargs) -> Optional[httpx.Response]:
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+            self.recorder.record(operation, time.perf_counter() - started, response.status_code)
+            return response
+        except httpx.HTTPError as e:
+            self.recorder.record(operation, time.perf_counter() - started, type(e).__name__)
+            return None
+
+    async def login(self, role: str):
+        username, password = (self.args.admin_username if role == "admin" else self.args.username), self.args.password
+        response = await self.timed("login", "POST", "/auth/token", data={"username": username, "password": password})
+        if response is not None and response.status_code == 200:
+            self.headers[role] = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    async def run(self, operations: List[str], weights: List[float], deadline: float):
+        await self.login("user")
+        await self.login("admin")
+        if not self.headers.get("user"):
+            raise SystemExit("❌ Login failed, check --username/--password")
+
+        while time.perf_counter() < deadline:
+            operation = self.rng.choices(operations, weights)[0]
+            if operation == "login":
+                await self.login("user")
+            elif operation == "predict":
+                await self.timed("predict", "POST", "/predict/", json={"text": self.text()}, headers=self.headers["user"])
+            elif operation == "simplify":
+                response = await self.timed(
+                    "simplify", "POST", "/simplify/",
+                    json={"text": self.text()},
+                    params={"method": self.args.simplify_method, "profile": "fast"},
+                    headers=self.headers["user"]
+                )
+                if self.recorder.recording and response is not None and response.status_code == 200:
+                    self.recorder.simplify_methods[response.json().get("method") or self.args.simplify_method] += 1
+            elif operation == "history":
+                params = {"limit": 20}
+                if history_preview(self.args):
+                    params["preview"] = 300
+                await self.timed("history", "GET", "/history/", params=params, headers=self.headers["user"])
+            elif operation == "statistics":
+                await self.timed("statistics", "GET", "/statistics/", headers=self.headers.get("admin", self.headers["user"]))
+
+            if self.args.think_ms:
+                await asyncio.sleep(self.rng.expovariate(1000 / self.args.think_ms))
+
+
+async def degrade_openai(args):
+    """Reconfigure the OpenAI stub `--openai-degrade-at` seconds into the measured run."""
+    await asyncio.sleep(args.warmup + args.openai_degrade_at)
+    stub_url = os.environ["OPENAI_BASE_URL"].rsplit("/v1", 1)[0]
+    config = {"latency_ms": args.openai_degraded_latency_ms, "error_rate": args.openai_degraded_error_rate}
+    async with httpx.AsyncClient() as client:
+        await client.post(f"{stub_url}/_config", json=config)
+    print(f"⚠️ OpenAI stub degraded: {config}")
+
+
+async def drive(base_url: str, args) -> dict:
+    weights = parse_mix(args.mix)
+    operations, operation_weights = list(weights), list(weights.values())
+    corpus = CORPUS
+    if args.texts:
+        with open(args.texts, encoding="utf-8") as handle:
+            corpus = [line.strip() for line in handle if line.strip()]
+
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=args.timeout) as client:
+        started = time.perf_counter()
+        deadline = started + args.warmup + args.duration
+        users = [
+            VirtualUser(client, recorder, args, random.Random(args.seed + index), corpus)
+            for index in range(args.concurrency)
+        ]
+        tasks = [asyncio.create_task(user.run(operations, operation_weights, deadline)) for user in users]
+        degrade = None
+        if args.openai_degrade_at is not None and not args.url:
+            degrade = asyncio.create_task(degrade_openai(args))
+
+        await asyncio.sleep(args.warmup)
+        recorder.recording = True
+        measured_from = time.perf_counter()
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - measured_from
+        if degrade is not None:
+            degrade.cancel()
+
+    return {
+        "config": {
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "warmup_s": args.warmup,
+            "mix": weights,
+            "unique_ratio": args.unique_ratio,
+            "simplify_method": args.simplify_method,
+            "think_ms": args.think_ms,
+            "target": args.url or "in-process",
+            "mongo": None if args.url else args.mongo,
+            "history_preview": history_preview(args),
+            "classifier_latency_ms": args.classifier_latency_ms,
+            "mt5_latency_ms": args.mt5_latency_ms,
+            "openai_latency_ms": args.openai_latency_ms,
+            "openai_error_rate": args.openai_error_rate,
+            "openai_degrade_at_s": args.openai_degrade_at,
+            "openai_degraded_latency_ms": args.openai_degraded_latency_ms,
+            "openai_degraded_error_rate": args.openai_degraded_error_rate
+        },
+        "elapsed_s": round(elapsed, 3),
+        **recorder.report(elapsed)
+    }
+
+
+def compare(report: dict, baseline: dict) -> dict:
+    """Relative change of throughput, latency and error rate against a previous report."""
+    def change(current: float, previous: float) -> dict:
+        delta = {"baseline": previous, "current": current}
+        if previous:
+            delta["change_pct"] = round((current - previous) / previous * 100, 2)
+        return delta
+
+    sections = {"total": (report["total"], baseline.get("total", {}))}
+    for operation, values in report["operations"].items():
+        sections[operation] = (values, baseline.get("operations", {}).get(operation, {}))
+
+    return {
+        name: {
+            metric: change(current[metric], previous.get(metric, 0))
+            for metric in ("throughput_rps", "p50_ms", "p95_ms", "p99_ms", "error_rate")
+        }
+        for name, (current, previous) in sections.items()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Drive a running server instead of starting one")
+    parser.add_argument("--concurrency", type=int, default=16, help="Virtual users")
+    parser.add_argument("--duration", type=float, default=30, help="Measured seconds")
+    parser.add_argument("--warmup", type=float, default=3, help="Unmeasured seconds before measuring")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Operation weights")
+    parser.add_argument("--unique-ratio", type=float, default=0.5, help="Fraction of texts made unique (cache misses)")
+    parser.add_argument("--simplify-method", default="openai", choices=["openai", "mt5", "auto"])
+    parser.add_argument("--think-ms", type=float, default=0, help="Mean pause between a user's requests")
+    parser.add_argument("--texts", help="File with one input text per line")
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--username", default="user")
+    parser.add_argument("--admin-username", default="admin")
+    parser.add_argument("--password", default="secret")
+    parser.add_argument("--mongo", default="local", choices=["local", "memory"])
+    parser.add_argument("--mongo-url", default="mongodb://127.0.0.1:27017", help="MongoDB for --mongo local")
+    parser.add_argument("--classifier-latency-ms", type=float, default=5, help="Stand-in classifier time per batch")
+    parser.add_argument("--mt5-latency-ms", type=float, default=2, help="Stand-in MT5 time per output word")
+    parser.add_argument("--openai-latency-ms", type=float, default=300)
+    parser.add_argument("--openai-jitter-ms", type=float, default=100)
+    parser.add_argument("--openai-error-rate", type=float, default=0.0, help="Fraction of stub calls failing with 429")
+    parser.add_argument("--openai-degrade-at", type=float, help="Seconds into the measured run to degrade the OpenAI stub")
+    parser.add_argument("--openai-degraded-latency-ms", type=float, default=15000)
+    parser.add_argument("--openai-degraded-error-rate", type=float, default=0.0)
+    parser.add_argument("--output", help="Also write the report to this file")
+    parser.add_argument("--baseline", help="Previous report to compare against")
+    args = parser.parse_args()
+
+    servers = []
+    base_url = args.url
+    if not base_url:
+        base_url, servers = start_application(args)
+
+    try:
+        report = asyncio.run(drive(base_url, args))
+    finally:
+        for server, thread in reversed(servers):
+            server.should_exit = True
+            thread.join(timeout=10)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as handle:
+            report["comparison"] = compare(report, json.load(handle))
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    print(output)
+    failed = failed_operations(report)
+    if failed:
+        raise SystemExit(
+            f"❌ Every {', '.join(failed)} request failed, the report is not usable"
+            + (f" and was not written to {args.output}" if args.output else "")
+        )
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            handle.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Per-process memory of a running server: RSS, PSS and unique (USS) memory.
+
+RSS counts shared pages in full for every process, so summing it over
+workers overstates the footprint. PSS splits each shared page between the
+processes mapping it, and USS is what a process alone holds: what another
+worker would add. Point it at the parent of `serve.py` (or of
+`uvicorn --workers N`) after sending some traffic:
+
+    python -m scripts.measure_rss --pid 12345
+    python -m scripts.measure_rss --pid 12345 --output rss.json
+
+Reads /proc/<pid>/smaps_rollup (Linux 4.14+), falling back to /proc/<pid>/smaps.
+"""
+
+import argparse
+import json
+import os
+from typing import Dict, List
+
+FIELDS = ("Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty", "Swap")
+
+
+def children_of(pid: int) -> List[int]:
+    """All descendants of `pid`, found by scanning the parent ids in /proc."""
+    parents: Dict[int, int] = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as handle:
+                # The command name may contain spaces and parentheses
+                fields = handle.read().rsplit(")", 1)[1].split()
+            parents[int(entry)] = int(fields[1])
+        except (OSError, IndexError, ValueError):
+            continue
+
+    descendants, frontier = [], [pid]
+    while frontier:
+        parent = frontier.pop()
+        found = sorted(child for child, ppid in parents.items() if ppid == parent)
+        descendants.extend(found)
+        frontier.extend(found)
+    return descendants
+
+
+def memory_of(pid: int) -> Dict[str, float]:
+    """smaps totals of one process in MiB, plus `uss_mb` (private pages)."""
+    totals = dict.fromkeys(FIELDS, 0)
+    for path in (f"/proc/{pid}/smaps_rollup", f"/proc/{pid}/smaps"):
+        try:
+            with open(path) as handle:
+                for line in handle:
+                    name, _, value = line.partition(":")
+                    if name in totals:
+                        totals[name] += int(value.split()[0])
+            break
+        except FileNotFoundError:
+            continue
+
+    memory = {name.lower() + "_mb": round(kib / 1024, 1) for name, kib in totals.items()}
+    memory["uss_mb"] = round((totals["Private_Clean"] + totals["Private_Dirty"]) / 1024, 1)
+    return memory
+
+
+def command_of(pid: int) -> str:
+    try:
+        with open(f"/proc/{pid}/cmdline", "rb") as handle:
+            return handle.read().replace(b"\0", b" ").decode(errors="replace").strip()
+    except OSError:
+        return ""
+
+
+def measure(pid: int) -> dict:
+    """
+    Memory of `pid` and its descendants.
+
+    Args:
+        pid (int): Parent process of the server
+
+    Returns:
+        dict: Per-process figures and totals in MiB
+    """
+    processes = []
+    for index, process in enumerate([pid, *children_of(pid)]):
+        try:
+            command = command_of(process)
+            role = "parent" if not index else "helper" if "resource_tracker" in command else "worker"
+            entry = {"pid": process, "role": role, "command": command}
+            entry.update(memory_of(process))
+        except OSError as e:
+            print(f"⚠️ Skipping {process}: {e}")
+            continue
+        processes.append(entry)
+
+    workers = [entry for entry in processes if entry["role"] == "worker"]
+    return {
+        "processes": processes,
+        "totals": {
+            "workers": len(workers),
+            "rss_sum_mb": round(sum(entry["rss_mb"] for entry in processes), 1),
+            "pss_sum_mb": round(sum(entry["pss_mb"] for entry in processes), 1),
+            "worker_uss_mean_mb": round(sum(entry["uss_mb"] for entry in workers) / len(workers), 1) if workers else 0.0,
+            "worker_uss_max_mb": max((entry["uss_mb"] for entry in workers), default=0.0)
+        }
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pid", type=int, required=True, help="Parent process of the server")
+    parser.add_argument("--output", help="Also write the report to this JSON file")
+    args = parser.parse_args()
+
+    report = measure(args.pid)
+    for entry in report["processes"]:
+        print(
+            f"{entry['role']:>6} {entry['pid']:>7}  rss {entry['rss_mb']:>8.1f}  "
+            f"pss {entry['pss_mb']:>8.1f}  uss {entry['uss_mb']:>8.1f} MiB"
+        )
+    print(json.dumps(report["totals"], indent=2))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2, ensure_ascii=False)
+        print(f"✅ Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+"""
+Rebuild the statistics rollups from prediction_history.
+
+    python -m scripts.rebuild_rollups
+
+Run once to backfill existing history (the statistics endpoint only reads
+rollups after this has run) and again whenever the counters need repair.
+"""
+
+import asyncio
+import time
+
+from stats import ensure_rollup_indexes, rebuild_rollups
+
+
+async def main():
+    started = time.perf_counter()
+    await ensure_rollup_indexes()
+    counts = await rebuild_rollups()
+    print(f"✅ Rebuilt rollups in {time.perf_counter() - started:.1f}s: {counts}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
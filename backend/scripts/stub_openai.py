@@ -0,0 +1,134 @@
+"""
+Local stand-in for OpenAI's Chat Completion API.
+
+Serves `/v1/chat/completions` (plain and streaming) with configurable
+latency and injected failures, so the OpenAI client can be exercised
+without network access:
+
+    python -m scripts.stub_openai --port 8001 --latency-ms 300 --error-rate 0.1
+    OPENAI_BASE_URL=http://127.0.0.1:8001/v1 OPENAI_API_KEY=stub uvicorn main:app
+
+Latency and failure settings can be changed at runtime with
+`POST /_config {"latency_ms": 2000, "error_rate": 0.5}`.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+def create_app(latency_ms: float = 50, jitter_ms: float = 0, error_rate: float = 0.0,
+               error_status: int = 429, retry_after: float = 1.0) -> FastAPI:
+    """
+    Build the stub application.
+
+    Args:
+        latency_ms (float): Delay before each response starts
+        jitter_ms (float): Random extra delay added on top of `latency_ms`
+        error_rate (float): Fraction of requests answered with `error_status`
+        error_status (int): Status code used for injected failures
+        retry_after (float): `Retry-After` seconds sent with injected failures
+
+    Returns:
+        FastAPI: The stub application
+    """
+    app = FastAPI(title="OpenAI stub")
+    app.state.config = {
+        "latency_ms": latency_ms,
+        "jitter_ms": jitter_ms,
+        "error_rate": error_rate,
+        "error_status": error_status,
+        "retry_after": retry_after
+    }
+    app.state.requests = 0
+
+    def simplify(messages) -> str:
+        prompt = messages[-1]["content"] if messages else ""
+        original = prompt.split("Original text:", 1)[-1].split("Simplified version:", 1)[0]
+        return " ".join(original.split())
+
+    @app.post("/_config")
+    async def update_config(request: Request):
+        app.state.config.update(await request.json())
+        return app.state.config
+
+    @app.get("/_stats")
+    async def stats():
+        return {"requests": app.state.requests, **app.state.config}
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        app.state.requests += 1
+        config = app.state.config
+        payload = await request.json()
+
+        await asyncio.sleep((config["latency_ms"] + random.uniform(0, config["jitter_ms"])) / 1000)
+
+        if random.random() < config["error_rate"]:
+            return JSONResponse(
+                status_code=config["error_status"],
+                content={"error": {"message": "Injected failure"}},
+                headers={"Retry-After": str(config["retry_after"])}
+            )
+
+        content = simplify(payload.get("messages", []))
+        created = int(time.time())
+
+        if not payload.get("stream"):
+            return {
+                "id": "chatcmpl-stub",
+                "object": "chat.completion",
+                "created": created,
+                "model": payload.get("model"),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop"
+                }]
+            }
+
+        async def events():
+            for word in content.split(" "):
+                chunk = {
+                    "id": "chatcmpl-stub",
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": payload.get("model"),
+                    "choices": [{"index": 0, "delta": {"content": word + " "}, "finish_reason": None}]
+                }
+                yield f"data: {json.dumps(chunk)}\n\n"
+                await asyncio.sleep(0.005)
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=429)
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    args = parser.parse_args()
+
+    import uvicorn
+    uvicorn.run(
+        create_app(args.latency_ms, args.jitter_ms, args.error_rate, args.error_status, args.retry_after),
+        host=args.host,
+        port=args.port,
+        log_level="warning"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+# ✅ backend/serve.py
+"""
+Pre-fork server: load the models once, then fork uvicorn workers that share them.
+
+`uvicorn --workers N` starts N fresh interpreters, each loading its own copy
+of the BERT classifier and MT5. Here the parent imports the app, loads the
+weights and forks the workers afterwards, so every worker maps the same
+physical pages copy-on-write. Inference only reads the weights, so those
+pages stay shared and each extra worker costs little more than its Python
+heap and activations:
+
+    python serve.py --workers 4 --port 8000
+
+Check what each worker really costs with `python -m scripts.measure_rss --pid <parent pid>`.
+"""
+
+import argparse
+import gc
+import os
+import signal
+import sys
+import time
+
+import torch
+import uvicorn
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Backends whose state is safe to inherit: ONNX Runtime sessions own thread
+# pools that do not survive fork, so ONNX models load in each worker instead
+FORK_SAFE_READABILITY_BACKENDS = ("torch", "torch-int8")
+
+# A worker dying sooner than this after its start is respawned with a delay
+MIN_WORKER_LIFETIME = 5.0
+
+
+def preloadable_models() -> list:
+    """Names of the registered models that can be loaded before forking."""
+    if torch.cuda.is_available():
+        # A CUDA context cannot be used from a forked child
+        print("⚠️ CUDA is available, models will load in each worker")
+        return []
+    names = ["mt5"]
+    backend = os.getenv("READABILITY_BACKEND", "torch")
+    if backend in FORK_SAFE_READABILITY_BACKENDS:
+        names.insert(0, "readability")
+    else:
+        print(f"⚠️ READABILITY_BACKEND={backend} is not fork-safe, the classifier will load in each worker")
+    return names
+
+
+class PreforkServer:
+    """Forks and supervises uvicorn workers sharing one listening socket."""
+
+    def __init__(self, config: uvicorn.Config, workers: int, worker_threads: int):
+        """
+        Args:
+            config (uvicorn.Config): Configuration every worker serves with
+            workers (int): Number of worker processes
+            worker_threads (int): torch intra-op threads per worker
+        """
+        self.config = config
+        self.workers = workers
+        self.worker_threads = worker_threads
+        self.children = {}
+        self.stopping = False
+
+    def spawn(self, slot: int, sockets: list):
+        pid = os.fork()
+        if pid:
+            self.children[pid] = (slot, time.monotonic())
+            return
+
+        # --- Worker ---
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        torch.set_num_threads(self.worker_threads)
+        try:
+            uvicorn.Server(self.config).run(sockets=sockets)
+        finally:
+            os._exit(0)
+
+    def stop(self, signum, frame):
+        self.stopping = True
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def run(self):
+        sock = self.config.bind_socket()
+        signal.signal(signal.SIGINT, self.stop)
+        signal.signal(signal.SIGTERM, self.stop)
+
+        for slot in range(self.workers):
+            self.spawn(slot, [sock])
+        print(f"✅ Parent {os.getpid()} serving on {self.config.host}:{self.config.port} with workers {sorted(self.children)}")
+
+        while self.children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            except InterruptedError:
+                continue
+            if pid not in self.children:
+                continue
+
+            slot, started = self.children.pop(pid)
+            if self.stopping:
+                continue
+            print(f"⚠️ Worker {pid} exited with status {os.waitstatus_to_exitcode(status)}, restarting")
+            if time.monotonic() - started < MIN_WORKER_LIFETIME:
+                time.sleep(1)
+            self.spawn(slot, [sock])
+
+        sock.close()
+        print("✅ All workers stopped")
+
+
+def main():
+    cpu_count = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("SERVE_WORKERS", str(cpu_count))))
+    parser.add_argument(
+        "--worker-threads", type=int, default=int(os.getenv("WORKER_TORCH_THREADS", "0")),
+        help="torch threads per worker (default: CPU count / workers, at least 1)"
+    )
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+
+    worker_threads = args.worker_threads or max(1, cpu_count // args.workers)
+
+    # No inference runs in the parent: loading stays single-threaded, so no
+    # OpenMP pool exists yet for the children to inherit in a broken state
+    torch.set_num_threads(1)
+    started = time.perf_counter()
+
+    from main import app
+    from utils.model_registry import model_registry
+
+    model_registry.preload(preloadable_models())
+    # Keep the collector from writing to the headers of every long-lived
+    # object in the children, which would un-share their pages
+    gc.collect()
+    gc.freeze()
+    print(f"✅ Models preloaded in {time.perf_counter() - started:.1f}s")
+
+    config = uvicorn.Config(app, host=args.host, port=args.port, log_level=args.log_level)
+    PreforkServer(config, args.workers, worker_threads).run()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,18 +2,37 @@
 Text Simplification API route supporting both OpenAI and local MT5 model.
 """
 
-from database import db  # Mongo client
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import json
+import threading
+import time
 
-from typing import Optional
+from typing import AsyncIterator, Optional, Tuple
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
 from utils.openai_client import openai_client
-from auth import get_current_active_user
+from utils.cache import LRUCache, SingleFlight
+from utils.text import content_key, split_sentences
+from readability_backends import quantize_torch_model
+from utils.history_writer import history_writer
+from utils.metrics import metrics
+from utils.tokenization import TokenizationStage, load_fast_tokenizer
+from utils.model_registry import model_registry
+from utils.routing import OPENAI_TIMEOUT, SimplifyRouter
+from auth import get_current_active_user, get_current_active_admin
 
 # MT5 imports
-from transformers import MT5ForConditionalGeneration, MT5Tokenizer
+from transformers import (
+    MT5ForConditionalGeneration,
+    MT5Tokenizer,
+    StoppingCriteria,
+    StoppingCriteriaList,
+    TextStreamer
+)
 import torch
 import os
 
@@ -24,11 +43,377 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 MODEL_PATH = os.path.join(BASE_DIR, "models/mt5_simplify_tr_model")
 DEVICE = torch.device("cpu")
 
-# --- Load MT5 model once ---
-print(f"✅ Loading MT5 model from: {MODEL_PATH}")
-mt5_tokenizer = MT5Tokenizer.from_pretrained(MODEL_PATH)
-mt5_model = MT5ForConditionalGeneration.from_pretrained(MODEL_PATH).to(DEVICE)
-print(f"✅ MT5 model loaded successfully on {DEVICE}")
+MT5_QUANTIZE = os.getenv("MT5_QUANTIZE", "")
+
+# --- MT5 decoding profiles ---
+# Limits apply per sentence, so long inputs are no longer cut off
+DECODING_PROFILES = {
+    "fast": {
+        "num_beams": 1,
+        "do_sample": False,
+        "max_new_tokens": 128
+    },
+    "quality": {
+        "num_beams": 4,
+        "length_penalty": 1.0,
+        "early_stopping": True,
+        "max_new_tokens": 128
+    }
+}
+DEFAULT_PROFILE = os.getenv("MT5_DEFAULT_PROFILE", "quality")
+# Token streaming only works with greedy decoding
+STREAM_PROFILE = "fast"
+SENTENCE_BATCH_SIZE = int(os.getenv("MT5_SENTENCE_BATCH_SIZE", "16"))
+
+def _mt5_version(profile: str) -> str:
+    return f"{MODEL_PATH}|{MT5_QUANTIZE}|{profile}|{sorted(DECODING_PROFILES[profile].items())}"
+
+# One generation at a time; beam search already uses every core
+mt5_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="mt5")
+
+# --- Simplification cache ---
+_cache_ttl = float(os.getenv("SIMPLIFY_CACHE_TTL", "86400"))
+simplify_cache = LRUCache(
+    max_size=int(os.getenv("SIMPLIFY_CACHE_SIZE", "1024")),
+    ttl_seconds=_cache_ttl if _cache_ttl > 0 else None
+)
+simplify_flight = SingleFlight()
+
+class _StopOnEvent(StoppingCriteria):
+    """Ends generation early once the client has gone away."""
+
+    def __init__(self, event: threading.Event):
+        self.event = event
+
+    def __call__(self, input_ids, scores, **kwargs) -> bool:
+        return self.event.is_set()
+
+class MT5Simplifier:
+    """Local MT5 simplification model (CPU)."""
+
+    def __init__(self, model_path: str = MODEL_PATH):
+        print(f"✅ Loading MT5 model from: {model_path}")
+        # Prefer the Rust-backed fast tokenizer over the SentencePiece one
+        self.tokenizer = load_fast_tokenizer(model_path, slow_class=MT5Tokenizer)
+        self.tokens = TokenizationStage(self.tokenizer, "mt5", max_length=512)
+        self.model = MT5ForConditionalGeneration.from_pretrained(model_path).to(DEVICE)
+        if MT5_QUANTIZE == "int8":
+            self.model = quantize_torch_model(self.model)
+        self.model.eval()
+        print(f"✅ MT5 model loaded successfully on {DEVICE}")
+
+    def simplify(self, text: str, profile: str = DEFAULT_PROFILE) -> str:
+        """
+        Simplify text sentence by sentence with batched MT5 generation (blocking).
+
+        Args:
+            text (str): Text to simplify
+            profile (str): Name of a decoding profile in `DECODING_PROFILES`
+
+        Returns:
+            str: Simplified sentences joined with spaces
+        """
+        sentences = split_sentences(text) or [text]
+        encodings = self.tokens.encode_many(sentences)
+        # Group similar lengths together to keep padding small
+        order = sorted(range(len(sentences)), key=lambda i: len(encodings[i]))
+        outputs = [""] * len(sentences)
+
+        for start in range(0, len(order), SENTENCE_BATCH_SIZE):
+            batch = order[start:start + SENTENCE_BATCH_SIZE]
+            inputs = {
+                name: tensor.to(DEVICE)
+                for name, tensor in self.tokens.pad([encodings[i] for i in batch]).items()
+            }
+
+            with metrics.stage(f"mt5.generate.{profile}"), torch.no_grad():
+                generated_ids = self.model.generate(**inputs, **DECODING_PROFILES[profile])
+
+            with metrics.stage("mt5.decode"):
+                decoded = self.tokenizer.batch_decode(generated_ids, skip_special_tokens=True)
+            for i, simplified in zip(batch, decoded):
+                outputs[i] = simplified.strip()
+
+        return " ".join(output for output in outputs if output)
+
+    def stream(self, text: str, streamer: TextStreamer, stop: threading.Event):
+        """Run greedy generation sentence by sentence, pushing words to `streamer` (blocking)."""
+        for index, sentence in enumerate(split_sentences(text) or [text]):
+            if stop.is_set():
+                return
+            if index:
+                streamer.on_finalized_text(" ")
+
+            input_ids = self.tokens.pad([self.tokens.encode(sentence)])["input_ids"].to(DEVICE)
+
+            with torch.no_grad():
+                self.model.generate(
+                    input_ids=input_ids,
+                    streamer=streamer,
+                    stopping_criteria=StoppingCriteriaList([_StopOnEvent(stop)]),
+                    **DECODING_PROFILES[STREAM_PROFILE]
+                )
+
+# Loaded lazily or in the background, see utils/model_registry.py
+model_registry.register(
+    "mt5",
+    MT5Simplifier,
+    warmup=lambda simplifier: simplifier.simplify("Bu kısa bir deneme cümlesidir.", "fast")
+)
+
+def mt5_simplify(text: str, profile: str = DEFAULT_PROFILE) -> str:
+    """Simplify with the registered MT5 model (blocking)."""
+    simplifier = model_registry.get("mt5")
+    # Service time only: the router adds the queue in front separately
+    started = time.perf_counter()
+    ok = False
+    try:
+        simplified_text = simplifier.simplify(text, profile)
+        ok = True
+        return simplified_text
+    finally:
+        backend_router.observe("mt5", time.perf_counter() - started, ok)
+
+class _QueueStreamer(TextStreamer):
+    """Hands decoded words from the generation thread to an asyncio queue."""
+
+    def __init__(self, tokenizer, loop: asyncio.AbstractEventLoop, queue: asyncio.Queue):
+        super().__init__(tokenizer, skip_prompt=True, skip_special_tokens=True)
+        self.loop = loop
+        self.queue = queue
+
+    def on_finalized_text(self, text: str, stream_end: bool = False):
+        if text:
+            self.loop.call_soon_threadsafe(self.queue.put_nowait, text)
+
+def mt5_stream(simplifier: MT5Simplifier, text: str, streamer: TextStreamer, stop: threading.Event):
+    """Stream with the MT5 model (blocking); like `mt5_simplify`, reports to the router."""
+    started = time.perf_counter()
+    ok = False
+    try:
+        simplifier.stream(text, streamer, stop)
+        ok = True
+    finally:
+        # A stream cut short by the client is not a representative sample
+        if not stop.is_set():
+            backend_router.observe("mt5", time.perf_counter() - started, ok)
+
+async def _stream_mt5(text: str) -> AsyncIterator[str]:
+    global mt5_pending
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    stop = threading.Event()
+
+    simplifier = await model_registry.aget("mt5")
+    streamer = _QueueStreamer(simplifier.tokenizer, loop, queue)
+    mt5_pending += 1
+    generation = loop.run_in_executor(mt5_executor, mt5_stream, simplifier, text, streamer, stop)
+
+    def finished(_):
+        global mt5_pending
+        mt5_pending -= 1
+        queue.put_nowait(None)
+
+    generation.add_done_callback(finished)
+    try:
+        while True:
+            piece = await queue.get()
+            if piece is None:
+                break
+            yield piece
+        await generation  # surface generation errors
+    finally:
+        stop.set()
+
+async def _stream_openai(text: str) -> AsyncIterator[str]:
+    with backend_router.track_openai():
+        async for piece in openai_client.stream_simplify_text(text):
+            yield piece
+
+def _method_version(method: str, profile: str = DEFAULT_PROFILE) -> str:
+    if method == "openai":
+        return f"{openai_client.model}|{openai_client.prompt_version}"
+    return _mt5_version(profile)
+
+# MT5 jobs submitted to mt5_executor and not finished yet
+mt5_pending = 0
+
+async def _compute_simplification(text: str, method: str, profile: str = DEFAULT_PROFILE) -> str:
+    global mt5_pending
+    if method == "openai":
+        # OpenAI API
+        with metrics.stage("simplify.openai"), backend_router.track_openai():
+            return await openai_client.simplify_text(text)
+
+    # Local MT5 model (CPU), off the event loop; includes time queued behind other jobs
+    loop = asyncio.get_running_loop()
+    mt5_pending += 1
+    try:
+        with metrics.stage("simplify.mt5"):
+            return await loop.run_in_executor(mt5_executor, mt5_simplify, text, profile)
+    finally:
+        mt5_pending -= 1
+
+def mt5_queue_depth() -> int:
+    """MT5 simplifications running or waiting for the MT5 worker thread."""
+    return mt5_pending
+
+# --- Automatic routing ---
+backend_router = SimplifyRouter(
+    mt5_queue_depth=mt5_queue_depth,
+    mt5_available=lambda: model_registry.status("mt5") != "failed"
+)
+# Start MT5 as well when OpenAI has not answered within this (0 disables hedging)
+HEDGE_DELAY = float(os.getenv("AUTO_HEDGE_MS", "0")) / 1000
+# Hedge only while at most this many MT5 jobs are queued (0: only when MT5 is idle)
+HEDGE_MAX_MT5_QUEUE = int(os.getenv("AUTO_HEDGE_MAX_MT5_QUEUE", "0"))
+
+async def cached_simplify(text: str, method: str, profile: str = DEFAULT_PROFILE) -> str:
+    """
+    Simplify text, reusing cached results and in-flight computations.
+
+    Args:
+        text (str): Text to simplify
+        method (str): "openai" or "mt5"
+        profile (str): MT5 decoding profile, ignored for OpenAI
+
+    Returns:
+        str: Simplified text
+    """
+    key = content_key(text, method, _method_version(method, profile))
+    simplified_text = simplify_cache.get(key)
+    if simplified_text is not None:
+        return simplified_text
+
+    async def compute():
+        result = await _compute_simplification(text, method, profile)
+        simplify_cache.set(key, result)
+        return result
+
+    return await simplify_flight.do(key, compute)
+
+def _route(method: str, reason: str, hedged: bool = False) -> dict:
+    """Routing decision of an `auto` request, as stored with its history entry."""
+    backend_router.count(method, reason)
+    return {"requested": "auto", "method": method, "reason": reason, "hedged": hedged}
+
+async def auto_simplify(text: str, profile: str = DEFAULT_PROFILE) -> Tuple[str, dict]:
+    """
+    Simplify with whichever backend is expected to answer first.
+
+    A cached result of either backend is returned at once. Otherwise
+    `backend_router` picks OpenAI or MT5. OpenAI gets at most
+    AUTO_OPENAI_TIMEOUT seconds; if it fails or times out, MT5 takes over.
+    With AUTO_HEDGE_MS set and MT5 idle, MT5 also starts when OpenAI is
+    slower than that, and the first result wins. Abandoned calls keep
+    running in the background, so their results are still cached and
+    still teach the router.
+
+    Args:
+        text (str): Text to simplify
+        profile (str): MT5 decoding profile
+
+    Returns:
+        Tuple[str, dict]: Simplified text and the routing decision (see `_route`)
+    """
+    for method in ("openai", "mt5"):
+        key = content_key(text, method, _method_version(method, profile))
+        # Peek first: only the lookup that serves the request (here or in cached_simplify) counts
+        cached = simplify_cache.peek(key)
+        if cached is not None:
+            return simplify_cache.get(key, cached), _route(method, "cache")
+
+    method, reason = backend_router.choose()
+    if method == "mt5":
+        return await cached_simplify(text, "mt5", profile), _route("mt5", reason)
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + OPENAI_TIMEOUT
+    candidates = {asyncio.ensure_future(cached_simplify(text, "openai", profile)): "openai"}
+    hedged = False
+    try:
+        if HEDGE_DELAY > 0:
+            done, _ = await asyncio.wait(candidates, timeout=HEDGE_DELAY)
+            if not done and mt5_queue_depth() <= HEDGE_MAX_MT5_QUEUE and backend_router.mt5_available():
+                hedged = True
+                candidates[asyncio.ensure_future(cached_simplify(text, "mt5", profile))] = "mt5"
+
+        pending = set(candidates)
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, timeout=max(0.0, deadline - loop.time()), return_when=asyncio.FIRST_COMPLETED
+            )
+            if not done:
+                break
+            for task in done:
+                if task.exception() is None:
+                    winner = candidates[task]
+                    return task.result(), _route(winner, reason if winner == "openai" else "hedge", hedged)
+    finally:
+        for task in candidates:
+            task.cancel()
+
+    if not backend_router.mt5_available():
+        raise HTTPException(status_code=504, detail="OpenAI failed or timed out and MT5 is unavailable")
+    # Joins the hedged MT5 run if there is one
+    return await cached_simplify(text, "mt5", profile), _route("mt5", "failover", hedged)
+
+async def simplify_any(text: str, method: str, profile: str = DEFAULT_PROFILE) -> Tuple[str, Optional[dict]]:
+    """
+    Simplify with `method`, which may be "auto".
+
+    Returns:
+        Tuple[str, Optional[dict]]: Simplified text and the routing decision (None unless "auto")
+    """
+    if method == "auto":
+        return await auto_simplify(text, profile)
+    return await cached_simplify(text, method, profile), None
+
+def _history_record(username: str, original_text: str, simplified_text: str, method: str, route: Optional[dict] = None) -> dict:
+    record = {
+        "user_id": username,
+        "original_text": original_text,
+        "simplified_text": simplified_text,
+        "method": method,
+        "created_at": datetime.utcnow()
+    }
+    if route is not None:
+        record["route"] = route
+    return record
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+async def _stream_simplification(text: str, method: str, username: str, route: Optional[dict] = None) -> AsyncIterator[str]:
+    key = content_key(text, method, _method_version(method, STREAM_PROFILE))
+    simplified_text = simplify_cache.get(key)
+
+    try:
+        if simplified_text is not None:
+            yield _sse("token", {"text": simplified_text})
+        else:
+            if method == "openai":
+                pieces_source = _stream_openai(text)
+            else:
+                pieces_source = _stream_mt5(text)
+
+            pieces = []
+            async for piece in pieces_source:
+                pieces.append(piece)
+                yield _sse("token", {"text": piece})
+            simplified_text = "".join(pieces).strip()
+            simplify_cache.set(key, simplified_text)
+
+    except HTTPException as e:
+        yield _sse("error", {"detail": e.detail})
+        return
+    except Exception as e:
+        print(f"❌ Error: {str(e)}")
+        yield _sse("error", {"detail": f"Failed to simplify text: {str(e)}"})
+        return
+
+    history_writer.add("simplify_history", _history_record(username, text, simplified_text, method, route))
+    yield _sse("done", {"simplified": simplified_text, "method": method})
 
 # --- Request/Response models ---
 class TextRequest(BaseModel):
@@ -36,24 +421,31 @@ class TextRequest(BaseModel):
 
 class SimplifiedText(BaseModel):
     simplified: str
+    method: Optional[str] = None
 
 # --- API Route ---
 @router.post("/", response_model=SimplifiedText)
 async def simplify_text(
     request: TextRequest,
-    method: str = Query("openai", enum=["openai", "mt5"]),
+    method: str = Query("openai", enum=["openai", "mt5", "auto"]),
+    profile: str = Query(DEFAULT_PROFILE, enum=list(DECODING_PROFILES)),
     current_user: dict = Depends(get_current_active_user)
 ):
     """
     Simplify Turkish text using OpenAI's API or local MT5 model.
 
+    With method "auto" the backend is chosen per request by observed
+    latency, error rate and MT5 queue depth (see `auto_simplify`), and the
+    routing decision is saved with the history entry.
+
     Args:
         request (TextRequest): Request containing the text to simplify
-        method (str): Simplification method ("openai" or "mt5")
+        method (str): Simplification method ("openai", "mt5" or "auto")
+        profile (str): MT5 decoding profile ("fast" greedy or "quality" beam search)
         current_user (dict): Current authenticated user
 
     Returns:
-        SimplifiedText: Response containing the simplified text
+        SimplifiedText: Response containing the simplified text and the method used
 
     Raises:
         HTTPException: If simplification fails
@@ -61,40 +453,22 @@ async def simplify_text(
     try:
         print(f"👉 [INFO] Simplification method: {method}")
 
-        if method == "openai":
-            # OpenAI API
-            simplified_text = await openai_client.simplify_text(request.text)
-
-        elif method == "mt5":
-            # Local MT5 model (CPU)
-            input_ids = mt5_tokenizer.encode(
-                request.text, return_tensors="pt", truncation=True, max_length=512
-            ).to(DEVICE)
-
-            with torch.no_grad():
-                generated_ids = mt5_model.generate(
-                    input_ids=input_ids,
-                    num_beams=4,
-                    length_penalty=1.0,
-                    max_length=128,
-                    early_stopping=True
-                )
-            simplified_text = mt5_tokenizer.decode(generated_ids[0], skip_special_tokens=True)
-
-        else:
+        if method not in ("openai", "mt5", "auto"):
             raise HTTPException(status_code=400, detail="Invalid method")
+        if profile not in DECODING_PROFILES:
+            raise HTTPException(status_code=400, detail="Invalid profile")
 
-        # ✅ Mongo kayıt BURAYA eklenir
-        record = {
-            "user_id": current_user.get("sub"),  # auth.py'den gelen user id
-            "original_text": request.text,
-            "simplified_text": simplified_text,
-            "method": method,
-            "created_at": datetime.utcnow()
-        }
-        await db.simplify_history.insert_one(record)
+        simplified_text, route = await simplify_any(request.text, method, profile)
+        if route is not None:
+            method = route["method"]
 
-        return SimplifiedText(simplified=simplified_text)
+        # ✅ Mongo kayıt arka planda toplu yazılır
+        history_writer.add(
+            "simplify_history",
+            _history_record(current_user["username"], request.text, simplified_text, method, route)
+        )
+
+        return SimplifiedText(simplified=simplified_text, method=method)
 
     except HTTPException as e:
         raise e
@@ -104,3 +478,62 @@ async def simplify_text(
             status_code=500,
             detail=f"Failed to simplify text: {str(e)}"
         )
+
+@router.post("/stream")
+async def simplify_text_stream(
+    request: TextRequest,
+    method: str = Query("openai", enum=["openai", "mt5", "auto"]),
+    current_user: dict = Depends(get_current_active_user)
+):
+    """
+    Simplify Turkish text and stream the output as server-sent events.
+
+    Emits `token` events with partial text as it is generated, then a single
+    `done` event with the full simplified text (or an `error` event). The MT5
+    path uses greedy decoding so words can be emitted as they are produced.
+    With "auto" the backend is chosen once up front; streams are not hedged.
+
+    Args:
+        request (TextRequest): Request containing the text to simplify
+        method (str): Simplification method ("openai", "mt5" or "auto")
+        current_user (dict): Current authenticated user
+
+    Returns:
+        StreamingResponse: `text/event-stream` response
+
+    Raises:
+        HTTPException: If the method is invalid
+    """
+    if method not in ("openai", "mt5", "auto"):
+        raise HTTPException(status_code=400, detail="Invalid method")
+
+    route = None
+    if method == "auto":
+        method, reason = backend_router.choose()
+        route = _route(method, reason)
+
+    return StreamingResponse(
+        _stream_simplification(request.text, method, current_user["username"], route),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/cache")
+async def simplify_cache_stats(current_user: dict = Depends(get_current_active_admin)):
+    """
+    Report simplification cache and in-flight deduplication counters.
+    Only accessible by admin users.
+    """
+    return {
+        "cache": simplify_cache.stats(),
+        "single_flight": simplify_flight.stats()
+    }
+
+@router.get("/routing")
+async def simplify_routing_stats(current_user: dict = Depends(get_current_active_admin)):
+    """
+    Report the `auto` router state: breaker, backend latency and error
+    EWMAs, MT5 queue depth and route counts.
+    Only accessible by admin users.
+    """
+    return backend_router.stats()
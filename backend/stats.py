@@ -3,31 +3,471 @@ Admin-only statistics functionality from user history.
 """
 
 from database import db
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from typing import Dict, Optional, List
-from statistics import mean
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel
+from pymongo import DeleteOne, InsertOne, UpdateOne
 from auth import get_current_active_admin  # Yalnızca admin erişimi
+from utils.history_writer import history_writer
+from retention import archived_day_summaries, chunk_entries, day_summaries
 
 router = APIRouter()
 
 # --- Pydantic Response Model ---
+class HistogramBucket(BaseModel):
+    start: datetime
+    total_texts: int
+    label_counts: Dict[str, int]
+    average_score: float
+
 class StatsResponse(BaseModel):
     total_texts: int
     label_counts: Dict[str, int]
     average_score: float
     last_analysis: Optional[datetime]
+    histogram: Optional[List[HistogramBucket]] = None
+
+def _label_count(label: str) -> dict:
+    return {"$sum": {"$cond": [{"$eq": ["$label", label]}, 1, 0]}}
+
+def _score_sums() -> dict:
+    # Sums rather than $avg, so archived counters can be added in
+    return {
+        "score_sum": {"$sum": "$score"},
+        "score_count": {"$sum": {"$cond": [{"$isNumber": "$score"}, 1, 0]}}
+    }
+
+def build_statistics_pipeline(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    user: Optional[str] = None,
+    bucket: Optional[str] = None
+) -> List[dict]:
+    """
+    Build the aggregation computing `StatsResponse` fields inside Mongo.
+
+    Args:
+        start (Optional[datetime]): Inclusive lower bound on `timestamp`
+        end (Optional[datetime]): Exclusive upper bound on `timestamp`
+        user (Optional[str]): Only count this user's predictions
+        bucket (Optional[str]): "day" or "week" to add a histogram
+
+    Returns:
+        List[dict]: Aggregation pipeline producing a single document
+    """
+    match: dict = {}
+    if start or end:
+        match["timestamp"] = {}
+        if start:
+            match["timestamp"]["$gte"] = start
+        if end:
+            match["timestamp"]["$lt"] = end
+    if user:
+        match["user"] = user
+
+    facets = {
+        "totals": [{
+            "$group": {
+                "_id": None,
+                "total_texts": {"$sum": 1},
+                "easy": _label_count("Easy"),
+                "difficult": _label_count("Difficult"),
+                **_score_sums(),
+                "last_analysis": {"$max": "$timestamp"}
+            }
+        }]
+    }
+    if bucket:
+        truncate = {"date": "$timestamp", "unit": bucket}
+        if bucket == "week":
+            truncate["startOfWeek"] = "monday"
+        facets["histogram"] = [
+            # Early entries stored the timestamp as a string
+            {"$match": {"timestamp": {"$type": "date"}}},
+            {"$group": {
+                "_id": {"$dateTrunc": truncate},
+                "total_texts": {"$sum": 1},
+                "easy": _label_count("Easy"),
+                "difficult": _label_count("Difficult"),
+                **_score_sums()
+            }},
+            {"$sort": {"_id": 1}}
+        ]
+
+    pipeline = [{"$match": match}] if match else []
+    pipeline.append({"$facet": facets})
+    return pipeline
+
+# --- Rollups ---
+# stats_rollups holds pre-aggregated counters, updated on every saved prediction:
+#   {_id: "global"}, {_id: "user:<username>"}, {_id: "day:<YYYY-MM-DD>"}
+# They are only read once `scripts.rebuild_rollups` has backfilled them
+# (marked by the {_id: "meta"} document).
+ROLLUP_COUNTERS = ("total_texts", "easy", "difficult", "score_sum", "score_count")
+
+ROLLUP_GROUP = {
+    "total_texts": {"$sum": 1},
+    "easy": _label_count("Easy"),
+    "difficult": _label_count("Difficult"),
+    **_score_sums()
+}
+
+_rollups_ready = False
+
+def _day(timestamp: datetime) -> datetime:
+    return datetime(timestamp.year, timestamp.month, timestamp.day)
+
+def _rollup_targets(doc: dict) -> List[tuple]:
+    targets = [("global", {"scope": "global"})]
+    if doc.get("user"):
+        targets.append((f"user:{doc['user']}", {"scope": "user", "user": doc["user"]}))
+    timestamp = doc.get("timestamp")
+    if isinstance(timestamp, datetime):
+        day = _day(timestamp)
+        targets.append((f"day:{day:%Y-%m-%d}", {"scope": "day", "day": day}))
+    return targets
+
+def rollup_updates(docs: List[dict]) -> List[UpdateOne]:
+    """
+    Turn a batch of new predictions into one `$inc`/`$max` upsert per rollup.
+
+    Args:
+        docs (List[dict]): prediction_history documents
+
+    Returns:
+        List[UpdateOne]: Updates for the stats_rollups collection
+    """
+    increments: Dict[str, dict] = {}
+    fields: Dict[str, dict] = {}
+    latest: Dict[str, datetime] = {}
+
+    for doc in docs:
+        for key, key_fields in _rollup_targets(doc):
+            counters = increments.setdefault(key, dict.fromkeys(ROLLUP_COUNTERS, 0))
+            fields[key] = key_fields
+
+            counters["total_texts"] += 1
+            if doc.get("label") == "Easy":
+                counters["easy"] += 1
+            elif doc.get("label") == "Difficult":
+                counters["difficult"] += 1
+            if isinstance(doc.get("score"), (int, float)):
+                counters["score_sum"] += doc["score"]
+                counters["score_count"] += 1
+
+            timestamp = doc.get("timestamp")
+            if isinstance(timestamp, datetime) and (key not in latest or timestamp > latest[key]):
+                latest[key] = timestamp
+
+    updates = []
+    for key, counters in increments.items():
+        update = {"$inc": counters, "$setOnInsert": fields[key]}
+        if key in latest:
+            update["$max"] = {"last_analysis": latest[key]}
+        updates.append(UpdateOne({"_id": key}, update, upsert=True))
+    return updates
+
+async def update_rollups(docs: List[dict]):
+    """Apply newly saved predictions to the rollups."""
+    updates = rollup_updates(docs)
+    if updates:
+        await db.stats_rollups.bulk_write(updates, ordered=False)
+
+# Every prediction written through the history buffer updates the rollups
+history_writer.on_write("prediction_history", update_rollups)
+
+async def remove_user_from_rollups(username: str):
+    """
+    Subtract a user's predictions, hot and archived, from the rollups
+    before they are deleted.
+
+    `last_analysis` is a running maximum and is not rolled back.
+    """
+    groups = await db.prediction_history.aggregate([
+        {"$match": {"user": username}},
+        {"$group": {
+            "_id": {"$cond": [
+                {"$eq": [{"$type": "$timestamp"}, "date"]},
+                {"$dateTrunc": {"date": "$timestamp", "unit": "day"}},
+                None
+            ]},
+            **ROLLUP_GROUP
+        }}
+    ]).to_list(length=None)
+    async for chunk in archived_day_summaries(username):
+        groups.extend({"_id": day["day"], **day} for day in chunk["days"])
+    if not groups:
+        return
+
+    total = dict.fromkeys(ROLLUP_COUNTERS, 0)
+    updates = [DeleteOne({"_id": f"user:{username}"})]
+    for group in groups:
+        negated = {field: -group[field] for field in ROLLUP_COUNTERS}
+        for field in ROLLUP_COUNTERS:
+            total[field] += group[field]
+        if group["_id"] is not None:
+            updates.append(UpdateOne({"_id": f"day:{group['_id']:%Y-%m-%d}"}, {"$inc": negated}))
+    updates.append(UpdateOne({"_id": "global"}, {"$inc": {field: -value for field, value in total.items()}}))
+    await db.stats_rollups.bulk_write(updates, ordered=False)
+
+def archived_rollup_updates(chunk: dict) -> List[UpdateOne]:
+    """Upserts adding one archive chunk's per-day summaries to the rollups."""
+    total = dict.fromkeys(ROLLUP_COUNTERS, 0)
+    updates = []
+    for day in chunk["days"]:
+        counters = {field: day[field] for field in ROLLUP_COUNTERS}
+        for field in ROLLUP_COUNTERS:
+            total[field] += counters[field]
+        if day["day"] is not None:
+            updates.append(UpdateOne(
+                {"_id": f"day:{day['day']:%Y-%m-%d}"},
+                {"$inc": counters, "$setOnInsert": {"scope": "day", "day": day["day"]}},
+                upsert=True
+            ))
+
+    targets = [("global", {"scope": "global"})]
+    if chunk.get("user"):
+        targets.append((f"user:{chunk['user']}", {"scope": "user", "user": chunk["user"]}))
+    for key, fields in targets:
+        updates.append(UpdateOne(
+            {"_id": key},
+            {"$inc": total, "$setOnInsert": fields, "$max": {"last_analysis": chunk["last"]}},
+            upsert=True
+        ))
+    return updates
+
+async def rebuild_rollups() -> Dict[str, int]:
+    """
+    Recompute every rollup from prediction_history and the per-day
+    summaries stored with archived predictions (backfill / repair).
+
+    The rollups are built in a separate collection from the predictions
+    saved before a high-water time, then renamed over stats_rollups in one
+    step, so readers never see a half-built set and live `$inc` upserts
+    cannot collide with it. Predictions saved between the high-water time
+    and the swap are added afterwards. Ones saved within about a history
+    flush interval of the swap may still be counted twice or missed; pause
+    writes during a rebuild when the counters must be exact.
+
+    Returns:
+        Dict[str, int]: Number of rollup documents written per scope
+    """
+    high_water = datetime.utcnow()
+    # Early entries stored the timestamp as a string; they can only predate the rebuild
+    before = {"$or": [{"timestamp": {"$lt": high_water}}, {"timestamp": {"$not": {"$type": "date"}}}]}
+    group = {**ROLLUP_GROUP, "last_analysis": {"$max": "$timestamp"}}
+    scopes = {
+        "global": [{"$match": before}, {"$group": {"_id": None, **group}}],
+        "user": [{"$match": before}, {"$group": {"_id": "$user", **group}}],
+        "day": [
+            {"$match": {"timestamp": {"$type": "date", "$lt": high_water}}},
+            {"$group": {"_id": {"$dateTrunc": {"date": "$timestamp", "unit": "day"}}, **group}}
+        ]
+    }
+
+    rebuild = db.stats_rollups_rebuild
+    await rebuild.drop()
+    await rebuild.create_index([("scope", 1), ("day", 1)])
+
+    counts = {}
+    for scope, pipeline in scopes.items():
+        batch = []
+        counts[scope] = 0
+        async for row in db.prediction_history.aggregate(pipeline, allowDiskUse=True):
+            doc = {field: row[field] for field in (*ROLLUP_COUNTERS, "last_analysis")}
+            doc["scope"] = scope
+            if scope == "global":
+                doc["_id"] = "global"
+            elif scope == "user":
+                if not row["_id"]:
+                    continue
+                doc.update(_id=f"user:{row['_id']}", user=row["_id"])
+            else:
+                doc.update(_id=f"day:{row['_id']:%Y-%m-%d}", day=row["_id"])
+            batch.append(InsertOne(doc))
+            if len(batch) >= 1000:
+                await rebuild.bulk_write(batch, ordered=False)
+                counts[scope] += len(batch)
+                batch = []
+        if batch:
+            await rebuild.bulk_write(batch, ordered=False)
+            counts[scope] += len(batch)
+
+    counts["archived_chunks"] = 0
+    async for chunk in archived_day_summaries():
+        updates = archived_rollup_updates(chunk)
+        if updates:
+            await rebuild.bulk_write(updates, ordered=False)
+        counts["archived_chunks"] += 1
+
+    await rebuild.insert_one({"_id": "meta", "scope": "meta", "rebuilt_at": datetime.utcnow()})
+
+    swapped_at = datetime.utcnow()
+    await rebuild.rename("stats_rollups", dropTarget=True)
+
+    # Predictions saved during the rebuild were counted into the replaced collection
+    counts["caught_up"] = 0
+    late = db.prediction_history.find({"timestamp": {"$gte": high_water, "$lt": swapped_at}})
+    while True:
+        docs = await late.to_list(length=1000)
+        if not docs:
+            break
+        await update_rollups(docs)
+        counts["caught_up"] += len(docs)
+    return counts
+
+async def ensure_rollup_indexes():
+    await db.stats_rollups.create_index([("scope", 1), ("day", 1)])
+
+def _totals(doc: dict) -> dict:
+    score_count = doc.get("score_count", 0)
+    return {
+        "total_texts": doc.get("total_texts", 0),
+        "label_counts": {"Easy": doc.get("easy", 0), "Difficult": doc.get("difficult", 0)},
+        "average_score": doc.get("score_sum", 0) / score_count if score_count else 0.0
+    }
+
+def _is_midnight(value: Optional[datetime]) -> bool:
+    return value is None or value == _day(value)
+
+def _bucket_start(day: datetime, bucket: str) -> datetime:
+    return day if bucket == "day" else day - timedelta(days=day.weekday())
+
+def _add_counters(counters: dict, values: dict):
+    for field in ROLLUP_COUNTERS:
+        counters[field] += values.get(field, 0)
+
+async def statistics_from_rollups(
+    start: Optional[datetime],
+    end: Optional[datetime],
+    user: Optional[str],
+    bucket: Optional[str]
+) -> Optional[StatsResponse]:
+    """
+    Answer from the rollups, or return None if they cannot serve this query.
+
+    Unfiltered and per-user totals are a single document read; day-aligned
+    date ranges and histograms read one document per day.
+    """
+    global _rollups_ready
+    if not _rollups_ready:
+        _rollups_ready = await db.stats_rollups.find_one({"_id": "meta"}) is not None
+        if not _rollups_ready:
+            return None
+
+    if not (start or end or bucket):
+        doc = await db.stats_rollups.find_one({"_id": f"user:{user}" if user else "global"}) or {}
+        return StatsResponse(**_totals(doc), last_analysis=doc.get("last_analysis"))
+
+    # Per-user rollups have no daily breakdown, and ranges must fall on day boundaries
+    if user or not (_is_midnight(start) and _is_midnight(end)):
+        return None
+
+    query: dict = {"scope": "day"}
+    if start or end:
+        query["day"] = {}
+        if start:
+            query["day"]["$gte"] = start
+        if end:
+            query["day"]["$lt"] = end
+
+    total = dict.fromkeys(ROLLUP_COUNTERS, 0)
+    buckets: Dict[datetime, dict] = {}
+    last_analysis = None
+    async for day in db.stats_rollups.find(query).sort("day", 1):
+        _add_counters(total, day)
+        if day.get("last_analysis") and (last_analysis is None or day["last_analysis"] > last_analysis):
+            last_analysis = day["last_analysis"]
+        if bucket:
+            _add_counters(buckets.setdefault(_bucket_start(day["day"], bucket), dict.fromkeys(ROLLUP_COUNTERS, 0)), day)
+
+    histogram = None
+    if bucket:
+        histogram = [
+            HistogramBucket(start=bucket_start, **_totals(counters))
+            for bucket_start, counters in sorted(buckets.items())
+        ]
+    return StatsResponse(**_totals(total), last_analysis=last_analysis, histogram=histogram)
+
+async def add_archived_statistics(
+    total: dict,
+    buckets: Dict[datetime, dict],
+    start: Optional[datetime],
+    end: Optional[datetime],
+    user: Optional[str],
+    bucket: Optional[str]
+) -> Optional[datetime]:
+    """
+    Add archived predictions to counters computed from prediction_history.
+
+    Chunks wholly inside the range contribute their per-day summaries; the
+    few a range boundary cuts through are decompressed and counted entry
+    by entry, so the result is exact.
+
+    Args:
+        total (dict): `ROLLUP_COUNTERS` totals, updated in place
+        buckets (Dict[datetime, dict]): Histogram counters by bucket start, updated in place
+        start (Optional[datetime]): Inclusive lower bound on the prediction time
+        end (Optional[datetime]): Exclusive upper bound on the prediction time
+        user (Optional[str]): Restrict to one user
+        bucket (Optional[str]): Histogram granularity ("day" or "week")
+
+    Returns:
+        Optional[datetime]: Latest archived prediction time in the range
+    """
+    # Mongo returns naive UTC datetimes, while query parameters may carry a timezone
+    start, end = (
+        value.astimezone(timezone.utc).replace(tzinfo=None) if value is not None and value.tzinfo else value
+        for value in (start, end)
+    )
+    last_analysis = None
+    async for chunk in archived_day_summaries(user, start, end):
+        if (start is None or chunk["first"] >= start) and (end is None or chunk["last"] < end):
+            days = chunk["days"]
+            latest = chunk["last"]
+        else:
+            entries = [
+                entry for entry in await chunk_entries(chunk["_id"])
+                if (start is None or entry["timestamp"] >= start) and (end is None or entry["timestamp"] < end)
+            ]
+            if not entries:
+                continue
+            days = day_summaries(entries, "timestamp")
+            latest = max(entry["timestamp"] for entry in entries)
+
+        for day in days:
+            _add_counters(total, day)
+            if bucket and day["day"] is not None:
+                _add_counters(buckets.setdefault(_bucket_start(day["day"], bucket), dict.fromkeys(ROLLUP_COUNTERS, 0)), day)
+        if last_analysis is None or latest > last_analysis:
+            last_analysis = latest
+    return last_analysis
 
 # --- Statistics Endpoint ---
 @router.get("/", response_model=StatsResponse)
-async def get_statistics(current_user: dict = Depends(get_current_active_admin)):
+async def get_statistics(
+    start: Optional[datetime] = Query(None, description="Only count predictions from this time on"),
+    end: Optional[datetime] = Query(None, description="Only count predictions before this time"),
+    user: Optional[str] = Query(None, description="Only count this user's predictions"),
+    bucket: Optional[str] = Query(None, enum=["day", "week"], description="Add a histogram per day or week"),
+    current_user: dict = Depends(get_current_active_admin)
+):
     """
     Get global statistics about all user predictions.
     Only accessible by admin users.
 
+    Served from the stats_rollups counters when they can answer the query,
+    otherwise computed by a Mongo aggregation plus the per-day summaries
+    of archived predictions, so both paths cover the whole history. The
+    API process never holds the history itself, only counters.
+
     Args:
+        start (Optional[datetime]): Inclusive lower bound on the prediction time
+        end (Optional[datetime]): Exclusive upper bound on the prediction time
+        user (Optional[str]): Restrict to one user
+        bucket (Optional[str]): Histogram granularity ("day" or "week")
         current_user (dict): Current authenticated admin user
 
     Returns:
@@ -37,41 +477,36 @@ async def get_statistics(current_user: dict = Depends(get_current_active_admin))
         HTTPException: If any DB error occurs
     """
     try:
-        # Load all prediction entries from Mongo
-        cursor = db.prediction_history.find({})
-        entries = []
-        async for doc in cursor:
-            entries.append(doc)
-
-        total_texts = len(entries)
-
-        # Count labels
-        label_counts = {
-            "Easy": sum(1 for e in entries if e.get("label") == "Easy"),
-            "Difficult": sum(1 for e in entries if e.get("label") == "Difficult")
-        }
-
-        # Average score
-        scores = [e.get("score", 0) for e in entries if "score" in e]
-        average_score = mean(scores) if scores else 0.0
-
-        # Last analysis timestamp
-        last_analysis = None
-        if entries:
-            # Get latest based on timestamp field
-            last_entry = max(
-                entries,
-                key=lambda x: x.get("timestamp", datetime.min)
-            )
-            last_analysis = last_entry.get("timestamp")
-
-        return StatsResponse(
-            total_texts=total_texts,
-            label_counts=label_counts,
-            average_score=average_score,
-            last_analysis=last_analysis
+        from_rollups = await statistics_from_rollups(start, end, user, bucket)
+        if from_rollups is not None:
+            return from_rollups
+
+        pipeline = build_statistics_pipeline(start, end, user, bucket)
+        result = await db.prediction_history.aggregate(pipeline).to_list(length=1)
+        facets = result[0] if result else {}
+
+        hot = (facets.get("totals") or [{}])[0]
+        total = dict.fromkeys(ROLLUP_COUNTERS, 0)
+        _add_counters(total, hot)
+        buckets: Dict[datetime, dict] = {}
+        for entry in facets.get("histogram", []):
+            _add_counters(buckets.setdefault(entry["_id"], dict.fromkeys(ROLLUP_COUNTERS, 0)), entry)
+
+        # Entries older than HISTORY_HOT_DAYS only exist in history_archive
+        archived_last = await add_archived_statistics(total, buckets, start, end, user, bucket)
+        last_analysis = max(
+            (value for value in (hot.get("last_analysis"), archived_last) if isinstance(value, datetime)),
+            default=hot.get("last_analysis")
         )
 
+        histogram = None
+        if bucket:
+            histogram = [
+                HistogramBucket(start=bucket_start, **_totals(counters))
+                for bucket_start, counters in sorted(buckets.items())
+            ]
+        return StatsResponse(**_totals(total), last_analysis=last_analysis, histogram=histogram)
+
     except Exception as e:
         raise HTTPException(
             status_code=500,
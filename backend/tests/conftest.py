@@ -0,0 +1,8 @@
+import os
+import sys
+
+# Tests import the backend modules the way main.py does (`from utils.cache import ...`)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Importing auth (via history) requires a signing key; nothing here talks to Mongo
+os.environ.setdefault("SECRET_KEY", "test-secret")
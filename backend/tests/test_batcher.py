@@ -0,0 +1,76 @@
+import asyncio
+import threading
+
+from utils.batcher import MicroBatcher
+
+
+class RecordingBatchFn:
+    def __init__(self):
+        self.batches = []
+        self.lock = threading.Lock()
+
+    def __call__(self, items):
+        with self.lock:
+            self.batches.append(list(items))
+        return [item * 2 for item in items]
+
+
+def run_with(batcher: MicroBatcher, coroutine):
+    async def scenario():
+        try:
+            return await coroutine
+        finally:
+            batcher.shutdown()
+    return asyncio.run(scenario())
+
+
+def test_full_batch_runs_without_waiting_for_the_timeout():
+    batch_fn = RecordingBatchFn()
+    batcher = MicroBatcher(batch_fn, max_batch_size=3, max_wait_ms=10_000)
+
+    async def submit_all():
+        return await asyncio.wait_for(asyncio.gather(*(batcher.submit(i) for i in range(3))), 2)
+
+    assert run_with(batcher, submit_all()) == [0, 2, 4]
+    assert batch_fn.batches == [[0, 1, 2]]
+
+
+def test_partial_batch_runs_after_max_wait():
+    batch_fn = RecordingBatchFn()
+    batcher = MicroBatcher(batch_fn, max_batch_size=10, max_wait_ms=20)
+
+    async def submit_two():
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        results = await asyncio.wait_for(asyncio.gather(batcher.submit(1), batcher.submit(2)), 2)
+        return results, loop.time() - started
+
+    results, waited = run_with(batcher, submit_two())
+    assert results == [2, 4]
+    assert batch_fn.batches == [[1, 2]]
+    assert waited >= 0.015
+
+
+def test_oversized_burst_is_split_into_batches():
+    batch_fn = RecordingBatchFn()
+    batcher = MicroBatcher(batch_fn, max_batch_size=2, max_wait_ms=10)
+
+    async def submit_five():
+        return await asyncio.wait_for(asyncio.gather(*(batcher.submit(i) for i in range(5))), 2)
+
+    assert run_with(batcher, submit_five()) == [0, 2, 4, 6, 8]
+    assert all(len(batch) <= 2 for batch in batch_fn.batches)
+    assert sorted(item for batch in batch_fn.batches for item in batch) == [0, 1, 2, 3, 4]
+
+
+def test_batch_error_reaches_every_caller():
+    def failing(items):
+        raise ValueError("bad batch")
+
+    batcher = MicroBatcher(failing, max_batch_size=2, max_wait_ms=5)
+
+    async def submit_two():
+        return await asyncio.gather(batcher.submit(1), batcher.submit(2), return_exceptions=True)
+
+    results = run_with(batcher, submit_two())
+    assert all(isinstance(result, ValueError) for result in results)
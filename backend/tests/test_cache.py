@@ -0,0 +1,113 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from utils import cache
+from utils.cache import LRUCache, SingleFlight
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = SimpleNamespace(value=1000.0)
+    monkeypatch.setattr(cache, "time", SimpleNamespace(monotonic=lambda: now.value))
+    return now
+
+
+def test_lru_evicts_least_recently_used():
+    lru = LRUCache(max_size=2)
+    lru.set("a", 1)
+    lru.set("b", 2)
+    assert lru.get("a") == 1  # "b" is now the oldest
+    lru.set("c", 3)
+    assert lru.get("b") is None
+    assert lru.get("a") == 1
+    assert lru.get("c") == 3
+    assert lru.stats()["evictions"] == 1
+
+
+def test_lru_expires_entries_after_ttl(clock):
+    lru = LRUCache(max_size=10, ttl_seconds=5)
+    lru.set("a", 1)
+    lru.set("b", 2, ttl_seconds=60)
+    clock.value += 4
+    assert lru.get("a") == 1
+    clock.value += 2
+    assert lru.get("a", "gone") == "gone"
+    assert lru.get("b") == 2
+    stats = lru.stats()
+    assert stats["expirations"] == 1
+    assert (stats["hits"], stats["misses"]) == (2, 1)
+
+
+def test_lru_peek_leaves_counters_and_order_alone(clock):
+    lru = LRUCache(max_size=2, ttl_seconds=5)
+    lru.set("a", 1)
+    lru.set("b", 2)
+    assert lru.peek("a") == 1
+    assert lru.peek("missing") is None
+    assert (lru.hits, lru.misses) == (0, 0)
+    lru.set("c", 3)  # "a" was only peeked, so it is still the oldest
+    assert lru.peek("a") is None
+    clock.value += 10
+    assert lru.peek("c", "expired") == "expired"
+
+
+def test_singleflight_runs_concurrent_callers_once():
+    flight = SingleFlight()
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "value"
+
+    async def scenario():
+        return await asyncio.gather(*(flight.do("key", compute) for _ in range(5)))
+
+    assert asyncio.run(scenario()) == ["value"] * 5
+    assert len(calls) == 1
+    assert flight.stats() == {"in_flight": 0, "started": 1, "coalesced": 4}
+
+
+def test_singleflight_cancelled_caller_does_not_cancel_the_work():
+    flight = SingleFlight()
+    finished = []
+
+    async def compute():
+        await asyncio.sleep(0.02)
+        finished.append(1)
+        return "value"
+
+    async def scenario():
+        first = asyncio.ensure_future(flight.do("key", compute))
+        second = asyncio.ensure_future(flight.do("key", compute))
+        await asyncio.sleep(0)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(scenario()) == "value"
+    assert finished == [1]
+
+
+def test_singleflight_shares_errors_and_forgets_the_key():
+    flight = SingleFlight()
+    attempts = []
+
+    async def failing():
+        attempts.append(1)
+        await asyncio.sleep(0)
+        raise RuntimeError("boom")
+
+    async def scenario():
+        results = await asyncio.gather(flight.do("key", failing), flight.do("key", failing), return_exceptions=True)
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert flight.in_flight == 0
+        # A later call starts a new computation
+        with pytest.raises(RuntimeError):
+            await flight.do("key", failing)
+
+    asyncio.run(scenario())
+    assert len(attempts) == 2
@@ -0,0 +1,32 @@
+import base64
+import json
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+
+from history import decode_cursor, encode_cursor
+
+
+def test_cursor_round_trip():
+    doc = {"timestamp": datetime(2024, 5, 17, 13, 45, 12, 123000), "_id": ObjectId()}
+    assert decode_cursor(encode_cursor(doc)) == (doc["timestamp"], doc["_id"])
+
+
+def encoded(position) -> str:
+    return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+
+@pytest.mark.parametrize("cursor", [
+    "not a cursor",
+    encoded({"t": "2024-05-17T13:45:12"})[:-4],          # truncated
+    encoded({"t": "2024-05-17T13:45:12"}),               # no id
+    encoded({"t": "yesterday", "id": str(ObjectId())}),  # bad time
+    encoded({"t": "2024-05-17T13:45:12", "id": "123"}),  # bad id
+    encoded(["2024-05-17T13:45:12", str(ObjectId())]),   # wrong shape
+])
+def test_tampered_cursor_is_rejected(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor)
+    assert error.value.status_code == 400
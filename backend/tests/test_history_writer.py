@@ -0,0 +1,176 @@
+import asyncio
+from typing import List
+
+from bson import ObjectId
+from pymongo.errors import AutoReconnect, BulkWriteError
+
+from utils import history_writer as history_writer_module
+from utils.history_writer import DUPLICATE_KEY, HistoryWriter
+
+
+class FakeCollection:
+    """insert_many that fails as scripted, then stores documents the way Mongo would."""
+
+    def __init__(self):
+        self.stored: List[dict] = []
+        self.failures: List = []   # one entry per call: an exception, a set of rejected indexes, or None
+
+    async def insert_many(self, docs, ordered=True):
+        for doc in docs:
+            doc.setdefault("_id", ObjectId())
+        failure = self.failures.pop(0) if self.failures else None
+        if isinstance(failure, Exception):
+            raise failure
+        stored_ids = {doc["_id"] for doc in self.stored}
+        errors = []
+        for index, doc in enumerate(docs):
+            if doc["_id"] in stored_ids:
+                errors.append({"index": index, "code": DUPLICATE_KEY, "errmsg": "duplicate key"})
+            elif failure and index in failure:
+                errors.append({"index": index, "code": 121, "errmsg": "document failed validation"})
+            else:
+                self.stored.append(doc)
+        if errors:
+            raise BulkWriteError({"writeErrors": errors, "writeConcernErrors": []})
+
+
+class FakeDatabase:
+    def __init__(self):
+        self.collections = {}
+
+    def __getitem__(self, name):
+        return self.collections.setdefault(name, FakeCollection())
+
+
+def make_writer(**kwargs):
+    database = FakeDatabase()
+    writer = HistoryWriter(database, max_batch=100, flush_interval_ms=60_000, **kwargs)
+    return writer, database["history"]
+
+
+def run(writer: HistoryWriter, scenario):
+    async def wrapped():
+        try:
+            await scenario()
+        finally:
+            if writer._task is not None:
+                writer._task.cancel()
+    asyncio.run(wrapped())
+
+
+def test_failed_flush_requeues_the_batch():
+    writer, collection = make_writer()
+    collection.failures = [AutoReconnect("primary stepped down")]
+
+    async def scenario():
+        writer.add_many("history", [{"n": 1}, {"n": 2}])
+        await writer.flush()
+        assert writer.pending == 2
+        assert writer.failed_flushes == 1
+        await writer.flush()
+
+    run(writer, scenario)
+    assert writer.pending == 0
+    assert [doc["n"] for doc in collection.stored] == [1, 2]
+    assert writer.written == 2
+
+
+def test_partial_failure_requeues_only_rejected_documents():
+    writer, collection = make_writer()
+    collection.failures = [{1}]
+    seen = []
+
+    async def listener(docs):
+        seen.extend(doc["n"] for doc in docs)
+
+    writer.on_write("history", listener)
+
+    async def scenario():
+        writer.add_many("history", [{"n": 1}, {"n": 2}, {"n": 3}])
+        await writer.flush()
+        assert writer.pending == 1
+        await writer.flush()
+
+    run(writer, scenario)
+    assert sorted(doc["n"] for doc in collection.stored) == [1, 2, 3]
+    assert sorted(seen) == [1, 2, 3]  # listeners ran once per stored document
+    assert writer.written == 3
+
+
+def test_duplicate_key_counts_as_written():
+    writer, collection = make_writer()
+    stored = {"_id": ObjectId(), "n": 1}
+    collection.stored.append(dict(stored))
+
+    async def scenario():
+        writer.add_many("history", [stored, {"n": 2}])
+        await writer.flush()
+
+    run(writer, scenario)
+    assert writer.pending == 0
+    assert writer.written == 2
+    assert len(collection.stored) == 2
+
+
+def test_rejected_document_is_dropped_after_max_attempts():
+    writer, collection = make_writer()
+    attempts = history_writer_module.MAX_DOCUMENT_ATTEMPTS
+    collection.failures = [{0}] * attempts
+
+    async def scenario():
+        writer.add("history", {"n": 1})
+        for _ in range(attempts):
+            await writer.flush()
+
+    run(writer, scenario)
+    assert writer.pending == 0
+    assert writer.dropped == 1
+    assert collection.stored == []
+    assert writer._attempts == {}
+
+
+def test_add_many_drops_beyond_max_pending():
+    writer, collection = make_writer(max_pending=3)
+
+    async def scenario():
+        writer.add_many("history", [{"n": n} for n in range(5)])
+        writer.add("history", {"n": 5})
+        assert writer.pending == 3
+        assert writer.dropped == 3
+        await writer.flush()
+
+    run(writer, scenario)
+    assert [doc["n"] for doc in collection.stored] == [0, 1, 2]
+
+
+def test_requeue_respects_max_pending():
+    writer, collection = make_writer(max_pending=3)
+    collection.failures = [AutoReconnect("down")]
+
+    async def scenario():
+        writer.add_many("history", [{"n": n} for n in range(3)])
+        original_write = writer._write
+
+        async def write_while_more_arrive(name, docs):
+            writer.add_many("history", [{"n": 10}, {"n": 11}])
+            return await original_write(name, docs)
+
+        writer._write = write_while_more_arrive
+        await writer.flush()
+
+    run(writer, scenario)
+    assert writer.pending == 3
+    assert writer.dropped == 2
+
+
+def test_write_now_queues_documents_it_could_not_write():
+    writer, collection = make_writer()
+    collection.failures = [AutoReconnect("down")]
+
+    async def scenario():
+        await writer.write_now("history", [{"n": 1}, {"n": 2}])
+        assert writer.pending == 2
+        await writer.flush()
+
+    run(writer, scenario)
+    assert [doc["n"] for doc in collection.stored] == [1, 2]
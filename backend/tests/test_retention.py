@@ -0,0 +1,101 @@
+import asyncio
+
+import pytest
+from bson import ObjectId
+
+import retention
+
+
+class FakeIndexedCollection:
+    def __init__(self, indexes):
+        self.indexes = indexes
+        self.calls = []
+
+    async def index_information(self):
+        return self.indexes
+
+    async def create_index(self, field, **options):
+        self.calls.append(("create", field, options))
+        name = f"{field}_1"
+        if name in self.indexes and self.indexes[name].get("expireAfterSeconds") != options.get("expireAfterSeconds"):
+            raise AssertionError("IndexOptionsConflict")
+        self.indexes[name] = {"key": [(field, 1)], **options}
+
+    async def drop_index(self, name):
+        self.calls.append(("drop", name))
+        del self.indexes[name]
+
+
+class FakeDatabase:
+    def __init__(self, indexes):
+        self.collection = FakeIndexedCollection(indexes)
+        self.commands = []
+
+    def __getitem__(self, name):
+        return self.collection
+
+    async def command(self, *args, **kwargs):
+        self.commands.append((args, kwargs))
+        index = kwargs["index"]
+        field = next(iter(index["keyPattern"]))
+        self.collection.indexes[f"{field}_1"]["expireAfterSeconds"] = index["expireAfterSeconds"]
+
+
+def ensure(monkeypatch, indexes, seconds):
+    database = FakeDatabase(indexes)
+    monkeypatch.setattr(retention, "db", database)
+    asyncio.run(retention._ensure_time_index("prediction_history", "timestamp", seconds))
+    return database
+
+
+def test_creates_plain_or_ttl_index(monkeypatch):
+    plain = ensure(monkeypatch, {}, None)
+    assert plain.collection.indexes["timestamp_1"].get("expireAfterSeconds") is None
+    ttl = ensure(monkeypatch, {}, 3600)
+    assert ttl.collection.indexes["timestamp_1"]["expireAfterSeconds"] == 3600
+
+
+def test_existing_index_with_the_same_options_is_left_alone(monkeypatch):
+    for seconds in (None, 3600):
+        index = {"key": [("timestamp", 1)]}
+        if seconds:
+            index["expireAfterSeconds"] = seconds
+        database = ensure(monkeypatch, {"timestamp_1": index}, seconds)
+        assert database.collection.calls == []
+        assert database.commands == []
+
+
+def test_plain_index_becomes_ttl_in_place(monkeypatch):
+    database = ensure(monkeypatch, {"timestamp_1": {"key": [("timestamp", 1)]}}, 7200)
+    assert database.collection.calls == []
+    assert database.collection.indexes["timestamp_1"]["expireAfterSeconds"] == 7200
+
+
+def test_removing_the_ttl_rebuilds_a_plain_index(monkeypatch):
+    database = ensure(monkeypatch, {"timestamp_1": {"key": [("timestamp", 1)], "expireAfterSeconds": 3600}}, None)
+    assert database.collection.calls == [("drop", "timestamp_1"), ("create", "timestamp", {})]
+    assert "expireAfterSeconds" not in database.collection.indexes["timestamp_1"]
+
+
+@pytest.mark.parametrize("ttl_days, hot_days, valid", [
+    (0, 90, True),
+    (365, 90, True),
+    (30, 0, True),
+    (30, 90, False),
+    (90, 90, False),
+])
+def test_ttl_must_outlive_the_hot_window(monkeypatch, ttl_days, hot_days, valid):
+    monkeypatch.setattr(retention, "RAW_TTL_DAYS", ttl_days)
+    monkeypatch.setattr(retention, "HOT_DAYS", hot_days)
+    if valid:
+        retention.check_retention_settings()
+    else:
+        with pytest.raises(ValueError):
+            retention.check_retention_settings()
+
+
+def test_chunk_id_depends_on_the_entries_not_their_order():
+    entries = [{"_id": ObjectId()} for _ in range(3)]
+    assert retention._chunk_id("prediction_history", entries) == retention._chunk_id("prediction_history", entries[::-1])
+    assert retention._chunk_id("prediction_history", entries) != retention._chunk_id("prediction_history", entries[:2])
+    assert retention._chunk_id("prediction_history", entries) != retention._chunk_id("simplify_history", entries)
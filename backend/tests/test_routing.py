@@ -0,0 +1,161 @@
+import asyncio
+
+import pytest
+
+from utils import routing
+from utils.routing import BackendHealth, CircuitBreaker, SimplifyRouter
+
+
+def make_router(mt5_depth: int = 0) -> SimplifyRouter:
+    return SimplifyRouter(mt5_queue_depth=lambda: mt5_depth, mt5_available=lambda: True)
+
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failures=3, cooldown=60)
+    for _ in range(2):
+        breaker.record(False)
+    assert breaker.state == "closed"
+    breaker.record(True)
+    breaker.record(False)
+    breaker.record(False)
+    assert breaker.state == "closed"  # a success resets the count
+    breaker.record(False)
+    assert breaker.state == "open"
+    assert not breaker.allow()
+    assert breaker.opened == 1
+
+
+def test_breaker_half_open_probe_closes_or_reopens():
+    breaker = CircuitBreaker(failures=1, cooldown=0)
+    breaker.record(False)
+    assert breaker.state == "open"
+
+    assert breaker.allow()
+    assert breaker.state == "half_open"
+    assert not breaker.allow()  # only the single probe passes
+
+    breaker.record(False)
+    assert breaker.state == "open"
+    assert breaker.opened == 2
+
+    assert breaker.allow()
+    breaker.record(True)
+    assert breaker.state == "closed"
+    assert breaker.consecutive_failures == 0
+
+
+def test_slow_call_counts_as_failure():
+    health = BackendHealth(1.0, alpha=0.5, slow_call=2.0)
+    assert health.observe(1.0, True)
+    assert not health.observe(3.0, True)
+    assert health.error_rate == pytest.approx(0.5)
+
+
+def test_slow_openai_calls_open_the_breaker():
+    router = make_router()
+    router.breaker = CircuitBreaker(failures=2, cooldown=60)
+    slow = router.health["openai"].slow_call + 1
+    router.observe("openai", slow, True)
+    router.observe("openai", slow, True)
+    assert router.breaker.state == "open"
+
+
+async def _tracked_call(router: SimplifyRouter, started: asyncio.Event):
+    with router.track_openai():
+        started.set()
+        await asyncio.sleep(60)
+
+
+def test_cancelled_call_is_not_observed():
+    router = make_router()
+    router.breaker = CircuitBreaker(failures=1, cooldown=60)
+
+    async def scenario():
+        for _ in range(5):
+            started = asyncio.Event()
+            task = asyncio.ensure_future(_tracked_call(router, started))
+            await started.wait()
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+    asyncio.run(scenario())
+    assert router.breaker.state == "closed"
+    assert router.health["openai"].samples == 0
+    assert not router._in_flight
+
+
+def test_abandoned_stream_is_not_observed():
+    router = make_router()
+
+    async def stream():
+        with router.track_openai():
+            yield "first"
+            yield "second"
+
+    async def scenario():
+        pieces = stream()
+        assert await pieces.__anext__() == "first"
+        await pieces.aclose()
+
+    asyncio.run(scenario())
+    assert router.health["openai"].samples == 0
+    assert not router._in_flight
+
+
+def test_failed_and_successful_calls_are_observed():
+    router = make_router()
+    with pytest.raises(RuntimeError):
+        with router.track_openai():
+            raise RuntimeError("boom")
+    assert router.health["openai"].samples == 1
+    assert router.breaker.consecutive_failures == 1
+
+    with router.track_openai():
+        pass
+    assert router.health["openai"].samples == 2
+    assert router.breaker.consecutive_failures == 0
+
+
+def test_open_breaker_routes_to_mt5_and_sends_one_probe(monkeypatch):
+    monkeypatch.setattr(routing, "PROBE_INTERVAL", 60)
+    router = make_router()
+    router.breaker = CircuitBreaker(failures=1, cooldown=0)
+    router.observe("openai", 0.1, False)
+    assert router.breaker.state == "open"
+
+    assert router.choose() == ("openai", "probe")
+    assert router.breaker.state == "half_open"
+    # The probe is pending: everything else goes to MT5
+    assert router.choose() == ("mt5", "circuit_open")
+
+    router.observe("openai", 0.1, True)
+    assert router.breaker.state == "closed"
+    assert router.choose()[0] == "openai"
+
+
+def test_failed_probe_reopens_the_breaker(monkeypatch):
+    monkeypatch.setattr(routing, "PROBE_INTERVAL", 60)
+    router = make_router()
+    router.breaker = CircuitBreaker(failures=1, cooldown=60)
+    router.observe("openai", 0.1, False)
+    assert router.choose() == ("mt5", "circuit_open")
+
+    router.breaker.cooldown = 0
+    assert router.choose() == ("openai", "probe")
+    router.observe("openai", 0.1, False)
+    assert router.breaker.state == "open"
+
+
+def test_mt5_queue_shifts_traffic_to_openai():
+    router = make_router(mt5_depth=10)
+    router.health["openai"].last_observed = float("inf")  # no probe due
+    router.health["openai"].latency = 3.0
+    router.health["mt5"].latency = 1.0
+    assert router.choose() == ("openai", "faster")
+
+    idle = make_router(mt5_depth=0)
+    idle.health["openai"].last_observed = float("inf")
+    idle.health["openai"].latency = 3.0
+    idle.health["mt5"].latency = 1.0
+    assert idle.choose() == ("mt5", "faster")
@@ -0,0 +1,124 @@
+"""
+Async micro-batching scheduler for model inference.
+"""
+
+import asyncio
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Optional
+
+
+class MicroBatcher:
+    """
+    Collects concurrent requests and runs them as a single batched call.
+
+    Items submitted while a batch is being collected are grouped until either
+    `max_batch_size` items are pending or `max_wait_ms` has passed since the
+    first one arrived. The batch function runs on a dedicated worker thread so
+    the event loop keeps serving other requests during the forward pass.
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[List[Any]], List[Any]],
+        max_batch_size: int = 16,
+        max_wait_ms: float = 8.0,
+        name: str = "batcher"
+    ):
+        """
+        Args:
+            batch_fn (Callable): Function mapping a list of items to a list of results
+            max_batch_size (int): Maximum number of items per batch
+            max_wait_ms (float): Maximum time to wait for a batch to fill up
+            name (str): Name used for the worker thread
+        """
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self.name = name
+
+        self._pending: deque = deque()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._full: Optional[asyncio.Event] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=name)
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of items waiting to be batched."""
+        return len(self._pending)
+
+    async def submit(self, item: Any) -> Any:
+        """
+        Queue an item and wait for its individual result.
+
+        Args:
+            item (Any): Input for the batch function
+
+        Returns:
+            Any: The result produced for this item
+        """
+        self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((item, future))
+        self._wakeup.set()
+        if len(self._pending) >= self.max_batch_size:
+            self._full.set()
+        return await future
+
+    async def run_batch(self, items: List[Any]) -> List[Any]:
+        """Run an already-formed batch on the worker thread."""
+        return await self.run_in_worker(self.batch_fn, items)
+
+    async def run_in_worker(self, fn: Callable, *args: Any) -> Any:
+        """Run `fn` on the worker thread, serialized with the batches."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, fn, *args)
+
+    def _ensure_worker(self):
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+            self._full = asyncio.Event()
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            if not self._pending:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+
+            # Give concurrent callers a short window to join this batch
+            if len(self._pending) < self.max_batch_size and self.max_wait > 0:
+                self._full.clear()
+                try:
+                    await asyncio.wait_for(self._full.wait(), self.max_wait)
+                except asyncio.TimeoutError:
+                    pass
+
+            batch = []
+            while self._pending and len(batch) < self.max_batch_size:
+                item, future = self._pending.popleft()
+                if not future.cancelled():
+                    batch.append((item, future))
+            if not batch:
+                continue
+
+            try:
+                results = await self.run_batch([item for item, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    def shutdown(self):
+        """Stop the worker task and release the worker thread."""
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,245 @@
+"""
+Write-behind buffer for history collections.
+"""
+
+import asyncio
+import os
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from dotenv import load_dotenv
+from pymongo.errors import BulkWriteError
+
+from database import db
+from utils.metrics import metrics
+
+load_dotenv()
+
+DUPLICATE_KEY = 11000
+# A document rejected on its own this many times is dropped instead of retried
+MAX_DOCUMENT_ATTEMPTS = 3
+
+
+class HistoryWriter:
+    """
+    Buffers history documents in memory and writes them with `insert_many`.
+
+    Request handlers call `add` and return immediately. A background task
+    flushes a collection once `max_batch` documents are pending or every
+    `flush_interval_ms`, whichever comes first. `stop` drains whatever is
+    left, so nothing is lost on a clean shutdown.
+    """
+
+    def __init__(self, database, max_batch: int = 200, flush_interval_ms: float = 500, max_pending: int = 10000):
+        """
+        Args:
+            database: Motor database handle
+            max_batch (int): Pending documents that trigger an immediate flush
+            flush_interval_ms (float): Maximum time a document waits in the buffer
+            max_pending (int): Documents buffered while Mongo is failing; new ones are dropped beyond it
+        """
+        self.db = database
+        self.max_batch = max(1, max_batch)
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_pending = max_pending
+
+        self._pending: Dict[str, List[dict]] = defaultdict(list)
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._listeners: Dict[str, List[Callable[[List[dict]], Awaitable[None]]]] = defaultdict(list)
+        self._attempts: Dict[Any, int] = {}
+
+        self.written = 0
+        self.dropped = 0
+        self.failed_flushes = 0
+
+    @property
+    def pending(self) -> int:
+        """Number of documents waiting to be written."""
+        return sum(len(docs) for docs in self._pending.values())
+
+    def add(self, collection: str, doc: dict):
+        """
+        Queue one document for `collection` (fire-and-forget).
+
+        Args:
+            collection (str): Target collection name
+            doc (dict): Document to insert
+        """
+        self.add_many(collection, [doc])
+
+    def add_many(self, collection: str, docs: List[dict]):
+        """Queue several documents for `collection` (fire-and-forget); drops them once `max_pending` are waiting."""
+        self._ensure_started()
+        room = max(0, self.max_pending - self.pending)
+        if room < len(docs):
+            self.dropped += len(docs) - room
+            docs = docs[:room]
+        self._pending[collection].extend(docs)
+        if len(self._pending[collection]) >= self.max_batch:
+            self._wakeup.set()
+
+    def on_write(self, collection: str, listener: Callable[[List[dict]], Awaitable[None]]):
+        """
+        Call `listener` with every batch of documents written to `collection`.
+
+        Listener errors are logged and do not affect the write.
+        """
+        self._listeners[collection].append(listener)
+
+    async def write_now(self, collection: str, docs: List[dict]):
+        """
+        Insert documents immediately, bypassing the buffer (for bulk callers).
+
+        Never raises for a database error, so a caller streaming a response
+        is not cut off: documents that could not be written are queued for
+        the background flush, exactly as a failed flush would requeue them.
+        """
+        try:
+            failed = await self._write(collection, docs)
+        except Exception as e:
+            self.failed_flushes += 1
+            print(f"❌ History write to {collection} failed, queued for retry: {e}")
+            self._ensure_started()
+            self._requeue(collection, docs)
+            return
+        if failed:
+            self.failed_flushes += 1
+            self._ensure_started()
+            self._requeue(collection, self._retryable(failed))
+
+    async def _write(self, collection: str, docs: List[dict]) -> List[dict]:
+        """
+        Insert documents and run the listeners for those stored.
+
+        `insert_many` sets `_id` on every document, so a document whose
+        earlier insert succeeded unnoticed (e.g. the connection dropped
+        before the reply) comes back as a duplicate key; it is stored and
+        its listeners have not run yet, so it counts as written.
+
+        Returns:
+            List[dict]: Documents that failed for another reason
+        """
+        if not docs:
+            return []
+        failed: List[dict] = []
+        try:
+            with metrics.stage("history.insert"):
+                await self.db[collection].insert_many(docs, ordered=False)
+        except BulkWriteError as e:
+            errors = e.details.get("writeErrors", [])
+            if e.details.get("writeConcernErrors") and not errors:
+                raise
+            failed_indexes = {error["index"] for error in errors if error.get("code") != DUPLICATE_KEY}
+            failed = [doc for index, doc in enumerate(docs) if index in failed_indexes]
+            docs = [doc for index, doc in enumerate(docs) if index not in failed_indexes]
+            if failed:
+                print(f"❌ {len(failed)} history documents for {collection} failed: {errors[0].get('errmsg')}")
+        self.written += len(docs)
+        if not docs:
+            return failed
+
+        for listener in self._listeners.get(collection, []):
+            try:
+                with metrics.stage("history.listener"):
+                    await listener(docs)
+            except Exception as e:
+                print(f"⚠️ History listener for {collection} failed: {e}")
+        return failed
+
+    def _ensure_started(self):
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+            self._flush_lock = asyncio.Lock()
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def start(self):
+        """Start the background flush task."""
+        self._ensure_started()
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def flush(self):
+        """Write every pending document now."""
+        if self._flush_lock is None:
+            return
+        async with self._flush_lock:
+            for collection in list(self._pending):
+                while self._pending[collection]:
+                    docs = self._pending[collection][:self.max_batch]
+                    del self._pending[collection][:len(docs)]
+                    try:
+                        failed = await self._write(collection, docs)
+                    except asyncio.CancelledError:
+                        self._requeue(collection, docs)
+                        raise
+                    except Exception as e:
+                        self.failed_flushes += 1
+                        print(f"❌ History flush to {collection} failed: {e}")
+                        self._requeue(collection, docs)
+                        break
+                    if self._attempts:
+                        failed_ids = {id(doc) for doc in failed}
+                        for doc in docs:
+                            if id(doc) not in failed_ids:
+                                self._attempts.pop(doc.get("_id"), None)
+                    if failed:
+                        self.failed_flushes += 1
+                        self._requeue(collection, self._retryable(failed))
+                        break
+
+    def _retryable(self, failed: List[dict]) -> List[dict]:
+        """Documents rejected individually, minus those out of attempts (counted as dropped)."""
+        retry = []
+        for doc in failed:
+            attempts = self._attempts.get(doc["_id"], 0) + 1
+            if attempts >= MAX_DOCUMENT_ATTEMPTS:
+                self._attempts.pop(doc["_id"], None)
+                self.dropped += 1
+            else:
+                self._attempts[doc["_id"]] = attempts
+                retry.append(doc)
+        return retry
+
+    def _requeue(self, collection: str, docs: List[dict]):
+        room = self.max_pending - self.pending
+        kept = docs[:max(0, room)]
+        self.dropped += len(docs) - len(kept)
+        self._pending[collection][:0] = kept
+
+    async def stop(self):
+        """Stop the background task and drain the buffer."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "pending": self.pending,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed_flushes": self.failed_flushes
+        }
+
+
+# Singleton instance
+history_writer = HistoryWriter(
+    db,
+    max_batch=int(os.getenv("HISTORY_FLUSH_BATCH", "200")),
+    flush_interval_ms=float(os.getenv("HISTORY_FLUSH_INTERVAL_MS", "500")),
+    max_pending=int(os.getenv("HISTORY_MAX_PENDING", "10000"))
+)
@@ -0,0 +1,212 @@
+"""
+Lightweight instrumentation: stage latency histograms, collected gauges and
+counters, Prometheus text exposition and opt-in Server-Timing headers.
+"""
+
+import bisect
+import threading
+import time
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+# Stages timed on the current request's task, when it asked for Server-Timing
+_request_timings: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("request_timings", default=None)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Histogram:
+    """Thread-safe cumulative histogram with optional labels."""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series: Dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels):
+        """Record one observation for the given label values."""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                # One count per bucket plus +Inf, then sum and count
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            snapshot = {labels: list(series) for labels, series in self._series.items()}
+        for labels, series in sorted(snapshot.items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), series):
+                cumulative += count
+                le = f'le="{bound}"'
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, labels)} {series[-2]}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, labels)} {series[-1]}"
+
+
+# A collected metric returns one value, or {label values: value}
+Collected = Union[float, Dict[tuple, float]]
+
+
+class _Stage:
+    __slots__ = ("metrics", "name", "started")
+
+    def __init__(self, metrics: "Metrics", name: str):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.metrics.observe_stage(self.name, time.perf_counter() - self.started)
+        return False
+
+
+class Metrics:
+    """
+    Registry behind `/metrics`.
+
+    Stage timings are observed as they happen (a bisect and a short lock).
+    Everything else — queue depths, cache counters, load times — is read
+    from its owner by a collector function only when `/metrics` is scraped,
+    so it costs nothing on the request path.
+    """
+
+    def __init__(self, prefix: str = "dyslexia"):
+        self.prefix = prefix
+        self.stage_seconds = Histogram(f"{prefix}_stage_seconds", "Time spent per processing stage", ("stage",))
+        self.request_seconds = Histogram(
+            f"{prefix}_http_request_seconds", "HTTP request latency", ("method", "route", "status")
+        )
+        self._histograms: Dict[str, Histogram] = {}
+        self._collectors: List[Tuple[str, str, str, Tuple[str, ...], Callable[[], Collected]]] = []
+
+    def stage(self, name: str) -> _Stage:
+        """
+        Context manager timing one stage.
+
+            with metrics.stage("readability.forward"):
+                ...
+        """
+        return _Stage(self, name)
+
+    def observe_stage(self, name: str, seconds: float):
+        """Record a stage duration measured elsewhere."""
+        self.stage_seconds.observe(seconds, name)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings.append((name, seconds))
+
+    def histogram(self, name: str, help_text: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        """Create (or return) an extra histogram, named without the prefix."""
+        full_name = f"{self.prefix}_{name}"
+        if full_name not in self._histograms:
+            self._histograms[full_name] = Histogram(full_name, help_text, labelnames, buckets)
+        return self._histograms[full_name]
+
+    def collect(self, name: str, kind: str, help_text: str, fn: Callable[[], Collected], labelnames: Sequence[str] = ()):
+        """
+        Register a gauge or counter read at scrape time.
+
+        Args:
+            name (str): Metric name without the prefix
+            kind (str): "gauge" or "counter"
+            help_text (str): Description
+            fn (Callable): Returns a number, or a dict of label-value tuples to numbers
+            labelnames (Sequence[str]): Label names for dict results
+        """
+        self._collectors.append((f"{self.prefix}_{name}", kind, help_text, tuple(labelnames), fn))
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        lines: List[str] = []
+        for histogram in (self.stage_seconds, self.request_seconds, *self._histograms.values()):
+            lines.extend(histogram.render())
+
+        for name, kind, help_text, labelnames, fn in self._collectors:
+            try:
+                value = fn()
+            except Exception as e:
+                print(f"⚠️ Metric {name} failed: {e}")
+                continue
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            if isinstance(value, dict):
+                for labels, sample in sorted(value.items(), key=lambda item: str(item[0])):
+                    if sample is not None:
+                        lines.append(f"{name}{_format_labels(labelnames, labels)} {float(sample)}")
+            elif value is not None:
+                lines.append(f"{name} {float(value)}")
+        return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware timing every request by route template.
+
+    A request sending `X-Server-Timing: 1` gets a `Server-Timing` header
+    listing the stages timed on its own task (worker-thread stages shared
+    by a whole batch are only in the histograms).
+    """
+
+    def __init__(self, app, metrics: "Metrics"):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        timings = [] if (b"x-server-timing", b"1") in scope.get("headers", ()) else None
+        token = _request_timings.set(timings)
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if timings is not None:
+                    entries = [f"{name};dur={seconds * 1000:.2f}" for name, seconds in timings]
+                    entries.append(f"total;dur={(time.perf_counter() - started) * 1000:.2f}")
+                    message["headers"] = [*message.get("headers", []), (b"server-timing", ", ".join(entries).encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_timings.reset(token)
+            route = scope.get("route")
+            self.metrics.request_seconds.observe(
+                time.perf_counter() - started,
+                scope["method"],
+                getattr(route, "path", "unmatched"),
+                status
+            )
+
+
+# Singleton instance
+metrics = Metrics()
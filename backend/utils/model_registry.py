@@ -0,0 +1,199 @@
+"""
+Model lifecycle management: lazy or background loading, warm-up and readiness.
+"""
+
+import asyncio
+import os
+import threading
+import time
+import traceback
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from dotenv import load_dotenv
+from fastapi import HTTPException
+
+load_dotenv()
+
+
+class ModelRegistry:
+    """
+    Loads models on demand or in the background instead of at import time.
+
+    Each model is registered with a loader and an optional warm-up function
+    that runs one inference on synthetic input. `get` returns the loaded
+    model, loading it on the calling thread if needed; concurrent callers
+    wait for the same load. Load and warm-up times are kept together with
+    any other startup stages for the `/health/startup` report.
+    """
+
+    def __init__(self):
+        self._loaders: Dict[str, Callable[[], Any]] = {}
+        self._warmups: Dict[str, Optional[Callable[[Any], Any]]] = {}
+        self._models: Dict[str, Any] = {}
+        self._errors: Dict[str, str] = {}
+        self._status: Dict[str, str] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._stages: Dict[str, float] = {}
+        self._cold: set = set()
+        self._task: Optional[asyncio.Future] = None
+        self.mode = os.getenv("MODEL_LOADING", "background")
+
+    def register(self, name: str, loader: Callable[[], Any], warmup: Optional[Callable[[Any], Any]] = None):
+        """
+        Register a model.
+
+        Args:
+            name (str): Model name used with `get`
+            loader (Callable): Zero-argument function returning the loaded model
+            warmup (Optional[Callable]): Function running one inference on the model
+        """
+        self._loaders[name] = loader
+        self._warmups[name] = warmup
+        self._locks[name] = threading.Lock()
+        self._status[name] = "pending"
+        self._models.pop(name, None)
+        self._errors.pop(name, None)
+        self._cold.discard(name)
+
+    def record_stage(self, stage: str, seconds: float):
+        """Add a startup stage duration to the timing report."""
+        self._stages[stage] = round(seconds, 4)
+
+    def get(self, name: str) -> Any:
+        """
+        Return the model called `name`, loading it first if necessary (blocking).
+
+        Raises:
+            HTTPException: 503 if the model failed to load
+        """
+        model = self._models.get(name)
+        if model is not None:
+            return model
+
+        with self._locks[name]:
+            if name not in self._models:
+                self._load(name)
+        if name in self._errors:
+            raise HTTPException(
+                status_code=503,
+                detail=f"Model '{name}' is unavailable: {self._errors[name]}"
+            )
+        return self._models[name]
+
+    async def aget(self, name: str) -> Any:
+        """Like `get`, but loads on a worker thread so the event loop is not blocked."""
+        model = self._models.get(name)
+        if model is not None:
+            return model
+        return await asyncio.get_running_loop().run_in_executor(None, self.get, name)
+
+    def _load(self, name: str, warmup: bool = True):
+        self._status[name] = "loading"
+        self._errors.pop(name, None)
+        try:
+            started = time.perf_counter()
+            model = self._loaders[name]()
+            self.record_stage(f"{name}.load", time.perf_counter() - started)
+
+            if not warmup:
+                self._cold.add(name)
+            elif self._warmups[name] is not None:
+                started = time.perf_counter()
+                self._warmups[name](model)
+                self.record_stage(f"{name}.warmup", time.perf_counter() - started)
+
+            self._models[name] = model
+            self._status[name] = "ready"
+            print(f"✅ Model '{name}' ready")
+        except Exception as e:
+            detail = getattr(e, "detail", None) or str(e)
+            self._errors[name] = detail
+            self._status[name] = "failed"
+            print(f"❌ Model '{name}' failed to load: {detail}")
+            traceback.print_exc()
+
+    def load_all(self):
+        """Load every registered model and warm up any preloaded cold (blocking)."""
+        started = time.perf_counter()
+        for name in self._loaders:
+            try:
+                self.get(name)
+            except HTTPException:
+                pass
+        self.warm_cold()
+        self.record_stage("models.total", time.perf_counter() - started)
+
+    def preload(self, names: Optional[Iterable[str]] = None):
+        """
+        Load models without warming them up (blocking).
+
+        Used by the pre-fork server: warm-up runs inference, which starts
+        torch's thread pools, and those do not survive `fork`. Each worker
+        warms the inherited models in `start` instead.
+
+        Args:
+            names (Optional[Iterable[str]]): Models to load, all by default
+        """
+        started = time.perf_counter()
+        for name in (self._loaders if names is None else names):
+            with self._locks[name]:
+                if name not in self._models:
+                    self._load(name, warmup=False)
+        self.record_stage("models.preload", time.perf_counter() - started)
+
+    def warm_cold(self):
+        """Run the warm-up of every model loaded by `preload` (blocking)."""
+        for name in list(self._cold):
+            self._cold.discard(name)
+            if self._warmups[name] is not None:
+                started = time.perf_counter()
+                try:
+                    self._warmups[name](self._models[name])
+                except Exception as e:
+                    print(f"⚠️ Warm-up of '{name}' failed: {e}")
+                self.record_stage(f"{name}.warmup", time.perf_counter() - started)
+
+    async def start(self):
+        """
+        Start loading according to MODEL_LOADING.
+
+        "background" loads on a worker thread after startup, "eager" blocks
+        startup until every model is loaded, and "lazy" loads each model on
+        its first request. Preloaded models are warmed up in every mode.
+        """
+        if self.mode == "eager":
+            await asyncio.get_running_loop().run_in_executor(None, self.load_all)
+        elif self.mode == "background":
+            self._task = asyncio.get_running_loop().run_in_executor(None, self.load_all)
+        elif self._cold:
+            self._task = asyncio.get_running_loop().run_in_executor(None, self.warm_cold)
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._models
+
+    def status(self, name: str) -> str:
+        """Load status of `name`: pending, loading, ready or failed."""
+        return self._status.get(name, "pending")
+
+    @property
+    def ready(self) -> bool:
+        """True once every registered model is loaded (always true in lazy mode)."""
+        if self.mode == "lazy":
+            return not self._errors
+        return all(status == "ready" for status in self._status.values())
+
+    def report(self) -> Dict[str, Any]:
+        """Per-model status and per-stage startup timings in seconds."""
+        return {
+            "mode": self.mode,
+            "ready": self.ready,
+            "models": {
+                name: {"status": status, "error": self._errors.get(name)}
+                for name, status in self._status.items()
+            },
+            "stages": dict(self._stages)
+        }
+
+
+# Singleton instance
+model_registry = ModelRegistry()
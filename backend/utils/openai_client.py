@@ -4,27 +4,213 @@ OpenAI API client for text simplification.
 
 import os
 from dotenv import load_dotenv
+import asyncio
+import json
+import random
 import httpx
-from typing import Dict, Any
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from typing import AsyncIterator, Dict, Any, Optional
 from fastapi import HTTPException
 
+from utils.metrics import metrics
+
 load_dotenv()
 
+# Bump when the prompt changes so cached simplifications are not reused
+PROMPT_VERSION = "v1"
+
+# Responses worth retrying: rate limiting and transient server errors
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
 class OpenAIClient:
     """Client for OpenAI's Chat Completion API"""
 
     def __init__(self):
         """Initialize OpenAI client with API key and settings"""
+        # A missing key only fails OpenAI requests, not application startup
         self.api_key = os.getenv('OPENAI_API_KEY')
-        if not self.api_key:
-            raise ValueError("OPENAI_API_KEY environment variable not set")
 
-        self.base_url = "https://api.openai.com/v1/chat/completions"
+        # OPENAI_BASE_URL lets tests point the client at a local stub server
+        self.base_url = os.getenv('OPENAI_BASE_URL', 'https://api.openai.com/v1').rstrip('/')
+        self.model = os.getenv('OPENAI_MODEL', 'gpt-3.5-turbo')
+        self.prompt_version = PROMPT_VERSION
         self.headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json"
         }
 
+        # Connection pool, concurrency and retry settings
+        self.max_connections = int(os.getenv('OPENAI_MAX_CONNECTIONS', '20'))
+        self.max_keepalive = int(os.getenv('OPENAI_MAX_KEEPALIVE', '10'))
+        self.http2 = os.getenv('OPENAI_HTTP2', '0') == '1'
+        self.max_in_flight = int(os.getenv('OPENAI_MAX_IN_FLIGHT', '16'))
+        self.max_retries = int(os.getenv('OPENAI_MAX_RETRIES', '3'))
+        self.backoff_base = float(os.getenv('OPENAI_BACKOFF_BASE', '0.5'))
+        self.backoff_max = float(os.getenv('OPENAI_BACKOFF_MAX', '8'))
+        self.timeout = float(os.getenv('OPENAI_TIMEOUT', '30'))
+        self.connect_timeout = float(os.getenv('OPENAI_CONNECT_TIMEOUT', '5'))
+
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+        self.retries = 0
+        self.failures = 0
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Long-lived pooled HTTP client, created on first use."""
+        if self._client is None or self._client.is_closed:
+            http2 = self.http2
+            if http2:
+                try:
+                    import h2  # noqa: F401
+                except ImportError:
+                    print("⚠️ OPENAI_HTTP2=1 but the 'h2' package is missing, using HTTP/1.1")
+                    http2 = False
+
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers=self.headers,
+                http2=http2,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_keepalive
+                ),
+                timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout)
+            )
+        return self._client
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+        return self._semaphore
+
+    @property
+    def in_flight(self) -> int:
+        """Number of requests currently holding a concurrency slot."""
+        if self._semaphore is None:
+            return 0
+        return self.max_in_flight - self._semaphore._value
+
+    async def aclose(self):
+        """Close pooled connections."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _build_payload(self, text: str, stream: bool = False) -> Dict[str, Any]:
+        """Build the chat completion request for simplifying `text`."""
+        # Prepare the prompt
+        prompt = f"""Simplify the following Turkish text for individuals with dyslexia:
+
+            Original text: {text}
+
+            Simplified version:"""
+
+        # Prepare the request payload
+        payload = {
+            "model": self.model,
+            "messages": [{
+                "role": "user",
+                "content": prompt
+            }],
+            "temperature": 0.7,
+            "max_tokens": 1000
+        }
+        if stream:
+            payload["stream"] = True
+        return payload
+
+    def _retry_delay(self, attempt: int, response: Optional[httpx.Response]) -> float:
+        """Exponential backoff with full jitter, unless the server says how long to wait."""
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        if retry_after:
+            try:
+                return max(0.0, float(retry_after))
+            except ValueError:
+                try:
+                    when = parsedate_to_datetime(retry_after)
+                    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+                except (TypeError, ValueError):
+                    pass
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    async def _send(self, payload: Dict[str, Any], stream: bool = False) -> httpx.Response:
+        """
+        POST a chat completion, retrying transient failures until the deadline.
+
+        Holds a concurrency slot only while a request is on the wire, never
+        while backing off. For streaming requests the returned response is
+        still open and its slot is released when it is closed.
+
+        Raises:
+            HTTPException: If the request fails or the deadline passes
+        """
+        if not self.api_key:
+            raise HTTPException(status_code=503, detail="OPENAI_API_KEY environment variable not set")
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout
+
+        error = None
+        for attempt in range(self.max_retries + 1):
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+
+            response = None
+            error = None
+            await self.semaphore.acquire()
+            try:
+                request = self.client.build_request(
+                    "POST",
+                    "/chat/completions",
+                    json=payload,
+                    timeout=httpx.Timeout(remaining, connect=min(self.connect_timeout, remaining))
+                )
+                with metrics.stage("openai.request"):
+                    response = await asyncio.wait_for(self.client.send(request, stream=stream), remaining)
+            except (httpx.TransportError, asyncio.TimeoutError) as e:
+                error = e
+            except BaseException:
+                self.semaphore.release()
+                raise
+
+            if response is not None and response.status_code not in RETRYABLE_STATUS:
+                if stream:
+                    _release_on_close(response, self.semaphore)
+                else:
+                    self.semaphore.release()
+                return response
+
+            delay = self._retry_delay(attempt, response)
+            give_up = attempt == self.max_retries or loop.time() + delay >= deadline
+
+            if response is not None and give_up:
+                # Hand the last error response to the caller to report
+                if stream:
+                    _release_on_close(response, self.semaphore)
+                else:
+                    self.semaphore.release()
+                return response
+
+            if response is not None:
+                await response.aclose()
+            self.semaphore.release()
+            if give_up:
+                break
+
+            self.retries += 1
+            await asyncio.sleep(delay)
+
+        self.failures += 1
+        raise HTTPException(
+            status_code=504,
+            detail=f"OpenAI API unavailable: {error or 'deadline exceeded'}"
+        )
+
     async def simplify_text(self, text: str) -> str:
         """
         Simplify Turkish text using OpenAI's API.
@@ -39,34 +225,11 @@ class OpenAIClient:
             HTTPException: If API request fails
         """
         try:
-            # Prepare the prompt
-            prompt = f"""Simplify the following Turkish text for individuals with dyslexia:
-
-            Original text: {text}
-
-            Simplified version:"""
-
-            # Prepare the request payload
-            payload = {
-                "model": "gpt-3.5-turbo",
-                "messages": [{
-                    "role": "user",
-                    "content": prompt
-                }],
-                "temperature": 0.7,
-                "max_tokens": 1000
-            }
-
-            # Create a new AsyncClient for this request only
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    self.base_url,
-                    headers=self.headers,
-                    json=payload
-                )
+            response = await self._send(self._build_payload(text))
 
             # Handle non-200 responses
             if response.status_code != 200:
+                self.failures += 1
                 error_msg = response.json().get('error', {}).get('message', 'Unknown error')
                 raise HTTPException(
                     status_code=500,
@@ -78,11 +241,83 @@ class OpenAIClient:
             simplified_text = response_data['choices'][0]['message']['content'].strip()
             return simplified_text
 
+        except HTTPException as e:
+            raise e
+        except Exception as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Failed to simplify text: {str(e)}"
+            )
+
+    async def stream_simplify_text(self, text: str) -> AsyncIterator[str]:
+        """
+        Simplify Turkish text using OpenAI's streaming mode.
+
+        Args:
+            text (str): Original Turkish text to simplify
+
+        Yields:
+            str: Pieces of the simplified text as they are generated
+
+        Raises:
+            HTTPException: If API request fails
+        """
+        try:
+            response = await self._send(self._build_payload(text, stream=True), stream=True)
+            try:
+                if response.status_code != 200:
+                    self.failures += 1
+                    body = json.loads(await response.aread() or b"{}")
+                    error_msg = body.get('error', {}).get('message', 'Unknown error')
+                    raise HTTPException(
+                        status_code=500,
+                        detail=f"OpenAI API error: {error_msg}"
+                    )
+
+                # Server-sent events: "data: {...}" lines, ending with "data: [DONE]"
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[len("data:"):].strip()
+                    if data == "[DONE]":
+                        break
+                    delta = json.loads(data)['choices'][0].get('delta', {})
+                    if delta.get('content'):
+                        yield delta['content']
+            finally:
+                await response.aclose()
+
+        except HTTPException as e:
+            raise e
         except Exception as e:
             raise HTTPException(
                 status_code=500,
                 detail=f"Failed to simplify text: {str(e)}"
             )
 
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "retries": self.retries,
+            "failures": self.failures
+        }
+
+def _release_on_close(response: httpx.Response, semaphore: asyncio.Semaphore):
+    """Release the concurrency slot once a streamed response is closed."""
+    original_aclose = response.aclose
+    released = False
+
+    async def aclose():
+        nonlocal released
+        try:
+            await original_aclose()
+        finally:
+            if not released:
+                released = True
+                semaphore.release()
+
+    response.aclose = aclose
+
 # Singleton instance
 openai_client = OpenAIClient()
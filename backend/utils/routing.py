@@ -0,0 +1,225 @@
+"""
+Adaptive routing between the OpenAI API and the local MT5 model.
+"""
+
+import asyncio
+import itertools
+import os
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# --- Routing settings ---
+ROUTING_EWMA_ALPHA = float(os.getenv("AUTO_EWMA_ALPHA", "0.2"))
+# OpenAI (better output) keeps traffic while its expected latency is at most this times MT5's
+OPENAI_PREFERENCE = float(os.getenv("AUTO_OPENAI_PREFERENCE", "1.5"))
+# Without recent OpenAI results, the next request probes it so a recovery is noticed
+PROBE_INTERVAL = float(os.getenv("AUTO_PROBE_INTERVAL", "30"))
+BREAKER_FAILURES = int(os.getenv("AUTO_BREAKER_FAILURES", "5"))
+BREAKER_COOLDOWN = float(os.getenv("AUTO_BREAKER_COOLDOWN", "30"))
+# `auto` stops waiting for OpenAI after this; slower calls count as failures
+OPENAI_TIMEOUT = float(os.getenv("AUTO_OPENAI_TIMEOUT", "10"))
+
+# Priors until the first results arrive, in seconds
+INITIAL_LATENCY = {"openai": 1.0, "mt5": 2.0}
+
+
+class BackendHealth:
+    """Exponentially weighted latency and error rate of one backend."""
+
+    def __init__(self, initial_latency: float, alpha: float = ROUTING_EWMA_ALPHA, slow_call: float = OPENAI_TIMEOUT):
+        self.alpha = alpha
+        self.slow_call = slow_call
+        self.latency = initial_latency
+        self.error_rate = 0.0
+        self.samples = 0
+        self.last_observed = float("-inf")
+
+    def observe(self, seconds: float, ok: bool) -> bool:
+        """
+        Record one call; failed calls count their time too.
+
+        Returns:
+            bool: Whether the call counts as a success (it did not fail and was not slow)
+        """
+        ok = ok and seconds <= self.slow_call
+        if self.samples == 0:
+            self.latency = seconds
+        else:
+            self.latency += self.alpha * (seconds - self.latency)
+        self.error_rate += self.alpha * ((0.0 if ok else 1.0) - self.error_rate)
+        self.samples += 1
+        self.last_observed = time.monotonic()
+        return ok
+
+    def expected_latency(self) -> float:
+        """Expected time to a successful result, counting retries of failed calls."""
+        return self.latency / max(0.1, 1.0 - self.error_rate)
+
+    def stats(self) -> Dict:
+        return {
+            "latency_s": round(self.latency, 4),
+            "error_rate": round(self.error_rate, 4),
+            "samples": self.samples
+        }
+
+
+class CircuitBreaker:
+    """
+    Stops sending traffic to a failing backend.
+
+    Closed: calls pass. After `failures` consecutive failures it opens and
+    calls are refused for `cooldown` seconds. Then it is half-open: one
+    probe call passes, and its outcome closes or re-opens the breaker.
+    """
+
+    def __init__(self, failures: int = BREAKER_FAILURES, cooldown: float = BREAKER_COOLDOWN):
+        self.failure_threshold = failures
+        self.cooldown = cooldown
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.opened = 0
+
+    def allow(self) -> bool:
+        """Whether a call may go through; moves an expired open breaker to half-open."""
+        if self.state == "closed":
+            return True
+        if self.state == "open" and time.monotonic() - self.opened_at >= self.cooldown:
+            self.state = "half_open"
+            return True
+        # Half-open lets only its single probe through
+        return False
+
+    def record(self, ok: bool):
+        if ok:
+            self.state = "closed"
+            self.consecutive_failures = 0
+            return
+        self.consecutive_failures += 1
+        if self.state == "half_open" or self.consecutive_failures >= self.failure_threshold:
+            if self.state != "open":
+                self.opened += 1
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    def stats(self) -> Dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "opened_total": self.opened
+        }
+
+
+class SimplifyRouter:
+    """
+    Chooses "openai" or "mt5" for each `auto` simplification.
+
+    Every simplification, streamed or not, reports its duration and outcome
+    to `observe`, so the routing follows both explicit and automatic traffic. OpenAI is used
+    while its breaker is closed and its expected latency (EWMA latency,
+    inflated by its error rate) is within `OPENAI_PREFERENCE` times MT5's,
+    where MT5's is its per-job latency times the jobs queued in front.
+    """
+
+    def __init__(self, mt5_queue_depth: Callable[[], int], mt5_available: Callable[[], bool]):
+        """
+        Args:
+            mt5_queue_depth (Callable): Returns the MT5 jobs running or queued
+            mt5_available (Callable): Returns False if the MT5 model failed to load
+        """
+        self.health = {method: BackendHealth(latency) for method, latency in INITIAL_LATENCY.items()}
+        self.breaker = CircuitBreaker()
+        self.mt5_queue_depth = mt5_queue_depth
+        self.mt5_available = mt5_available
+        self.probe_started = float("-inf")
+        self.routes: Dict[Tuple[str, str], int] = {}
+        self._calls = itertools.count()
+        self._in_flight: Dict[int, float] = {}
+
+    def observe(self, method: str, seconds: float, ok: bool):
+        """Record the duration and outcome of one call to `method`."""
+        ok = self.health[method].observe(seconds, ok)
+        if method == "openai":
+            self.breaker.record(ok)
+            self.probe_started = float("-inf")
+
+    @contextmanager
+    def track_openai(self) -> Iterator[None]:
+        """
+        Time one OpenAI call (on the event loop) and `observe` it when it ends.
+
+        A call the client walked away from is not observed, as it says
+        nothing about OpenAI: a stream it stopped reading (GeneratorExit) or
+        a request cancelled on disconnect (CancelledError).
+        """
+        call = next(self._calls)
+        started = self._in_flight[call] = time.monotonic()
+        ok = False
+        abandoned = False
+        try:
+            yield
+            ok = True
+        except (GeneratorExit, asyncio.CancelledError):
+            abandoned = True
+            raise
+        finally:
+            del self._in_flight[call]
+            if not abandoned:
+                self.observe("openai", time.monotonic() - started, ok)
+
+    def openai_expected_latency(self) -> float:
+        oldest = min(self._in_flight.values(), default=None)
+        waited = time.monotonic() - oldest if oldest is not None else 0.0
+        return max(self.health["openai"].expected_latency(), waited)
+
+    def _probe(self) -> bool:
+        """Start a probe of OpenAI unless one is pending (a lost probe expires)."""
+        now = time.monotonic()
+        if now - self.probe_started < PROBE_INTERVAL:
+            return False
+        self.probe_started = now
+        return True
+
+    def count(self, method: str, reason: str):
+        self.routes[(method, reason)] = self.routes.get((method, reason), 0) + 1
+
+    def choose(self) -> Tuple[str, str]:
+        """
+        Pick the backend for the next request.
+
+        Returns:
+            Tuple[str, str]: Method and the reason it was chosen
+        """
+        if not self.mt5_available():
+            return "openai", "mt5_unavailable"
+
+        if self.breaker.state != "closed":
+            # The breaker turns half-open once, and stays so until the probe reports
+            if (self.breaker.allow() or self.breaker.state == "half_open") and self._probe():
+                return "openai", "probe"
+            return "mt5", "circuit_open"
+
+        # Calls on the wire will report soon enough, no probe needed
+        stale = time.monotonic() - self.health["openai"].last_observed > PROBE_INTERVAL
+        if stale and not self._in_flight and self._probe():
+            return "openai", "probe"
+
+        mt5_expected = self.health["mt5"].latency * (self.mt5_queue_depth() + 1)
+        if self.openai_expected_latency() <= mt5_expected * OPENAI_PREFERENCE:
+            return "openai", "faster"
+        return "mt5", "faster"
+
+    def stats(self) -> Dict:
+        return {
+            "breaker": self.breaker.stats(),
+            "backends": {method: health.stats() for method, health in self.health.items()},
+            "openai_in_flight": len(self._in_flight),
+            "openai_expected_latency_s": round(self.openai_expected_latency(), 4),
+            "mt5_queue_depth": self.mt5_queue_depth(),
+            "routes": {f"{method}:{reason}": count for (method, reason), count in sorted(self.routes.items())}
+        }
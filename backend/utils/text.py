@@ -0,0 +1,96 @@
+"""
+Text normalization helpers shared by the model endpoints.
+"""
+
+import hashlib
+import re
+import unicodedata
+from typing import List, Tuple
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalize text so that trivially different copies compare equal.
+
+    Applies Unicode NFC (Turkish characters can arrive precomposed or with
+    combining marks), collapses runs of whitespace and strips the ends.
+    Case is preserved because the models are case-sensitive.
+
+    Args:
+        text (str): Raw input text
+
+    Returns:
+        str: Normalized text
+    """
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFC", text)).strip()
+
+
+def content_key(text: str, *namespace: str) -> str:
+    """
+    Build a content-addressed cache key for `text`.
+
+    Args:
+        text (str): Raw input text, normalized before hashing
+        namespace (str): Extra parts such as the model version
+
+    Returns:
+        str: Hex SHA-256 digest
+    """
+    digest = hashlib.sha256()
+    for part in namespace:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x00")
+    digest.update(normalize_text(text).encode("utf-8"))
+    return digest.hexdigest()
+
+
+# Common Turkish abbreviations that end with a period but not a sentence
+_ABBREVIATIONS = {
+    "dr", "prof", "doç", "yrd", "av", "sn", "bkz", "vb", "vs", "örn", "ör",
+    "no", "s", "sf", "yy", "mö", "ms", "cad", "sok", "mah", "apt", "st"
+}
+_SENTENCE_END = re.compile(r"[.!?…]+[\"'”’)\]]*(?=\s|$)")
+
+
+def sentence_spans(text: str) -> List[Tuple[int, int]]:
+    """
+    Split Turkish text into sentences.
+
+    Sentences end at `.`, `!`, `?` or `…` followed by whitespace. A period
+    after a known abbreviation ("Dr.", "vb.") or an ordinal number
+    ("3. sınıf") does not end a sentence.
+
+    Args:
+        text (str): Text to split
+
+    Returns:
+        List[Tuple[int, int]]: (start, end) character offsets of each sentence
+    """
+    spans = []
+    start = 0
+    for match in _SENTENCE_END.finditer(text):
+        if match.group().startswith("."):
+            word = text[start:match.start()].split()[-1:] or [""]
+            token = word[0].lower()
+            if token in _ABBREVIATIONS or token.isdigit():
+                continue
+        spans.append((start, match.end()))
+        start = match.end()
+    spans.append((start, len(text)))
+
+    # Trim surrounding whitespace and drop empty pieces
+    trimmed = []
+    for begin, end in spans:
+        piece = text[begin:end]
+        if piece.strip():
+            begin += len(piece) - len(piece.lstrip())
+            end -= len(piece) - len(piece.rstrip())
+            trimmed.append((begin, end))
+    return trimmed
+
+
+def split_sentences(text: str) -> List[str]:
+    """Return the sentences of `text` as strings (see `sentence_spans`)."""
+    return [text[begin:end] for begin, end in sentence_spans(text)]
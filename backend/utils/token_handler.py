@@ -4,13 +4,19 @@ JWT token handling and password hashing utilities.
 
 from datetime import datetime, timedelta
 from typing import Optional, Dict
+import asyncio
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import HTTPException, status
 
+from utils.cache import LRUCache
+from utils.metrics import metrics
+
 load_dotenv()
 
 class TokenHandler:
@@ -23,6 +29,16 @@ class TokenHandler:
         self.algorithm = os.getenv('ALGORITHM', 'HS256')
         self.pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+        # Verified tokens, each kept until its own `exp`
+        self.token_cache = LRUCache(max_size=int(os.getenv('TOKEN_CACHE_SIZE', '10000')))
+
+        # bcrypt takes ~250 ms of CPU and releases the GIL, so it runs on
+        # worker threads instead of stalling the event loop
+        self.hash_executor = ThreadPoolExecutor(
+            max_workers=int(os.getenv('PASSWORD_HASH_WORKERS', str(min(4, os.cpu_count() or 1)))),
+            thread_name_prefix="bcrypt"
+        )
+
     def create_access_token(self, data: dict, expires_delta: Optional[timedelta] = None) -> str:
         """
         Create a JWT access token with the given data and expiration.
@@ -47,6 +63,9 @@ class TokenHandler:
     def decode_token(self, token: str) -> Dict:
         """
         Decode and validate a JWT token.
+
+        Tokens that verified once are answered from `token_cache` until
+        they expire.
         
         Args:
             token (str): JWT token to decode
@@ -57,9 +76,12 @@ class TokenHandler:
         Raises:
             HTTPException: If token is invalid or expired
         """
+        payload = self.token_cache.get(token)
+        if payload is not None:
+            return dict(payload)
+
         try:
             payload = jwt.decode(token, self.secret_key, algorithms=[self.algorithm])
-            return payload
         except JWTError:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -67,6 +89,14 @@ class TokenHandler:
                 headers={"WWW-Authenticate": "Bearer"}
             )
 
+        # Tokens without `exp` never expire and are not worth pinning in memory
+        exp = payload.get("exp")
+        if isinstance(exp, (int, float)):
+            ttl = exp - time.time()
+            if ttl > 0:
+                self.token_cache.set(token, dict(payload), ttl_seconds=ttl)
+        return payload
+
     def get_password_hash(self, password: str) -> str:
         """
         Hash a password using bcrypt.
@@ -92,5 +122,18 @@ class TokenHandler:
         """
         return self.pwd_context.verify(plain_password, hashed_password)
 
+    async def aget_password_hash(self, password: str) -> str:
+        """Like `get_password_hash`, but runs on the bcrypt worker pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.hash_executor, self.get_password_hash, password)
+
+    async def averify_password(self, plain_password: str, hashed_password: str) -> bool:
+        """Like `verify_password`, but runs on the bcrypt worker pool."""
+        loop = asyncio.get_running_loop()
+        with metrics.stage("auth.bcrypt"):
+            return await loop.run_in_executor(
+                self.hash_executor, self.verify_password, plain_password, hashed_password
+            )
+
 # Singleton instance
 token_handler = TokenHandler()
@@ -0,0 +1,151 @@
+"""
+Shared tokenization stage for the readability classifier and MT5.
+"""
+
+import asyncio
+import hashlib
+import os
+import threading
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Sequence
+
+import torch
+from dotenv import load_dotenv
+from transformers import AutoTokenizer
+
+from utils.cache import LRUCache
+from utils.metrics import metrics
+
+load_dotenv()
+
+# Tokenization for async callers runs here, never on the event loop
+tokenizer_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("TOKENIZER_THREADS", "2")),
+    thread_name_prefix="tokenizer"
+)
+
+ENCODING_CACHE_SIZE = int(os.getenv("ENCODING_CACHE_SIZE", "8192"))
+
+
+def load_fast_tokenizer(path: str, slow_class=None):
+    """
+    Load the Rust-backed fast tokenizer for `path`.
+
+    Args:
+        path (str): Model directory
+        slow_class: Python tokenizer class to fall back to, if any
+
+    Returns:
+        The fast tokenizer, or `slow_class` loaded from `path`
+    """
+    try:
+        tokenizer = AutoTokenizer.from_pretrained(path, use_fast=True)
+        if not tokenizer.is_fast:
+            print(f"⚠️ No fast tokenizer for {path}, tokenization will be slow")
+        return tokenizer
+    except Exception as e:
+        if slow_class is None:
+            raise
+        print(f"⚠️ Fast tokenizer unavailable for {path} ({e}), using {slow_class.__name__}")
+        return slow_class.from_pretrained(path)
+
+
+class TokenizationStage:
+    """
+    Memoized, thread-safe encoding for one model's tokenizer.
+
+    Encodings are kept as `array('i')` (4 bytes per token) in an LRU keyed
+    by a digest of the text, and `pad` turns a list of them into the model's
+    input tensors. Fast tokenizers reconfigure truncation on every call and
+    fail when used from two threads at once, so calls are serialized by a
+    lock; the Rust batch encoder is multi-threaded by itself.
+    """
+
+    def __init__(self, tokenizer, name: str, max_length: int, cache_size: int = ENCODING_CACHE_SIZE):
+        """
+        Args:
+            tokenizer: Hugging Face tokenizer
+            name (str): Stage name used in metrics
+            max_length (int): Truncation length, special tokens included
+            cache_size (int): Encodings kept in memory
+        """
+        self.tokenizer = tokenizer
+        self.name = name
+        self.max_length = max_length
+        self.cache = LRUCache(max_size=cache_size)
+        self.lock = threading.Lock()
+        self.pad_token_id = tokenizer.pad_token_id or 0
+        self.with_token_type_ids = "token_type_ids" in getattr(tokenizer, "model_input_names", ())
+
+    @staticmethod
+    def _key(text: str) -> bytes:
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+    def __call__(self, texts: List[str], **kwargs) -> Dict:
+        """Call the tokenizer directly (uncached), holding the stage lock."""
+        with self.lock:
+            return self.tokenizer(texts, **kwargs)
+
+    def encode_many(self, texts: Sequence[str]) -> List[array]:
+        """
+        Token ids of each text with special tokens, truncated to `max_length` (blocking).
+
+        Only texts missing from the cache are tokenized, in one batch call.
+        """
+        keys = [self._key(text) for text in texts]
+        encodings = [self.cache.get(key) for key in keys]
+
+        missing = {key: text for key, text, encoding in zip(keys, texts, encodings) if encoding is None}
+        if missing:
+            with metrics.stage(f"{self.name}.tokenize"), self.lock:
+                ids = self.tokenizer(
+                    list(missing.values()),
+                    add_special_tokens=True,
+                    truncation=True,
+                    max_length=self.max_length
+                )["input_ids"]
+            fresh = {key: array("i", token_ids) for key, token_ids in zip(missing, ids)}
+            for key, encoding in fresh.items():
+                self.cache.set(key, encoding)
+            encodings = [encoding if encoding is not None else fresh[key] for key, encoding in zip(keys, encodings)]
+        return encodings
+
+    def encode(self, text: str) -> array:
+        return self.encode_many([text])[0]
+
+    async def aencode_many(self, texts: Sequence[str]) -> List[array]:
+        """Like `encode_many`, on the tokenizer thread pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(tokenizer_executor, self.encode_many, list(texts))
+
+    async def aencode(self, text: str) -> array:
+        return (await self.aencode_many([text]))[0]
+
+    def pad(self, encodings: Sequence[Sequence[int]]) -> Dict[str, torch.Tensor]:
+        """
+        Right-pad encodings into `input_ids` and `attention_mask` tensors.
+
+        Args:
+            encodings (Sequence[Sequence[int]]): Token ids per row
+
+        Returns:
+            Dict[str, torch.Tensor]: Model inputs (plus zero `token_type_ids` for BERT-style models)
+        """
+        length = max((len(encoding) for encoding in encodings), default=0)
+        input_ids = torch.full((len(encodings), length), self.pad_token_id, dtype=torch.long)
+        attention_mask = torch.zeros((len(encodings), length), dtype=torch.long)
+        for row, encoding in enumerate(encodings):
+            if len(encoding):
+                if not isinstance(encoding, array):
+                    encoding = array("i", encoding)
+                input_ids[row, :len(encoding)] = torch.frombuffer(encoding, dtype=torch.int32)
+                attention_mask[row, :len(encoding)] = 1
+
+        inputs = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if self.with_token_type_ids:
+            inputs["token_type_ids"] = torch.zeros_like(input_ids)
+        return inputs
+
+    def stats(self) -> Dict:
+        return self.cache.stats()
@@ -20,6 +20,8 @@ import AsyncStorage from '@react-native-async-storage/async-storage';
 
 function HistoryScreen({ navigation }) {
   const [history, setHistory] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [loading, setLoading] = useState(true);
   const [refreshing, setRefreshing] = useState(false);
   const [error, setError] = useState('');
@@ -57,7 +59,8 @@ function HistoryScreen({ navigation }) {
     try {
       setError('');
       const data = await fetchHistory();
-      setHistory(data);
+      setHistory(data.items);
+      setNextCursor(data.next_cursor);
     } catch (err) {
       console.error('Error fetching history:', err);
       setError('Failed to load history. Please try again.');
@@ -70,6 +73,20 @@ function HistoryScreen({ navigation }) {
     }
   }, [navigation]);
 
+  const loadMore = async () => {
+    if (!nextCursor || loadingMore) return;
+    try {
+      setLoadingMore(true);
+      const data = await fetchHistory(nextCursor);
+      setHistory(prev => [...prev, ...data.items]);
+      setNextCursor(data.next_cursor);
+    } catch (err) {
+      console.error('Error fetching more history:', err);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const onRefresh = useCallback(() => {
     setRefreshing(true);
     loadHistory();
@@ -80,6 +97,7 @@ function HistoryScreen({ navigation }) {
       setLoading(true);
       await clearHistory();
       setHistory([]);
+      setNextCursor(null);
     } catch (err) {
       console.error('Error clearing history:', err);
       setError('Failed to clear history.');
@@ -166,8 +184,11 @@ function HistoryScreen({ navigation }) {
         <FlatList
           data={history}
           renderItem={renderItem}
-          keyExtractor={(item, index) => index.toString()}
+          keyExtractor={(item, index) => item._id || index.toString()}
           contentContainerStyle={styles.listContent}
+          onEndReached={loadMore}
+          onEndReachedThreshold={0.5}
+          ListFooterComponent={loadingMore ? <ActivityIndicator style={styles.footerLoader} /> : null}
           refreshControl={
             <RefreshControl
               refreshing={refreshing}
@@ -192,6 +213,9 @@ const styles = StyleSheet.create({
     justifyContent: 'center',
     alignItems: 'center'
   },
+  footerLoader: {
+    marginVertical: 16
+  },
   listContent: {
     padding: 16,
     paddingBottom: 24
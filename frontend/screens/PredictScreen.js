@@ -14,7 +14,7 @@ import { SafeAreaView } from 'react-native-safe-area-context';
 import { useAuth } from '../context/AuthContext';
 import * as Speech from 'expo-speech';
 import Voice from '@react-native-voice/voice'; // ✅ STT için
-import api, { predictText, simplifyText } from '../services/apiService';
+import { analyzeText as analyzeRequest } from '../services/apiService';
 
 function PredictScreen({ navigation }) {
   const { signOut } = useAuth();
@@ -94,26 +94,11 @@ function PredictScreen({ navigation }) {
     setError('');
 
     try {
-      const result = await predictText(text);
-
-      if (result.label === 'Difficult') {
-        try {
-          const simplifiedResult = await simplifyText(text, method);
-          if (simplifiedResult?.simplified) {
-            result.simplified = simplifiedResult.simplified;
-          }
-        } catch (simplifyError) {
-          console.error('Simplification error:', simplifyError);
-        }
+      const result = await analyzeRequest(text, method);
+      if (result.simplify_error) {
+        console.error('Simplification error:', result.simplify_error);
       }
 
-      await api.post('/history/save', {
-        text,
-        score: result.score,
-        label: result.label,
-        simplified: result.simplified || null,
-      });
-
       navigation.navigate('PredictionResult', { prediction: result });
 
     } catch (error) {
@@ -155,6 +140,7 @@ function PredictScreen({ navigation }) {
         <RadioButton.Group onValueChange={setMethod} value={method}>
           <RadioButton.Item label="MT5 Modeli (Yerel)" value="mt5" />
           <RadioButton.Item label="OpenAI Modeli (Bulut)" value="openai" />
+          <RadioButton.Item label="Otomatik (En Hızlı)" value="auto" />
         </RadioButton.Group>
 
         <View style={styles.voiceButtons}>
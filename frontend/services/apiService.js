@@ -38,8 +38,19 @@ export const simplifyText = async (text, method = "mt5") => {
   return response.data;
 };
 
-export const fetchHistory = async () => {
-  const response = await api.get('/history/');
+// Predicts, simplifies only if the text is difficult, and saves history: { score, label, simplified, ... }
+export const analyzeText = async (text, method = "mt5") => {
+  const response = await api.post(`/analyze/?method=${method}`, { text });
+  return response.data;
+};
+
+// Returns one page: { items, next_cursor }. Pass next_cursor to get the next page.
+export const fetchHistory = async (cursor = null, limit = 20) => {
+  const params = { limit, preview: 300 };
+  if (cursor) {
+    params.cursor = cursor;
+  }
+  const response = await api.get('/history/', { params });
   return response.data;
 };
 